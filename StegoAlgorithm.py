@@ -1,10 +1,550 @@
-from cryptography.fernet import Fernet
-import os, hashlib, base64
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+from itertools import chain, repeat
+from functools import lru_cache
+from contextlib import nullcontext
+from multiprocessing import parent_process
+import os, io, sys, time, zlib, hashlib, base64, threading, tracemalloc
+import numpy as np
 from PIL import Image
-from sys import exit
+import StegoRaw, StegoCompress, StegoPng, StegoFrames
 
 
-magicBytes = {"encrypted": 0x1410c0de, "unencrypted": 0xfeedc0de}
+magicBytes = {"encrypted": 0x1410c0de, "unencrypted": 0xfeedc0de, "encryptedChunked": 0x1411c0de,
+              "extended": 0x1412c0de, "container": 0x1420c0de, "shard": 0x5a4dc0de, "layout": 0x1a70c0de,
+              "archive": 0x14a0c0de}
+
+# Chunked encryption: plaintext is split into chunkSize blocks, each sealed with AES-GCM under a
+# 12-byte nonce made of a random 7-byte stream prefix, a 4-byte chunk counter and a last-chunk flag.
+chunkSize = 1 << 16
+streamPrefixSize = 7
+streamHeaderSize = streamPrefixSize + 4
+tagSize = 16
+
+# Frame header: 4-byte magic, 3-byte name length and 8-byte data length, stored in the first 20 pixels.
+headerSize = 4 + 3 + 8
+# Extended frame header: the frame header followed by the encryption ID and the codec ID of the data,
+# which is compressed before it is encrypted. The name is encrypted but never compressed.
+extendedHeaderSize = headerSize + 1 + 1
+encryptionIds = {"none": 0, "chunked": 1, "fernet": 2}
+# Encrypted extended frames whose encryption ID has saltedFlag set are keyed with a salted KDF, and the KDF
+# block follows the header: KDF ID, salt and 4 bytes of parameters (log2 N, r, p and a zero byte for scrypt,
+# the iteration count for PBKDF2). Frames without it are keyed with the legacy unsalted MD5 of the password.
+saltedFlag = 0x80
+kdfIds = {"md5": 0, "scrypt": 1, "pbkdf2": 2}
+kdfParams = {"scrypt": (15, 8, 1), "pbkdf2": (600000,)}
+saltSize = 16
+kdfHeaderSize = 1 + saltSize + 4
+# Derived keys are cached per (password, salt, KDF, parameters) for repeated extractions of the same image.
+derivedKeyCacheSize = 64
+# Container (v2) header: 4-byte magic, version, flags, codec ID, 2-byte name length and 8-byte data length,
+# followed for encrypted containers by the KDF block and the 7-byte nonce prefix of the body. The body is the
+# name followed by the (compressed) data, as one AES-GCM chunked stream authenticated together with the header.
+containerVersion = 2
+containerHeaderSize = 4 + 1 + 1 + 1 + 2 + 8
+containerEncryptedFlag = 0x01
+# Indexed containers (containerIndexedFlag) store the data as chunks of chunkSize bytes of the file, each compressed
+# on its own, so any range of the file can be read without the chunks before it. The header also records the 8-byte
+# file size, and is followed by the chunk index: the 4-byte stored size of every chunk, then the CRC32 of the header
+# and index. The name and the chunks are stored one after the other, sealed as the AES-GCM chunks of one stream when
+# encrypted, or each followed by its CRC32.
+containerIndexedFlag = 0x02
+supportedContainerFlags = containerEncryptedFlag | containerIndexedFlag
+indexedHeaderSize = containerHeaderSize + 8
+indexEntrySize = 4
+crcSize = 4
+# Archive header: 4-byte magic, flags, 4-byte member count, 4-byte table of contents size and 8-byte body size,
+# followed for encrypted archives by the KDF block and the 7-byte nonce prefix of the table, then the CRC32 of the
+# header. The table of contents follows, sealed with AES-GCM and authenticated with the header, or followed by its
+# CRC32. It has one entry per member: 2-byte name length, name, 8-byte offset in the body, 8-byte stored size,
+# 8-byte file size, codec ID and the 7-byte nonce prefix of the member. Every member is stored in the body like the
+# data of an indexed container, with its chunk index in place of the name, so members are read and added on
+# their own and the table is the only part sealed again when files are added.
+archiveHeaderSize = 4 + 1 + 4 + 4 + 8
+archiveEncryptedFlag = 0x01
+tocEntrySize = 2 + 8 + 8 + 8 + 1 + streamPrefixSize
+# Shard header: 4-byte magic, 8-byte payload ID, 2-byte shard index, 2-byte shard count and 8-byte shard size.
+# The shards of a payload, joined in index order, form a regular frame.
+shardHeaderSize = 4 + 8 + 2 + 2 + 8
+# Layout header: 4-byte magic, bits per channel, channel mask, flags and 8-byte body size, stored like a frame
+# header in the 2 LSBs of every channel. The body, a complete frame or shard, starts at the next pixel and uses
+# the given number of LSBs of the channels selected by the mask (bit 0 for R or gray, bit 1 for G, bit 2 for B,
+# bit 3 for alpha).
+# Frames hidden with 2 bits in every channel are stored without a layout header.
+layoutHeaderSize = 4 + 1 + 1 + 1 + 8
+defaultBitsPerChannel = 2
+# Scattered layouts (scatteredFlag) are followed by a KDF block, and the symbols of their body are spread over
+# the selected channels of every pixel after the header, in the order of a keyed permutation: an unbalanced
+# Feistel network of scatterRounds rounds over the channel slots, keyed with the password through the KDF,
+# with cycle walking.
+scatteredFlag = 0x01
+supportedLayoutFlags = scatteredFlag
+scatterHeaderSize = layoutHeaderSize + kdfHeaderSize
+scatterRounds = 4
+# Symbols placed per batch of permuted slots. Batches stay in the CPU caches while the rounds run over them.
+scatterBatchSize = 1 << 18
+# Frames of at least tiledMinimumSymbols symbols are embedded and extracted in tiles of about tileSymbols symbols,
+# on worker processes sharing the pixels. Smaller frames don't repay starting the processes.
+tiledMinimumSymbols = 1 << 24
+tileSymbols = 1 << 22
+maxHeaderSize = max(extendedHeaderSize + kdfHeaderSize, indexedHeaderSize + kdfHeaderSize + streamPrefixSize,
+                    archiveHeaderSize + kdfHeaderSize + streamPrefixSize + crcSize, shardHeaderSize, scatterHeaderSize)
+headerCrumbs = maxHeaderSize * 4
+
+# Formats whose encoders quantize or compress the pixels lossily, destroying the hidden bits. Carriers in these
+# formats are read, but output images cannot be saved in them.
+lossyFormats = ("GIF", "JPEG")
+# PIL modes whose values are hidden in as they are, with their number of channels. Bit 0 of a channel mask selects
+# R or gray, bit 1 G, bit 2 B and bit 3 alpha. Images in other modes are converted to RGB.
+nativeChannels = {"RGB": 3, "RGBA": 4, "I;16": 1, "I;16B": 1, "I;16L": 1}
+# Rawmodes of RGB and RGBA images with 16 bits per channel, which Pillow decodes to their high bytes,
+# and the rawmodes giving their low bytes (see decodeWidePixels).
+wideRawmodes = {"RGB;16B": "RGB;16L", "RGB;16L": "RGB;16B", "RGBA;16B": "RGBA;16L", "RGBA;16L": "RGBA;16B"}
+# Pillow versions, from the first to the last excluded, whose decoders are known to give the high or the low bytes
+# of these images when their tiles are set to one rawmode or the other. This is not part of the public API of Pillow,
+# so with other versions these images are refused rather than decoded wrongly.
+wideVersions = ((9, 1), (12, 0))
+nativeByteOrder = "L" if sys.byteorder == "little" else "B"
+
+# Lookup tables mapping every byte value to its groups of 1, 2 or 4 bits, most significant first.
+bitTables = {bits: np.array([[(byte >> shift) & ((1 << bits) - 1) for shift in range(8 - bits, -1, -bits)]
+                             for byte in range(256)], dtype=np.uint8) for bits in (1, 2, 4)}
+crumbTable = bitTables[2]
+
+
+class StegoError(Exception):
+    """
+    Base class of the errors raised when data cannot be hidden in or extracted from an image.
+    """
+
+
+class NoHiddenDataError(StegoError):
+    """
+    Raised when an image, or a set of shards, holds no hidden file that can be extracted.
+    """
+
+
+class PayloadTooLargeError(StegoError):
+    """
+    Raised when the framed payload does not fit in the carrier. The capacity in bytes is kept in "capacity".
+    """
+
+    def __init__(self, message: str, capacity: int):
+        super().__init__(message)
+        self.capacity = capacity
+
+    def __reduce__(self):
+        return self.__class__, (str(self), self.capacity)
+
+
+class InvalidPasswordError(StegoError):
+    """
+    Raised when encrypted hidden data cannot be decrypted, because the password is wrong or the data is damaged.
+    """
+
+
+class CorruptedDataError(StegoError):
+    """
+    Raised when a checksum of unencrypted hidden data does not match, because the image was modified.
+    """
+
+
+class OperationCancelled(StegoError):
+    """
+    Raised inside a running operation when its observer asks to cancel it.
+    """
+
+
+class StegoObserver:
+    """
+    Receives the progress of a running operation and can cancel it between chunks.
+    The default implementation ignores progress and never cancels, subclasses override what they need.
+    """
+
+    def progress(self, phase: str, done: int, total: int, rows: int = 0) -> None:
+        """
+        Called when a phase starts and after every chunk it processes.
+
+        Parameters:
+        phase (str): "prepare", "embed", "save", "decode" or "extract".
+        done (int): Bytes processed so far in the phase.
+        total (int): Bytes the phase processes in total, 0 if unknown.
+        rows (int): Carrier rows processed so far.
+
+        Returns:
+        None
+        """
+
+    def isCancelled(self) -> bool:
+        """
+        Checked between chunks, the operation stops with OperationCancelled once it returns True.
+
+        Parameters:
+        None
+
+        Returns:
+        bool: True to cancel the operation.
+        """
+        return False
+
+    def phaseFinished(self, record: dict) -> None:
+        """
+        Called with the measurements of every phase once it ends (see PhaseTimer).
+
+        Parameters:
+        record (dict): Keys "phase", "seconds" (wall time, nested phases included), "selfSeconds" (nested phases
+                       excluded), "bytes", "calls" and "peakMemory" (peak traced bytes, None unless tracemalloc
+                       is tracing).
+
+        Returns:
+        None
+        """
+
+
+# Phases running in the current thread, innermost last, so nested phases can be excluded from their parents.
+phaseStack = threading.local()
+
+
+class PhaseTimer:
+    """
+    Context manager measuring one phase of an operation: wall time, bytes processed and peak memory traced by
+    tracemalloc. A lazy phase, such as a stream of encrypted blocks, can be started and stopped once per block
+    and finished when the stream ends. The record is sent to the observer when the phase finishes.
+    """
+
+    def __init__(self, observer: StegoObserver, phase: str, size: int = 0):
+        self.observer = observer
+        self.record = {"phase": phase, "seconds": 0.0, "selfSeconds": 0.0, "bytes": size, "calls": 0,
+                       "peakMemory": None}
+
+    def __enter__(self) -> dict:
+        self.start()
+        return self.record
+
+    def __exit__(self, *exception) -> None:
+        self.stop()
+        if exception[0] is None:
+            self.finish()
+
+    def start(self) -> None:
+        """
+        Starts or resumes timing the phase.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        stack = phaseStack.__dict__.setdefault("timers", list())
+        if tracemalloc.is_tracing():
+            if stack:
+                stack[-1].notePeak(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(self)
+        self.childSeconds = 0.0
+        self.started = time.perf_counter()
+
+    def stop(self) -> None:
+        """
+        Pauses timing the phase and adds the elapsed time to its parent phase as nested time.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        elapsed = time.perf_counter() - self.started
+        stack = phaseStack.timers
+        stack.remove(self)
+        self.record["seconds"] += elapsed
+        self.record["selfSeconds"] += elapsed - self.childSeconds
+        self.record["calls"] += 1
+        if tracemalloc.is_tracing():
+            self.notePeak(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        if stack:
+            stack[-1].childSeconds += elapsed
+            if self.record["peakMemory"] is not None:
+                stack[-1].notePeak(self.record["peakMemory"])
+
+    def notePeak(self, peak: int) -> None:
+        """
+        Raises the peak memory of the phase to the given value.
+
+        Parameters:
+        peak (int): Peak traced memory in bytes.
+
+        Returns:
+        None
+        """
+        self.record["peakMemory"] = max(self.record["peakMemory"] or 0, peak)
+
+    def finish(self) -> None:
+        """
+        Sends the measurements of the phase to the observer.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        if self.observer is not None:
+            self.observer.phaseFinished(dict(self.record))
+
+
+def phaseTimer(observer: StegoObserver, phase: str, size: int = 0):
+    """
+    Function to time a phase of an operation, or do nothing without an observer.
+
+    Parameters:
+    observer (StegoObserver): Observer of the operation, or None.
+    phase (str): Name of the phase.
+    size (int): Bytes processed by the phase, if known upfront. Can be set later through the "bytes" key
+                of the record returned by the context manager.
+
+    Returns:
+    PhaseTimer: Context manager returning the record of the phase.
+    """
+    return PhaseTimer(observer, phase, size) if observer is not None else nullcontext(dict())
+
+
+def timedBlocks(blocks, observer: StegoObserver, phase: str):
+    """
+    Function to time a lazy phase producing a stream of blocks: only the time spent producing blocks is
+    counted, and the phase finishes when the stream ends.
+
+    Parameters:
+    blocks (iterable): Blocks of data, in order.
+    observer (StegoObserver): Observer of the operation, or None to pass the blocks through.
+    phase (str): Name of the phase.
+
+    Returns:
+    iterator: The blocks.
+    """
+    if observer is None:
+        yield from blocks
+        return
+
+    timer = PhaseTimer(observer, phase)
+    iterator = iter(blocks)
+    while True:
+        timer.start()
+        try:
+            block = next(iterator)
+        except StopIteration:
+            break
+        finally:
+            timer.stop()
+        timer.record["bytes"] += len(block)
+        yield block
+    timer.finish()
+
+
+class StegoProfiler(StegoObserver):
+    """
+    Observer collecting the measurements of every phase of the operations it observes into a report.
+    Memory is traced with tracemalloc while the profiler is active, which only sees allocations made
+    through Python and NumPy, not the pixel buffers held by Pillow.
+    """
+
+    def __init__(self, traceMemory: bool = True):
+        self.traceMemory = traceMemory
+        self.phases = list()
+        self.started = None
+        self.seconds = None
+        self.peakMemory = None
+
+    def __enter__(self):
+        if self.traceMemory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        else:
+            self.traceMemory = False
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.seconds = time.perf_counter() - self.started
+        if tracemalloc.is_tracing():
+            self.peakMemory = max([phase["peakMemory"] or 0 for phase in self.phases] + [tracemalloc.get_traced_memory()[1]])
+        if self.traceMemory:
+            tracemalloc.stop()
+
+    def phaseFinished(self, record: dict) -> None:
+        """
+        Collects the measurements of a phase.
+
+        Parameters:
+        record (dict): Measurements of the phase (see StegoObserver.phaseFinished).
+
+        Returns:
+        None
+        """
+        self.phases.append(record)
+
+    def report(self, **details) -> dict:
+        """
+        Returns the collected measurements, with the throughput of every phase that processed bytes.
+
+        Parameters:
+        **details: Extra fields describing the operation, added to the report.
+
+        Returns:
+        dict: Keys "seconds" (wall time of the profiled block), "peakMemory" and "phases", plus the details.
+        """
+        phases = list()
+        for record in self.phases:
+            record = dict(record)
+            if record["bytes"] and record["selfSeconds"] > 0:
+                record["megabytesPerSecond"] = round(record["bytes"] / record["selfSeconds"] / 1e6, 3)
+            phases.append(record)
+        return dict(details, seconds=self.seconds, peakMemory=self.peakMemory, phases=phases)
+
+
+def checkCancelled(observer: StegoObserver) -> None:
+    """
+    Function to stop an operation if its observer cancelled it.
+
+    Parameters:
+    observer (StegoObserver): Observer of the operation, or None.
+
+    Returns:
+    None
+
+    Raises:
+    OperationCancelled: If the observer cancelled the operation.
+    """
+    if observer is not None and observer.isCancelled():
+        raise OperationCancelled()
+
+
+def observeBlocks(blocks, observer: StegoObserver, phase: str, total: int, rowsFor=None):
+    """
+    Function to report the progress of a phase as a stream of blocks is consumed, and to cancel it between blocks.
+
+    Parameters:
+    blocks (iterable): Blocks of data, in order.
+    observer (StegoObserver): Observer of the operation, or None to pass the blocks through.
+    phase (str): Name of the phase.
+    total (int): Total size of the blocks in bytes, 0 if unknown.
+    rowsFor (callable): Function returning the number of carrier rows holding a given number of bytes.
+
+    Returns:
+    iterator: The blocks.
+    """
+    if observer is None:
+        yield from blocks
+        return
+
+    done = 0
+    observer.progress(phase, done, total)
+    for block in blocks:
+        checkCancelled(observer)
+        yield block
+        done += len(block)
+        observer.progress(phase, done, total, rowsFor(done) if rowsFor else 0)
+    checkCancelled(observer)
+
+
+def deriveKey(key: str) -> bytes:
+    """
+    Function to derive the 32-byte symmetric key from a password.
+
+    Parameters:
+    key (str): The encryption key as a string.
+
+    Returns:
+    bytes: The derived key.
+    """
+    return hashlib.md5(key.encode()).hexdigest().encode()
+
+
+@lru_cache(maxsize=derivedKeyCacheSize)
+def deriveSaltedKey(password: str, salt: bytes, kdf: str, params: tuple) -> bytes:
+    """
+    Function to derive a 32-byte symmetric key from a password with a salted KDF.
+    Results are kept in a bounded LRU cache, so each distinct salt is only derived once per process.
+
+    Parameters:
+    password (str): The password.
+    salt (bytes): Random salt stored in the frame header.
+    kdf (str): "scrypt" or "pbkdf2".
+    params (tuple): log2 N, r and p for scrypt, or the iteration count for PBKDF2 (see kdfParams).
+
+    Returns:
+    bytes: The derived key.
+    """
+    if kdf == "scrypt":
+        log2n, r, p = params
+        return hashlib.scrypt(password.encode(), salt=salt, n=1 << log2n, r=r, p=p,
+                              maxmem=128 * r * ((1 << log2n) + p + 2) + (1 << 20), dklen=32)
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, params[0], dklen=32)
+
+
+def packKdfParams(kdf: str, params: tuple) -> bytes:
+    """
+    Function to encode KDF parameters into the 4 bytes stored in the KDF block.
+
+    Parameters:
+    kdf (str): "scrypt" or "pbkdf2".
+    params (tuple): KDF parameters (see kdfParams).
+
+    Returns:
+    bytes: Encoded parameters.
+    """
+    if kdf == "scrypt":
+        return bytes(params) + b"\x00"
+    return params[0].to_bytes(4, byteorder='big')
+
+
+def unpackKdfParams(kdf: str, data: bytes) -> tuple:
+    """
+    Function to decode the KDF parameters stored in the KDF block. Parameters beyond sane work factors are
+    rejected, so a crafted header cannot make extraction exhaust memory or time.
+
+    Parameters:
+    kdf (str): "scrypt" or "pbkdf2".
+    data (bytes): Encoded parameters.
+
+    Returns:
+    tuple: KDF parameters, or None if they are out of range.
+    """
+    if kdf == "scrypt":
+        log2n, r, p = data[0], data[1], data[2]
+        sane = 1 <= log2n <= 20 and 1 <= r <= 32 and 1 <= p <= 16 and (128 * r) << log2n <= 1 << 30
+        return (log2n, r, p) if sane else None
+    iterations = int.from_bytes(data, byteorder='big')
+    return (iterations,) if 1 <= iterations <= 10 ** 8 else None
+
+
+def keyBytes(key) -> bytes:
+    """
+    Function to return the symmetric key for a password or an already derived key.
+
+    Parameters:
+    key (str | bytes): The password, keyed with the legacy MD5 derivation, or a key from deriveSaltedKey.
+
+    Returns:
+    bytes: The 32-byte key.
+    """
+    return key if isinstance(key, bytes) else deriveKey(key)
+
+
+def aesgcm(key: bytes):
+    """
+    Function to create an AES-GCM cipher. The cryptography package is imported on first use, so that operations
+    without encryption, and command-line calls that only parse their arguments, don't load it.
+
+    Parameters:
+    key (bytes): 256-bit key.
+
+    Returns:
+    AESGCM: The cipher.
+    """
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    return AESGCM(key)
 
 
 def encryptData(data: bytes, key: str) -> bytes:
@@ -13,12 +553,13 @@ def encryptData(data: bytes, key: str) -> bytes:
 
     Parameters:
     data (bytes): The data to be encrypted.
-    key (str): The encryption key as a string.
+    key (str | bytes): The password, or a key derived with deriveSaltedKey.
 
     Returns:
     bytes: The encrypted data.
     """
-    key = base64.urlsafe_b64encode(hashlib.md5(key.encode()).hexdigest().encode())
+    from cryptography.fernet import Fernet
+    key = base64.urlsafe_b64encode(keyBytes(key))
 
     f = Fernet(key)
     encData = f.encrypt(data)
@@ -31,222 +572,3885 @@ def decryptData(data: bytes, key: str) -> bytes:
 
     Parameters:
     data (bytes): The data to be decrypted.
-    key (str): The encryption key as a string.
+    key (str | bytes): The password, or a key derived with deriveSaltedKey.
 
     Returns:
     bytes: The decrypted data.
 
     Raises:
-    SystemExit: If the password is invalid or the data cannot be decrypted.
+    InvalidPasswordError: If the password is invalid or the data cannot be decrypted.
     """
+    from cryptography.fernet import Fernet
     try:
-        key = base64.urlsafe_b64encode(hashlib.md5(key.encode()).hexdigest().encode())
+        key = base64.urlsafe_b64encode(keyBytes(key))
 
         f = Fernet(key)
         decData = f.decrypt(data)
         return decData
     except Exception:
-        print("[!] Invalid password or data.")
-        exit()
+        raise InvalidPasswordError("Invalid password or data.") from None
 
 
-def changeLast2Bits(oldByte: int, newBits: int) -> int:
+def mapOrdered(function, items, workers: int = None, processes: bool = False):
     """
-    Function to replace the 2 least significant bits (LSBs) of the given oldByte with newBits.
+    Function to apply a function to items on a thread or process pool and yield the results in input order.
+    At most twice the number of workers items are in flight, so memory use stays bounded.
 
     Parameters:
-    oldByte (int): Original byte to be modified.
-    newBits (int): New values for the 2 LSBs.
+    function (callable): Function called with each item unpacked as positional arguments.
+    items (iterable): Tuples of arguments.
+    workers (int): Number of threads or processes. Defaults to the number of CPU cores.
+    processes (bool): Run the function on a pool of worker processes instead. The function and the items must
+                      then be picklable.
 
     Returns:
-    int: Byte with the two LSBs replaced by the newBits.
+    iterator: Results of the function calls.
     """
-    return ((oldByte >> 2) << 2) | newBits
+    workers = workers or os.cpu_count() or 1
+    with (ProcessPoolExecutor if processes else ThreadPoolExecutor)(workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(function, *item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
-def filesizeToBytes(data: bytes, lenght: int) -> bytes:
+def readChunks(openedFile, size: int = chunkSize):
     """
-    Function to return the size of data in a sequence of 8 bytes.
+    Function to read a binary file in blocks of exactly the given size, except for the last one.
 
     Parameters:
-    data (bytes): Data to determine its size, represented as a sequence of bytes.
-    length (int): Length of the byte sequence to represent the size of the data.
+    openedFile (file): File opened in binary mode.
+    size (int): Block size in bytes.
 
     Returns:
-    bytes: Size of the input data represented as a sequence of 8 bytes in big-endian byte order.
+    iterator: Blocks of data.
     """
-    return (len(data)).to_bytes(lenght, byteorder='big')
+    while True:
+        chunk = openedFile.read(size)
+        while chunk and len(chunk) < size:
+            more = openedFile.read(size - len(chunk))
+            if not more:
+                break
+            chunk += more
+        if not chunk:
+            return
+        yield chunk
 
 
-def serializeData(data: bytes, padding: int = 1) -> list:
+def chunkedSize(size: int) -> int:
     """
-    Function to serialize data into 2-bit groups and return a list of them.
+    Function to return the size of a chunked encryption stream for a plaintext of the given size.
 
     Parameters:
-    data (bytes): Input data to be serialized, represented as a sequence of bytes.
-    padding (int): Optional parameter specifying the desired padding. 
-                   Default value is 1, meaning no padding is added.
+    size (int): Plaintext size in bytes.
 
     Returns:
-    list: List of 2-bit groups representing the serialized data. 
-          The length of the list is adjusted to be divisible by the padding value.
+    int: Size of the encrypted stream in bytes.
     """
-    serializedData = list()
-    
-    for byte in data:
-        serializedData.append((byte >> 6) & 0b11)
-        serializedData.append((byte >> 4) & 0b11)
-        serializedData.append((byte >> 2) & 0b11)
-        serializedData.append((byte >> 0) & 0b11)
+    return streamHeaderSize + sealedSize(size)
 
-    while len(serializedData) % padding != 0:
-        serializedData.append(0)
 
-    return serializedData
+def sealedSize(size: int) -> int:
+    """
+    Function to return the size of the encrypted chunks of a stream, without its header.
 
+    Parameters:
+    size (int): Plaintext size in bytes.
 
-def deserializeData(data: list) -> bytes:
+    Returns:
+    int: Size of the encrypted chunks in bytes, tags included.
     """
-    Function to deserialize a list of 2-bit groups into the original data.
+    return size + tagSize * max(1, -(-size // chunkSize))
+
+
+def rechunk(blocks, size: int = chunkSize):
+    """
+    Function to regroup a stream of blocks of any size into blocks of exactly the given size, except for the last one.
 
     Parameters:
-    data (list): List of 2-bit groups to be deserialized.
+    blocks (iterable): Blocks of data, in order.
+    size (int): Block size in bytes.
 
     Returns:
-    bytes: Original data represented as a sequence of bytes.
+    iterator: Blocks of data.
     """
-    deserializeData = list()
-    
-    for i in range(0, len(data) - 4 + 1, 4):
-        byte = (data[i + 0] << 6) + \
-               (data[i + 1] << 4) + \
-               (data[i + 2] << 2) + \
-               (data[i + 3] << 0)
-        deserializeData.append(byte)
+    buffer = bytearray()
+    for block in blocks:
+        buffer += block
+        while len(buffer) >= size:
+            yield bytes(buffer[:size])
+            del buffer[:size]
+    if buffer:
+        yield bytes(buffer)
 
-    return bytes(deserializeData)
 
+def splitBlocks(blocks, size: int) -> tuple:
+    """
+    Function to split the first bytes off a stream of blocks.
+
+    Parameters:
+    blocks (iterable): Blocks of data, in order.
+    size (int): Number of leading bytes to split off.
 
-def hideDataToImage(inputImagePath: str, fileToHidePath: str, outputImagePath: str, password: str) -> None:
+    Returns:
+    tuple: The leading bytes and an iterator over the rest of the stream.
     """
-    Function to hide data within an image using LSB steganography.
+    blocks = iter(blocks)
+    head, headSize, rest = list(), 0, list()
+    for block in blocks:
+        needed = size - headSize
+        head.append(bytes(block[:needed]))
+        headSize += len(head[-1])
+        if len(block) > needed:
+            rest.append(block[needed:])
+            break
+        elif headSize == size:
+            break
+    return b"".join(head), chain(rest, blocks)
+
+
+def streamNonce(prefix: bytes, index: int, last: bool) -> bytes:
+    """
+    Function to build the AES-GCM nonce of a chunk in a chunked encryption stream.
 
     Parameters:
-    inputImagePath (str): Path to the input image file.
-    fileToHidePath (str): Path to the file to be hidden within the image.
-    outputImagePath (str): Path to save the output image with hidden data.
-    password (str): Password used for encryption.
+    prefix (bytes): Random prefix of the stream.
+    index (int): Index of the chunk.
+    last (bool): Whether the chunk is the last one, so truncated streams fail to decrypt.
 
     Returns:
-    None
+    bytes: 12-byte nonce.
     """
-    openedFile = open(fileToHidePath, "rb")
-    fileToHideName = os.path.basename(fileToHidePath)
-    encodeName = fileToHideName.encode()
-    data = openedFile.read()
-    print("[*] {} file size: {} bytes.".format(fileToHidePath, len(data)))
-    
-    image = Image.open(inputImagePath).convert('RGB')
-    pixels = image.load()
-    
-    if password:
-        data = encryptData(data, password)
-        encodeName = encryptData(encodeName, password)
-        print("[*] Encrypted data size: {} bytes".format(len(data)))
-        data = (magicBytes["encrypted"]).to_bytes(4, byteorder='big') + \
-                filesizeToBytes(encodeName, 3) + filesizeToBytes(data, 8) + encodeName + data
-    else:
-        data = (magicBytes["unencrypted"]).to_bytes(4, byteorder='big') + \
-                filesizeToBytes(encodeName, 3) + filesizeToBytes(data, 8) + encodeName + data
+    return prefix + index.to_bytes(4, byteorder='big') + bytes([last])
 
-    max_hidden_size = (image.size[0] * image.size[1] * 3 * 2) // 8
-    if len(data) > max_hidden_size:
-        print("[*] Maximum hidden file size for this image: {} bytes.".format(max_hidden_size))
-        print("[~] To hide this file, choose an image with a higher resolution.")
-        exit()
 
-    print("[*] Hiding file in image.")
-    data = serializeData(data, padding=3)
-    data.reverse()
-    
-    imageX, imageY = 0, 0
-    while data:
-        pixel_val = pixels[imageX, imageY]
-        pixel_val = (changeLast2Bits(pixel_val[0], data.pop()),
-                     changeLast2Bits(pixel_val[1], data.pop()),
-                     changeLast2Bits(pixel_val[2], data.pop()))
-        pixels[imageX, imageY] = pixel_val
-
-        if imageX == image.size[0] - 1:
-            imageX = 0
-            imageY += 1
-        else:
-            imageX += 1
-    
-    print(f"[+] Saving image to {outputImagePath}.")
-    image.save(outputImagePath)
+def sealChunks(chunks, key, prefix: bytes, associatedData: bytes = None, workers: int = None):
+    """
+    Function to encrypt a stream of plaintext blocks with AES-GCM, one authenticated chunk per block.
+    Chunks are sealed in parallel on a thread pool with a bounded number of blocks in memory.
+
+    Parameters:
+    chunks (iterable): Plaintext blocks of chunkSize bytes, the last one may be shorter.
+    key (str | bytes): The password, or a key derived with deriveSaltedKey.
+    prefix (bytes): Random nonce prefix of the stream.
+    associatedData (bytes): Data authenticated with every chunk but not encrypted, such as a header.
+    workers (int): Number of threads. Defaults to the number of CPU cores.
+
+    Returns:
+    iterator: The encrypted chunks, without a stream header.
+    """
+    aead = aesgcm(keyBytes(key))
+
+    def numbered():
+        index, previous = 0, None
+        for chunk in chunks:
+            if previous is not None:
+                yield index, previous, False
+                index += 1
+            previous = chunk
+        yield index, previous or b"", True
+
+    def encryptChunk(index, chunk, last):
+        return aead.encrypt(streamNonce(prefix, index, last), chunk, associatedData)
 
+    yield from mapOrdered(encryptChunk, numbered(), workers)
 
-def extractDataFromImage(inputImagePath: str, password: str) -> None:
+
+def openChunks(body, key, prefix: bytes, step: int = chunkSize + tagSize, associatedData: bytes = None,
+               workers: int = None, verified: bool = False):
     """
-    Function to extract hidden data from an image using LSB steganography.
+    Function to decrypt the chunks of an AES-GCM stream, chunks are opened in parallel on a thread pool.
+    A chunk that cannot be opened after another one was opened with the same key is damaged: the key is right.
 
     Parameters:
-    inputImagePath (str): Path to the input image file.
-    password (str): Password used for decryption if the hidden data is encrypted.
+    body (bytes | memoryview): The encrypted chunks, without a stream header.
+    key (str | bytes): The password, or a key derived with deriveSaltedKey.
+    prefix (bytes): Nonce prefix of the stream.
+    step (int): Size of a full encrypted chunk, tag included.
+    associatedData (bytes): Data authenticated with every chunk when it was sealed.
+    workers (int): Number of threads. Defaults to the number of CPU cores.
+    verified (bool): The key already opened other data, such as the encrypted file name.
 
     Returns:
-    None
+    iterator: Decrypted blocks of data.
+
+    Raises:
+    InvalidPasswordError: If the password is invalid or the first chunk cannot be decrypted.
+    CorruptedDataError: If a chunk cannot be decrypted with a verified key.
     """
-    image = Image.open(inputImagePath).convert('RGB')
-    pixels = image.load()
-    data = list()
-    
-    for imageY in range(image.size[1]):
-        for imageX in range(image.size[0]):
-            if len(data) >= (16 + 32 + 12):
-                break
-            pixel = pixels[imageX, imageY]
-            data.append(pixel[0] & 0b11)
-            data.append(pixel[1] & 0b11)
-            data.append(pixel[2] & 0b11)
+    aead = aesgcm(keyBytes(key))
+    body = memoryview(body)
+    count = max(1, -(-len(body) // step))
 
-    encrypted = False
-    
-    if deserializeData(data)[:4] == bytes.fromhex(hex(magicBytes["unencrypted"])[2:]):
-        print("[+] Hidden file found in image.")
-        pass
-    elif deserializeData(data)[:4] == bytes.fromhex(hex(magicBytes["encrypted"])[2:]):
-        print("[*] Hidden file is encrypted.")
-        encrypted = True
-    else:
-        print("[!] Image don't have any hidden file.")
-        exit()
+    def decryptChunk(index):
+        try:
+            return aead.decrypt(streamNonce(prefix, index, index == count - 1), body[index * step:(index + 1) * step],
+                                associatedData)
+        except Exception:
+            return None
+
+    for index, chunk in enumerate(mapOrdered(decryptChunk, ((index,) for index in range(count)), workers)):
+        if chunk is None and (index or verified):
+            raise CorruptedDataError("Hidden data is corrupted in chunk {} of {}.".format(index + 1, count))
+        elif chunk is None:
+            raise InvalidPasswordError("Invalid password or data.")
+        yield chunk
+
+
+def encryptChunks(chunks, key: str, workers: int = None):
+    """
+    Function to encrypt a stream of plaintext blocks with AES-GCM, one authenticated chunk per block.
+    Chunks are sealed in parallel on a thread pool with a bounded number of blocks in memory.
+
+    Parameters:
+    chunks (iterable): Plaintext blocks of chunkSize bytes, the last one may be shorter.
+    key (str | bytes): The password, or a key derived with deriveSaltedKey.
+    workers (int): Number of threads. Defaults to the number of CPU cores.
+
+    Returns:
+    iterator: The stream header followed by the encrypted chunks.
+    """
+    prefix = os.urandom(streamPrefixSize)
+    yield prefix + chunkSize.to_bytes(4, byteorder='big')
+    yield from sealChunks(chunks, key, prefix, workers=workers)
+
+
+def decryptChunks(data: bytes, key: str, workers: int = None, verified: bool = False):
+    """
+    Function to decrypt a chunked encryption stream, chunks are opened in parallel on a thread pool.
+
+    Parameters:
+    data (bytes): The encrypted stream.
+    key (str | bytes): The password, or a key derived with deriveSaltedKey.
+    workers (int): Number of threads. Defaults to the number of CPU cores.
+    verified (bool): The key already opened other data (see openChunks).
+
+    Returns:
+    iterator: Decrypted blocks of data.
+
+    Raises:
+    InvalidPasswordError: If the password is invalid or the first chunk cannot be decrypted.
+    CorruptedDataError: If a chunk cannot be decrypted with a verified key.
+    """
+    view = memoryview(data)
+    prefix = view[:streamPrefixSize].tobytes()
+    step = int.from_bytes(view[streamPrefixSize:streamHeaderSize], byteorder='big') + tagSize
+    return openChunks(view[streamHeaderSize:], key, prefix, step, workers=workers, verified=verified)
+
+
+def encryptDataChunked(data: bytes, key: str) -> bytes:
+    """
+    Function to encrypt data using the chunked AES-GCM stream format.
+
+    Parameters:
+    data (bytes): The data to be encrypted.
+    key (str | bytes): The password, or a key derived with deriveSaltedKey.
+
+    Returns:
+    bytes: The encrypted data.
+    """
+    view = memoryview(data)
+    chunks = (view[i:i + chunkSize] for i in range(0, len(view), chunkSize))
+    return b"".join(encryptChunks(chunks, key))
+
+
+def decryptDataChunked(data: bytes, key: str) -> bytes:
+    """
+    Function to decrypt data encrypted with the chunked AES-GCM stream format.
+
+    Parameters:
+    data (bytes): The data to be decrypted.
+    key (str | bytes): The password, or a key derived with deriveSaltedKey.
+
+    Returns:
+    bytes: The decrypted data.
+
+    Raises:
+    InvalidPasswordError: If the password is invalid or the data cannot be decrypted.
+    """
+    return b"".join(decryptChunks(data, key))
+
+
+def changeLast2Bits(oldByte: int, newBits: int) -> int:
+    """
+    Function to replace the 2 least significant bits (LSBs) of the given oldByte with newBits.
+
+    Parameters:
+    oldByte (int): Original byte to be modified.
+    newBits (int): New values for the 2 LSBs.
+
+    Returns:
+    int: Byte with the two LSBs replaced by the newBits.
+    """
+    return ((oldByte >> 2) << 2) | newBits
+
+
+def filesizeToBytes(data: bytes, lenght: int) -> bytes:
+    """
+    Function to return the size of data in a sequence of 8 bytes.
+
+    Parameters:
+    data (bytes): Data to determine its size, represented as a sequence of bytes.
+    length (int): Length of the byte sequence to represent the size of the data.
+
+    Returns:
+    bytes: Size of the input data represented as a sequence of 8 bytes in big-endian byte order.
+    """
+    return (len(data)).to_bytes(lenght, byteorder='big')
+
+
+def serializeData(data: bytes, padding: int = 1) -> list:
+    """
+    Function to serialize data into 2-bit groups and return a list of them.
+
+    Parameters:
+    data (bytes): Input data to be serialized, represented as a sequence of bytes.
+    padding (int): Optional parameter specifying the desired padding. 
+                   Default value is 1, meaning no padding is added.
+
+    Returns:
+    list: List of 2-bit groups representing the serialized data. 
+          The length of the list is adjusted to be divisible by the padding value.
+    """
+    serializedData = list()
+    
+    for byte in data:
+        serializedData.append((byte >> 6) & 0b11)
+        serializedData.append((byte >> 4) & 0b11)
+        serializedData.append((byte >> 2) & 0b11)
+        serializedData.append((byte >> 0) & 0b11)
+
+    while len(serializedData) % padding != 0:
+        serializedData.append(0)
+
+    return serializedData
+
+
+def serializeDataVectorized(data: bytes, padding: int = 1) -> np.ndarray:
+    """
+    Function to serialize data into 2-bit groups using a lookup table instead of a per-byte loop.
+
+    Parameters:
+    data (bytes): Input data to be serialized, represented as a sequence of bytes.
+    padding (int): Optional parameter specifying the desired padding.
+                   Default value is 1, meaning no padding is added.
+
+    Returns:
+    np.ndarray: Array of 2-bit groups (uint8) in the same order as serializeData returns them.
+    """
+    serializedData = crumbTable[np.frombuffer(data, dtype=np.uint8)].reshape(-1)
+    remainder = len(serializedData) % padding
+    if remainder:
+        serializedData = np.concatenate((serializedData, np.zeros(padding - remainder, dtype=np.uint8)))
+
+    return serializedData
+
+
+def serializeBits(data: bytes, bits: int) -> np.ndarray:
+    """
+    Function to serialize data into groups of 1 to 4 bits, most significant first, with bulk array operations.
+    The last group is padded with zero bits.
+
+    Parameters:
+    data (bytes): Input data to be serialized, represented as a sequence of bytes.
+    bits (int): Number of bits per group.
+
+    Returns:
+    np.ndarray: Array of bit groups (uint8).
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    if bits in bitTables:
+        return bitTables[bits][data].reshape(-1)
+
+    bitArray = np.unpackbits(data)
+    bitArray = np.concatenate((bitArray, np.zeros(-len(bitArray) % bits, dtype=np.uint8))).reshape(-1, bits)
+    groups = np.zeros((len(bitArray), 8), dtype=np.uint8)
+    groups[:, 8 - bits:] = bitArray
+    return np.packbits(groups, axis=1).reshape(-1)
+
+
+def deserializeBits(data: np.ndarray, bits: int) -> bytes:
+    """
+    Function to deserialize an array of groups of 1 to 4 bits into the original data with bulk array operations.
+
+    Parameters:
+    data (np.ndarray): Array of bit groups to be deserialized. Trailing bits that do not form a whole byte are ignored.
+    bits (int): Number of bits per group.
+
+    Returns:
+    bytes: Original data represented as a sequence of bytes.
+    """
+    bitArray = np.unpackbits(np.asarray(data, dtype=np.uint8).reshape(-1, 1), axis=1)[:, 8 - bits:].reshape(-1)
+    return np.packbits(bitArray[:len(bitArray) - len(bitArray) % 8]).tobytes()
+
+
+def selectedChannels(channelMask: int, channels: int) -> list:
+    """
+    Function to return the indices of the carrier channels selected by a channel mask.
+
+    Parameters:
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    channels (int): Number of channels of the carrier.
+
+    Returns:
+    list: Channel indices, in increasing order.
+    """
+    return [channel for channel in range(channels) if channelMask is None or (channelMask >> channel) & 1]
+
+
+def isDefaultLayout(bitsPerChannel: int, channelMask: int, channels: int) -> bool:
+    """
+    Function to check whether a layout stores frames like the original format: 2 bits in every channel.
+
+    Parameters:
+    bitsPerChannel (int): Number of LSBs used in each selected channel.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    channels (int): Number of channels of the carrier.
+
+    Returns:
+    bool: True if frames are stored without a layout header.
+    """
+    return bitsPerChannel == defaultBitsPerChannel and len(selectedChannels(channelMask, channels)) == channels
+
+
+def bodyStartPixel(channels: int, flags: int = 0) -> int:
+    """
+    Function to return the first pixel of the body of a layout, right after its header.
+
+    Parameters:
+    channels (int): Number of channels of the carrier.
+    flags (int): Flags of the layout. The header of scattered layouts is followed by a KDF block.
+
+    Returns:
+    int: Pixel index.
+    """
+    return -(-(scatterHeaderSize if flags & scatteredFlag else layoutHeaderSize) * 4 // channels)
+
+
+def framePixelCount(frameSize: int, channels: int) -> int:
+    """
+    Function to return how many leading pixels hold a frame stored without a layout header.
+
+    Parameters:
+    frameSize (int): Size of the frame or shard in bytes.
+    channels (int): Number of channels of the carrier.
+
+    Returns:
+    int: Number of pixels.
+    """
+    return -(-frameSize * 4 // channels)
+
+
+def layoutPixelCount(bodySize: int, channels: int, bitsPerChannel: int, channelMask: int) -> int:
+    """
+    Function to return how many leading pixels hold a layout header and a body of the given size.
+
+    Parameters:
+    bodySize (int): Size of the body in bytes.
+    channels (int): Number of channels of the carrier.
+    bitsPerChannel (int): Number of LSBs used in each selected channel.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+
+    Returns:
+    int: Number of pixels, layout header included.
+    """
+    symbols = -(-bodySize * 8 // bitsPerChannel)
+    return bodyStartPixel(channels) + -(-symbols // len(selectedChannels(channelMask, channels)))
+
+
+def hiddenPixelCount(frameSize: int, channels: int, bitsPerChannel: int = defaultBitsPerChannel,
+                     channelMask: int = None) -> int:
+    """
+    Function to return how many leading pixels a frame of the given size takes when hidden with a layout.
+
+    Parameters:
+    frameSize (int): Size of the frame or shard in bytes.
+    channels (int): Number of channels of the carrier.
+    bitsPerChannel (int): Number of LSBs used in each selected channel.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+
+    Returns:
+    int: Number of pixels, layout header included.
+    """
+    if isDefaultLayout(bitsPerChannel, channelMask, channels):
+        return framePixelCount(frameSize, channels)
+    return layoutPixelCount(frameSize, channels, bitsPerChannel, channelMask)
+
+
+def writeCrumbs(samples: np.ndarray, blocks, channels: int) -> None:
+    """
+    Function to write a stream of data blocks into the 2 LSBs of consecutive channel values from the first one.
+    The channels left in the last pixel are padded with zero bits.
+
+    Parameters:
+    samples (np.ndarray): Flat array of channel values to modify in place.
+    blocks (iterable): Blocks of data to hide, in order.
+    channels (int): Number of channels per pixel.
+
+    Returns:
+    None
+    """
+    clearMask = ~samples.dtype.type(0b11)
+    position = 0
+    for block in blocks:
+        crumbs = serializeDataVectorized(block)
+        samples[position:position + len(crumbs)] &= clearMask
+        samples[position:position + len(crumbs)] |= crumbs
+        position += len(crumbs)
+    samples[position:-(-position // channels) * channels] &= clearMask
+
+
+def writeSymbols(pixels: np.ndarray, startPixel: int, symbols: np.ndarray, bitsPerChannel: int, selected: list) -> None:
+    """
+    Function to write bit groups into the LSBs of the selected channels of consecutive pixels.
+    The selected channels left in the last pixel are padded with zero bits.
+
+    Parameters:
+    pixels (np.ndarray): Array of shape (pixels, channels) to modify in place.
+    startPixel (int): Index of the first pixel to write.
+    symbols (np.ndarray): Bit groups to write.
+    bitsPerChannel (int): Number of bits per group.
+    selected (list): Indices of the channels to write.
+
+    Returns:
+    None
+    """
+    pixelCount = -(-len(symbols) // len(selected))
+    segment = pixels[startPixel:startPixel + pixelCount]
+    values = np.zeros(pixelCount * len(selected), dtype=segment.dtype)
+    values[:len(symbols)] = symbols
+    clearMask = ~segment.dtype.type((1 << bitsPerChannel) - 1)
+    segment[:, selected] = (segment[:, selected] & clearMask) | values.reshape(-1, len(selected))
+
+
+def readSymbols(pixels: np.ndarray, startPixel: int, count: int, bitsPerChannel: int, selected: list) -> np.ndarray:
+    """
+    Function to read bit groups from the LSBs of the selected channels of consecutive pixels.
+
+    Parameters:
+    pixels (np.ndarray): Array of shape (pixels, channels).
+    startPixel (int): Index of the first pixel to read.
+    count (int): Number of bit groups to read.
+    bitsPerChannel (int): Number of bits per group.
+    selected (list): Indices of the channels to read.
+
+    Returns:
+    np.ndarray: Bit groups (uint8).
+    """
+    segment = pixels[startPixel:startPixel - (-count // len(selected))]
+    values = segment[:, selected].reshape(-1)[:count]
+    return (values & ((1 << bitsPerChannel) - 1)).astype(np.uint8)
+
+
+def newScatterKey(password: str, kdf: str = "scrypt") -> tuple:
+    """
+    Function to derive the key of a scattered layout from a password and a new random salt.
+
+    Parameters:
+    password (str): The password. An empty password still scatters the body, with a key that only depends on the salt.
+    kdf (str): "scrypt" or "pbkdf2". Scrypt is used for any other value.
+
+    Returns:
+    tuple: The KDF block stored after the layout header (bytes) and the derived key (bytes).
+    """
+    kdf = kdf if kdf in kdfParams else "scrypt"
+    salt = os.urandom(saltSize)
+    kdfBlock = bytes([kdfIds[kdf]]) + salt + packKdfParams(kdf, kdfParams[kdf])
+    return kdfBlock, deriveSaltedKey(password, salt, kdf, kdfParams[kdf])
+
+
+def scatterRoundKeys(key: bytes) -> np.ndarray:
+    """
+    Function to derive the round keys of the scattering permutation from the key of a scattered layout.
+
+    Parameters:
+    key (bytes): Key derived from the password (see newScatterKey).
+
+    Returns:
+    np.ndarray: Two 64-bit round keys per round, an XOR key and a multiplier.
+    """
+    return np.frombuffer(hashlib.shake_256(b"scatter" + key).digest(16 * scatterRounds), dtype="<u8")
+
+
+def permuteSlots(slots: np.ndarray, roundKeys: np.ndarray, domain: int) -> np.ndarray:
+    """
+    Function to map slot numbers through the keyed permutation of [0, domain): an unbalanced Feistel network over
+    the number of bits covering the domain, whose halves swap sizes every round, applied again to the values
+    falling outside of the domain (less than half of them). The round function is the high bits of a keyed
+    multiplication. Only the slots asked for are computed, so the cost does not depend on the size of the carrier.
+
+    Parameters:
+    slots (np.ndarray): Slot numbers in [0, domain).
+    roundKeys (np.ndarray): Round keys (see scatterRoundKeys).
+    domain (int): Number of slots.
+
+    Returns:
+    np.ndarray: Permuted slot numbers, distinct for distinct slots. 32-bit integers when the domain allows it.
+    """
+    bits = max(2, (domain - 1).bit_length())
+    dtype = np.uint32 if bits <= 32 else np.uint64
+    width = np.dtype(dtype).itemsize * 8
+    keys = roundKeys.astype(dtype)
+
+    def feistel(values):
+        high, low = bits // 2, bits - bits // 2
+        left, right = values >> dtype(low), values & dtype((1 << low) - 1)
+        for index in range(scatterRounds):
+            mixed = right ^ keys[2 * index]
+            mixed *= keys[2 * index + 1] | dtype(1)
+            mixed >>= dtype(width - high)
+            left ^= mixed
+            left, right, high, low = right, left, low, high
+        return (left << dtype(low)) | right
+
+    values = feistel(slots.astype(dtype))
+    outside = np.flatnonzero(values >= domain)
+    while outside.size:
+        values[outside] = feistel(values[outside])
+        outside = outside[values[outside] >= domain]
+    return values
+
+
+def scatteredSamples(roundKeys: np.ndarray, first: int, count: int, pixelCount: int, channels: int,
+                     selected: list, startPixel: int) -> np.ndarray:
+    """
+    Function to return where a run of symbols of a scattered body is stored.
+
+    Parameters:
+    roundKeys (np.ndarray): Round keys (see scatterRoundKeys).
+    first (int): Index of the first symbol.
+    count (int): Number of symbols.
+    pixelCount (int): Number of pixels of the carrier.
+    channels (int): Number of channels of the carrier.
+    selected (list): Indices of the channels holding symbols.
+    startPixel (int): First pixel after the layout header.
+
+    Returns:
+    np.ndarray: Indices of the channel values holding the symbols, in a flat array of the pixels.
+    """
+    domain = (pixelCount - startPixel) * len(selected)
+    slots = permuteSlots(np.arange(first, first + count, dtype=np.uint64), roundKeys, domain).astype(np.intp)
+    if len(selected) == channels:
+        return slots + startPixel * channels
+    pixels, slot = np.divmod(slots, len(selected))
+    return (pixels + startPixel) * channels + np.array(selected, dtype=np.intp)[slot]
+
+
+def writeScattered(samples: np.ndarray, symbols: np.ndarray, bitsPerChannel: int, roundKeys: np.ndarray,
+                   channels: int, selected: list, startPixel: int, first: int = 0) -> None:
+    """
+    Function to write bit groups into the LSBs of the selected channels in the order of the scattering permutation,
+    one batch of scatterBatchSize symbols at a time.
+
+    Parameters:
+    samples (np.ndarray): Flat array of the channel values of every pixel, modified in place.
+    symbols (np.ndarray): Bit groups to write.
+    bitsPerChannel (int): Number of bits per group.
+    roundKeys (np.ndarray): Round keys (see scatterRoundKeys).
+    channels (int): Number of channels of the carrier.
+    selected (list): Indices of the channels to write.
+    startPixel (int): First pixel after the layout header.
+    first (int): Index of the first symbol in the body, for tiles of the body (see embedTile).
+
+    Returns:
+    None
+    """
+    clearMask = ~samples.dtype.type((1 << bitsPerChannel) - 1)
+    for start in range(0, len(symbols), scatterBatchSize):
+        batch = symbols[start:start + scatterBatchSize]
+        positions = scatteredSamples(roundKeys, first + start, len(batch), len(samples) // channels, channels,
+                                     selected, startPixel)
+        samples[positions] = (samples[positions] & clearMask) | batch
+
+
+def readScattered(samples: np.ndarray, count: int, bitsPerChannel: int, roundKeys: np.ndarray, channels: int,
+                  selected: list, startPixel: int, first: int = 0) -> np.ndarray:
+    """
+    Function to read bit groups from the LSBs of the selected channels in the order of the scattering permutation.
+
+    Parameters:
+    samples (np.ndarray): Flat array of the channel values of every pixel.
+    count (int): Number of bit groups to read.
+    bitsPerChannel, roundKeys, channels, selected, startPixel, first: See writeScattered.
+
+    Returns:
+    np.ndarray: Bit groups (uint8).
+    """
+    symbols = np.empty(count, dtype=np.uint8)
+    for start in range(0, count, scatterBatchSize):
+        batch = min(scatterBatchSize, count - start)
+        positions = scatteredSamples(roundKeys, first + start, batch, len(samples) // channels, channels, selected,
+                                     startPixel)
+        symbols[start:start + batch] = samples[positions] & ((1 << bitsPerChannel) - 1)
+    return symbols
+
+
+class SharedArray:
+    """
+    Context manager holding a NumPy array in a block of shared memory, so worker processes attach to it by name
+    instead of receiving a pickled copy. The process creating the block unlinks it on exit. The block is unmapped
+    on exit too, so views of the array must not be used after it.
+    """
+
+    # Blocks created by this process and not yet exited, by name.
+    created = dict()
+
+    def __init__(self, shape: tuple, dtype, name: str = None):
+        from multiprocessing import shared_memory
+        size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        self.owner = name is None
+        self.memory = shared_memory.SharedMemory(name, create=self.owner, size=size if self.owner else 0)
+        self.name = self.memory.name
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self.memory.buf)
+        if self.owner:
+            SharedArray.created[self.name] = self
+
+    @classmethod
+    def copyOf(cls, array: np.ndarray) -> "SharedArray":
+        """
+        Function to copy an array into a new block of shared memory.
+
+        Parameters:
+        array (np.ndarray): Array to copy.
+
+        Returns:
+        SharedArray: The block, holding an array of the same shape and dtype.
+        """
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def holding(cls, array: np.ndarray) -> str:
+        """
+        Function to find the block of shared memory created by this process that an array is a leading view of,
+        such as the rows of a carrier allocated there (see copyOf).
+
+        Parameters:
+        array (np.ndarray): Array to look for.
+
+        Returns:
+        str: Name of the block, which holds the array contiguously from its start, or None.
+        """
+        if not array.flags.c_contiguous:
+            return None
+        address = array.__array_interface__["data"][0]
+        for name, shared in cls.created.items():
+            if shared.array.__array_interface__["data"][0] == address and array.nbytes <= shared.memory.size:
+                return name
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception) -> None:
+        if self.owner:
+            del SharedArray.created[self.name]
+        self.array = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def tileWorkerCount(symbolCount: int, workers: int = None) -> int:
+    """
+    Function to return the number of worker processes embedding or extracting a frame in tiles.
+
+    Parameters:
+    symbolCount (int): Number of symbols of the frame.
+    workers (int): Maximum number of worker processes. Defaults to the number of CPU cores, or to 1 in worker
+                   processes, which already run in parallel with each other.
+
+    Returns:
+    int: Number of worker processes, or 1 if the frame is embedded or extracted in the current process.
+    """
+    if workers is None:
+        workers = 1 if parent_process() is not None else os.cpu_count() or 1
+    if symbolCount < tiledMinimumSymbols:
+        return 1
+    return max(1, min(workers, -(-symbolCount // tileSymbols)))
+
+
+def symbolTiles(symbolCount: int, bitsPerChannel: int, selectedCount: int) -> list:
+    """
+    Function to split the symbols of a frame into tiles of about tileSymbols symbols. Every tile starts on a byte
+    of the frame and on a pixel, so tiles are serialized and written independently and cover runs of whole rows
+    of the carrier, except at their ends.
+
+    Parameters:
+    symbolCount (int): Number of symbols of the frame.
+    bitsPerChannel (int): Number of bits per symbol.
+    selectedCount (int): Number of channels holding symbols in every pixel.
+
+    Returns:
+    list: Index of the first symbol and number of symbols of every tile, in order.
+    """
+    group = 8 if bitsPerChannel == 3 else 8 // bitsPerChannel
+    unit = int(np.lcm(group, selectedCount))
+    size = max(unit, tileSymbols // unit * unit)
+    return [(first, min(size, symbolCount - first)) for first in range(0, symbolCount, size)]
+
+
+def embedTile(task: tuple) -> None:
+    """
+    Function to write one tile of a frame into pixels in shared memory. Run by the worker processes of embedTiled.
+
+    Parameters:
+    task (tuple): Names of the shared memory blocks of the pixels and of the frame, shape and dtype of
+                  the pixels, frame size, number of bits per symbol, selected channels, first pixel of the body,
+                  round keys of a scattered layout or None, index of the first symbol and number of symbols.
+
+    Returns:
+    None
+    """
+    pixelName, dataName, shape, dtype, size, bits, selected, startPixel, roundKeys, first, count = task
+    with SharedArray(shape, dtype, pixelName) as pixels, SharedArray((size,), np.uint8, dataName) as data:
+        symbols = serializeBits(data.array[first * bits // 8:-(-(first + count) * bits // 8)], bits)[:count]
+        if roundKeys is None:
+            writeSymbols(pixels.array, startPixel + first // len(selected), symbols, bits, selected)
+        else:
+            writeScattered(pixels.array.reshape(-1), symbols, bits, roundKeys, shape[1], selected, startPixel, first)
+
+
+def readTile(task: tuple) -> None:
+    """
+    Function to read one tile of a frame from pixels in shared memory into the frame in shared memory.
+    Run by the worker processes of unpackTiled.
+
+    Parameters:
+    task (tuple): See embedTile.
+
+    Returns:
+    None
+    """
+    pixelName, dataName, shape, dtype, size, bits, selected, startPixel, roundKeys, first, count = task
+    with SharedArray(shape, dtype, pixelName) as pixels, SharedArray((size,), np.uint8, dataName) as data:
+        if roundKeys is None:
+            symbols = readSymbols(pixels.array, startPixel + first // len(selected), count, bits, selected)
+        else:
+            symbols = readScattered(pixels.array.reshape(-1), count, bits, roundKeys, shape[1], selected, startPixel,
+                                    first)
+        tile = deserializeBits(symbols, bits)
+        start = first * bits // 8
+        end = min(size, start + len(tile))
+        data.array[start:end] = np.frombuffer(tile, dtype=np.uint8, count=end - start)
+
+
+def runTiles(function, pixels: SharedArray, data: SharedArray, bitsPerChannel: int, selected: list, startPixel: int,
+             roundKeys: np.ndarray, workers: int) -> None:
+    """
+    Function to run embedTile or readTile over every tile of a frame on a pool of worker processes.
+    Only the names of the shared memory blocks and the bounds of the tiles are sent to the workers.
+
+    Parameters:
+    function (callable): embedTile or readTile.
+    pixels (SharedArray): Pixels of the carrier, array of shape (pixels, channels).
+    data (SharedArray): Bytes of the frame, or of the body of a layout.
+    bitsPerChannel (int): Number of bits per symbol.
+    selected (list): Indices of the channels holding symbols.
+    startPixel (int): First pixel of the body.
+    roundKeys (np.ndarray): Round keys of a scattered layout, or None for the raster order.
+    workers (int): Number of worker processes.
+
+    Returns:
+    None
+    """
+    shape, dtype, size = pixels.array.shape, pixels.array.dtype, len(data.array)
+    tasks = [(pixels.name, data.name, shape, dtype, size, bitsPerChannel, selected, startPixel, roundKeys, first, count)
+             for first, count in symbolTiles(-(-size * 8 // bitsPerChannel), bitsPerChannel, len(selected))]
+    with ProcessPoolExecutor(workers) as executor:
+        for _ in executor.map(function, tasks):
+            pass
+
+
+def embedTiled(band: np.ndarray, blocks, size: int, bitsPerChannel: int, selected: list, header: bytes,
+               startPixel: int, roundKeys: np.ndarray, workers: int) -> None:
+    """
+    Function to write a frame into the rows of a carrier in tiles, on worker processes. The frame is copied once
+    into shared memory and each worker writes its tiles into the rows there. Rows allocated in shared memory
+    (see SharedArray.copyOf) are written in place; other rows, such as those of memory-mapped raw carriers,
+    are copied into shared memory and back.
+
+    Parameters:
+    band (np.ndarray): Rows holding the frame, array of shape (rows, width, channels) to modify in place.
+    blocks (iterable): Blocks of the frame, in order.
+    size (int): Frame size in bytes.
+    bitsPerChannel (int): Number of LSBs used in each selected channel.
+    selected (list): Indices of the channels to write.
+    header (bytes): Layout header written in the leading pixels, or None for the default layout.
+    startPixel (int): First pixel after the layout header.
+    roundKeys (np.ndarray): Round keys of a scattered layout, or None for the raster order.
+    workers (int): Number of worker processes.
+
+    Returns:
+    None
+    """
+    channels = band.shape[-1]
+    name = SharedArray.holding(band)
+    with SharedArray((band.size // channels, channels), band.dtype, name) as pixels, \
+            SharedArray((size,), np.uint8) as data:
+        if name is None:
+            pixels.array[...] = band.reshape(-1, channels)
+        position = 0
+        for block in blocks:
+            data.array[position:position + len(block)] = np.frombuffer(block, dtype=np.uint8)
+            position += len(block)
+        if header is not None:
+            writeCrumbs(pixels.array.reshape(-1), [header], channels)
+        runTiles(embedTile, pixels, data, bitsPerChannel, selected, startPixel, roundKeys, workers)
+        if name is None:
+            band[...] = pixels.array.reshape(band.shape)
+
+
+def unpackTiled(pixels: np.ndarray, size: int, bitsPerChannel: int, selected: list, startPixel: int,
+                roundKeys: np.ndarray, workers: int) -> bytes:
+    """
+    Function to read a frame, or the body of a layout, in tiles on worker processes (see embedTiled).
+    Pixels that are not allocated in shared memory are copied there once.
+
+    Parameters:
+    pixels (np.ndarray): Pixels holding the frame, array of shape (pixels, channels).
+    size (int): Number of bytes.
+    bitsPerChannel, selected, startPixel, roundKeys, workers: See embedTiled.
+
+    Returns:
+    bytes: The hidden bytes.
+    """
+    name = SharedArray.holding(pixels)
+    with SharedArray(pixels.shape, pixels.dtype, name) as shared, SharedArray((size,), np.uint8) as data:
+        if name is None:
+            shared.array[...] = pixels
+        runTiles(readTile, shared, data, bitsPerChannel, selected, startPixel, roundKeys, workers)
+        return data.array.tobytes()
+
+
+def embedFrameInArray(pixels: np.ndarray, blocks, size: int, bitsPerChannel: int = defaultBitsPerChannel,
+                      channelMask: int = None, scatterKey: tuple = None, workers: int = None) -> None:
+    """
+    Function to write a frame into the LSBs of a pixel array in raster order, using bulk array operations on
+    one flat view of the rows that hold it. With a non-default layout, a layout header is written first.
+    Large frames are written in tiles by worker processes sharing the rows (see embedTiled).
+
+    Parameters:
+    pixels (np.ndarray): Array of shape (height, width, channels) to modify in place, possibly memory-mapped.
+    blocks (iterable): Blocks of the frame, in order.
+    size (int): Frame size in bytes.
+    bitsPerChannel (int): Number of LSBs used in each selected channel, from 1 to 4.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    scatterKey (tuple): KDF block and key of a scattered layout (see newScatterKey), which spreads the frame
+                        over every pixel, or None to write it in raster order.
+    workers (int): Maximum number of worker processes writing tiles (see tileWorkerCount).
+
+    Returns:
+    None
+    """
+    width, channels = pixels.shape[1], pixels.shape[2]
+    rows = -(-hiddenPixelCount(size, channels, bitsPerChannel, channelMask) // width)
+    band = pixels[:rows] if scatterKey is None else pixels
+    selected = selectedChannels(channelMask, channels)
+    header, startPixel, roundKeys = None, 0, None
+    if scatterKey is not None or not isDefaultLayout(bitsPerChannel, channelMask, channels):
+        mask = sum(1 << channel for channel in selected)
+        flags = 0 if scatterKey is None else scatteredFlag
+        header = (magicBytes["layout"]).to_bytes(4, byteorder='big') + bytes([bitsPerChannel, mask, flags]) + \
+                 size.to_bytes(8, byteorder='big') + (b"" if scatterKey is None else scatterKey[0])
+        startPixel = bodyStartPixel(channels, flags)
+        roundKeys = None if scatterKey is None else scatterRoundKeys(scatterKey[1])
+
+    workers = tileWorkerCount(-(-size * 8 // bitsPerChannel), workers)
+    if workers > 1:
+        embedTiled(band, blocks, size, bitsPerChannel, selected, header, startPixel, roundKeys, workers)
+        return
+
+    flat = np.ascontiguousarray(band.reshape(-1, channels))
+    if header is None:
+        writeCrumbs(flat.reshape(-1), blocks, channels)
+    else:
+        writeCrumbs(flat.reshape(-1), [header], channels)
+        symbols = serializeBits(b"".join(blocks), bitsPerChannel)
+        if roundKeys is None:
+            writeSymbols(flat, startPixel, symbols, bitsPerChannel, selected)
+        else:
+            writeScattered(flat.reshape(-1), symbols, bitsPerChannel, roundKeys, channels, selected, startPixel)
+
+    if not np.shares_memory(flat, band):
+        band[...] = flat.reshape(band.shape)
+
+
+def embedBlocks(image: Image.Image, blocks, size: int, bitsPerChannel: int = defaultBitsPerChannel,
+                channelMask: int = None, scatterKey: tuple = None) -> None:
+    """
+    Function to write a frame into the LSBs of an image in one of the modes of nativeChannels, in raster order.
+    Only the rows holding the frame are copied out of the image and pasted back. They are copied into shared memory
+    if the frame is written in tiles, so the worker processes write into them directly (see embedTiled).
+
+    Parameters:
+    image (Image.Image): Image to modify in place.
+    blocks (iterable): Blocks of the frame, in order.
+    size (int): Frame size in bytes.
+    bitsPerChannel (int): Number of LSBs used in each selected channel, from 1 to 4.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    scatterKey (tuple): KDF block and key of a scattered layout, whose frame is spread over every row
+                        (see embedFrameInArray), or None.
+
+    Returns:
+    None
+    """
+    width, height = image.size
+    channels = nativeChannels[image.mode]
+    rows = height if scatterKey else -(-hiddenPixelCount(size, channels, bitsPerChannel, channelMask) // width)
+    crop = np.asarray(image.crop((0, 0, width, rows)))
+    tiled = tileWorkerCount(-(-size * 8 // bitsPerChannel)) > 1
+    with SharedArray.copyOf(crop) if tiled else nullcontext() as shared:
+        band = np.array(crop) if shared is None else shared.array
+        embedFrameInArray(arrayPixels(band), blocks, size, bitsPerChannel, channelMask, scatterKey)
+        image.paste(Image.fromarray(band, image.mode), (0, 0))
+
+
+def deserializeData(data: list) -> bytes:
+    """
+    Function to deserialize a list of 2-bit groups into the original data.
+
+    Parameters:
+    data (list): List of 2-bit groups to be deserialized.
+
+    Returns:
+    bytes: Original data represented as a sequence of bytes.
+    """
+    deserializeData = list()
+    
+    for i in range(0, len(data) - 4 + 1, 4):
+        byte = (data[i + 0] << 6) + \
+               (data[i + 1] << 4) + \
+               (data[i + 2] << 2) + \
+               (data[i + 3] << 0)
+        deserializeData.append(byte)
+
+    return bytes(deserializeData)
+
+
+def deserializeDataVectorized(data: np.ndarray) -> bytes:
+    """
+    Function to deserialize an array of 2-bit groups into the original data with bulk array operations.
+
+    Parameters:
+    data (np.ndarray): Array of 2-bit groups to be deserialized. Trailing groups that do not form a whole byte are ignored.
+
+    Returns:
+    bytes: Original data represented as a sequence of bytes.
+    """
+    data = np.asarray(data, dtype=np.uint8)
+    groups = data[:len(data) - len(data) % 4].reshape(-1, 4)
+    return ((groups[:, 0] << 6) | (groups[:, 1] << 4) | (groups[:, 2] << 2) | groups[:, 3]).tobytes()
+
+
+def leadingRows(image: Image.Image, rows: int) -> Image.Image:
+    """
+    Function to return an image holding the first rows of a not yet loaded image, so only they are decoded.
+    Non-interlaced PNG files are cut with StegoPng.leadingPng. Other images are returned as they are and decoded
+    in full, apart from raw carriers, which are memory-mapped instead (see readLeadingPixels).
+
+    Parameters:
+    image (Image.Image): Freshly opened image whose pixel data has not been loaded.
+    rows (int): Number of leading rows that must be decoded.
+
+    Returns:
+    Image.Image: The image of the leading rows, or the image itself if the format requires a full decode.
+    """
+    if image.format != "PNG" or image.tell() or rows >= image.size[1]:
+        return image
+
+    source = image.filename
+    if not source:
+        image.fp.seek(0)
+        source = image.fp.read()
+    try:
+        png = StegoPng.leadingPng(source, rows)
+    except ValueError:
+        return image
+    return Image.open(io.BytesIO(png)) if png else image
+
+
+def readLeadingPixels(inputImagePath, pixelCount: int) -> np.ndarray:
+    """
+    Function to decode only the first pixels of an image, in raster order (see decodeLeadingPixels), or read those of
+    memory-mapped raw images, which only touch the pages holding them.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    pixelCount (int): Number of leading pixels to read, or None for every pixel.
+
+    Returns:
+    np.ndarray: Array of shape (pixels, channels). Shorter than pixelCount if the image has fewer pixels.
+    """
+    layout = StegoRaw.rawLayout(inputImagePath) if isPath(inputImagePath) else None
+    if layout:
+        _, pixels = StegoRaw.mapRawCarrier(inputImagePath, layout)
+        rows = layout["height"] if pixelCount is None else -(-pixelCount // layout["width"])
+        return np.asarray(pixels[:rows]).reshape(-1, pixels.shape[2])[:pixelCount]
+
+    return decodeLeadingPixels(openImageFile(inputImagePath), pixelCount)
+
+
+def decodeLeadingPixels(image: Image.Image, pixelCount: int) -> np.ndarray:
+    """
+    Function to decode only the first pixels of a freshly opened image, in raster order: the values of its channels
+    in their own type for the modes in nativeChannels and RGB images with 16 bits per channel, or R, G and B values
+    of the image converted to RGB otherwise.
+
+    Parameters:
+    image (Image.Image): Freshly opened image whose pixel data has not been loaded (see leadingRows).
+    pixelCount (int): Number of leading pixels to read, or None for every pixel.
+
+    Returns:
+    np.ndarray: Array of shape (pixels, channels) of 8-bit or 16-bit values. Shorter than pixelCount if the image
+                has fewer pixels.
+    """
+    width, height = image.size
+    rows = height if pixelCount is None else max(1, min(height, -(-pixelCount // width)))
+    if wideRawmode(image):
+        return decodeWidePixels(image, rows)[:pixelCount]
+    image = leadingRows(image, rows)
+    band = image if image.mode in nativeChannels else image.convert('RGB')
+    if band.size[1] > rows:
+        band = band.crop((0, 0, width, rows))
+
+    return np.asarray(band).reshape(-1, nativeChannels[band.mode])[:pixelCount]
+
+
+def wideRawmode(image: Image.Image) -> str:
+    """
+    Function to return the rawmode of a freshly opened RGB or RGBA image with 16 bits per channel.
+
+    Parameters:
+    image (Image.Image): Opened image.
+
+    Returns:
+    str: Rawmode of its decoder tiles, with an explicit byte order, or None for other images and loaded images.
+    """
+    if image.mode not in ("RGB", "RGBA") or not image.tile:
+        return None
+    args = image.tile[0][3]
+    rawmode = args if isinstance(args, str) else args[0] if isinstance(args, tuple) and args else None
+    rawmode = rawmode.replace(";16N", ";16" + nativeByteOrder) if isinstance(rawmode, str) else None
+    return rawmode if rawmode in wideRawmodes else None
+
+
+def reopenImage(image: Image.Image) -> Image.Image:
+    """
+    Function to open the file of an image again, from its path or in-memory file, at the same frame.
+
+    Parameters:
+    image (Image.Image): Opened image whose pixel data has not been loaded.
+
+    Returns:
+    Image.Image: The image opened again.
+    """
+    if image.filename:
+        reopened = Image.open(image.filename)
+    else:
+        image.fp.seek(0)
+        reopened = Image.open(io.BytesIO(image.fp.read()))
+    if image.tell():
+        reopened.seek(image.tell())
+    return reopened
+
+
+def decodeWidePixels(image: Image.Image, rows: int) -> np.ndarray:
+    """
+    Function to decode the leading rows of a freshly opened RGB or RGBA image with 16 bits per channel, which Pillow
+    only decodes to 8 bits. The decoder gives the high byte of every value, and gives the low byte once the byte
+    order of its tiles is swapped, so the image is decoded a second time for the low bytes. Pillow has no public way
+    to do this, so it is only done with the versions in wideVersions.
+
+    Parameters:
+    image (Image.Image): Freshly opened image (see wideRawmode).
+    rows (int): Number of leading rows to decode.
+
+    Returns:
+    np.ndarray: Array of shape (pixels, channels) of 16-bit values.
+
+    Raises:
+    StegoError: If the version of Pillow is not one of wideVersions.
+    """
+    version = tuple(int(part) for part in Image.__version__.split(".")[:2])
+    if not wideVersions[0] <= version < wideVersions[1]:
+        raise StegoError("RGB images with 16 bits per channel cannot be read with Pillow {}, only with Pillow {}.{} "
+                         "up to {}.{} excluded.".format(Image.__version__, *wideVersions[0], *wideVersions[1]))
+    rawmode = wideRawmode(image)
+    parts = list()
+    for part, partRawmode in ((image, rawmode), (reopenImage(image), wideRawmodes[rawmode])):
+        part = leadingRows(part, rows)
+        part.tile = [(decoder, extents, offset, partRawmode if isinstance(args, str) else (partRawmode,) + args[1:])
+                     for decoder, extents, offset, args in part.tile]
+        parts.append(np.asarray(part, dtype=np.uint8)[:rows])
+
+    high, low = parts
+    return ((high.astype(np.uint16) << 8) | low).reshape(-1, len(rawmode.split(";")[0]))
+
+
+def parseHeader(header: bytes) -> dict:
+    """
+    Function to parse the frame, shard or layout header stored in the first pixels of an image.
+
+    Parameters:
+    header (bytes): The first bytes hidden in the image, at least headerSize long.
+
+    Returns:
+    dict: Keys "mode" (the magicBytes key), "encrypted", "headerSize" and "frameSize" (header included), plus
+          "nameSize", "dataSize", "encryption" (encryptionIds key), "codec" (StegoCompress.codecIds key), "kdf"
+          (kdfIds key), "salt" and "kdfParams" for frames, "payloadId", "index" and "count" for shards, "bitsPerChannel",
+          "channelMask", "flags" and "scattered" for layouts, whose "frameSize" is the size of their body, or the
+          keys listed in parseArchiveHeader for archives.
+          Scattered layouts also have the "kdf", "salt" and "kdfParams" of their key.
+          None if the magic bytes do not match.
+    """
+    magic = int.from_bytes(header[:4], byteorder='big')
+    if len(header) < headerSize or magic not in magicBytes.values():
+        return None
+
+    mode = next(key for key, value in magicBytes.items() if value == magic)
+    if mode == "shard":
+        if len(header) < shardHeaderSize:
+            return None
+        return {"mode": mode,
+                "encrypted": None,
+                "headerSize": shardHeaderSize,
+                "frameSize": shardHeaderSize + int.from_bytes(header[16:24], byteorder='big'),
+                "payloadId": header[4:12].hex(),
+                "index": int.from_bytes(header[12:14], byteorder='big'),
+                "count": int.from_bytes(header[14:16], byteorder='big')}
+    elif mode == "layout":
+        if not 1 <= header[4] <= 4 or not header[5] or header[6] & ~supportedLayoutFlags:
+            return None
+        layout = {"mode": mode,
+                  "encrypted": None,
+                  "headerSize": layoutHeaderSize,
+                  "frameSize": int.from_bytes(header[7:15], byteorder='big'),
+                  "bitsPerChannel": header[4],
+                  "channelMask": header[5],
+                  "flags": header[6],
+                  "scattered": bool(header[6] & scatteredFlag)}
+        if layout["scattered"]:
+            kdfBlock = parseKdfBlock(header[layoutHeaderSize:scatterHeaderSize])
+            if kdfBlock is None:
+                return None
+            layout["kdf"], layout["salt"], layout["kdfParams"] = kdfBlock
+            layout["headerSize"] = scatterHeaderSize
+        return layout
+
+    elif mode == "container":
+        return parseContainerHeader(header)
+    elif mode == "archive":
+        return parseArchiveHeader(header)
+
+    size, encryption, codec, kdf, salt, params = headerSize, "none", "none", "md5", None, None
+    if mode == "extended":
+        if len(header) < extendedHeaderSize:
+            return None
+        encryption = next((key for key, value in encryptionIds.items() if value == header[15] & ~saltedFlag), None)
+        codec = StegoCompress.codecName(header[16])
+        if encryption is None or codec is None:
+            return None
+        size = extendedHeaderSize
+        if header[15] & saltedFlag:
+            kdfBlock = parseKdfBlock(header[size:size + kdfHeaderSize])
+            if kdfBlock is None or encryption == "none":
+                return None
+            kdf, salt, params = kdfBlock
+            size += kdfHeaderSize
+    elif mode != "unencrypted":
+        encryption = "chunked" if mode == "encryptedChunked" else "fernet"
+
+    nameSize = int.from_bytes(header[4:7], byteorder='big')
+    dataSize = int.from_bytes(header[7:15], byteorder='big')
+    return {"mode": mode,
+            "encrypted": encryption != "none",
+            "headerSize": size,
+            "frameSize": size + nameSize + dataSize,
+            "nameSize": nameSize,
+            "dataSize": dataSize,
+            "encryption": encryption,
+            "codec": codec,
+            "kdf": kdf,
+            "salt": salt,
+            "kdfParams": params}
+
+
+def parseKdfBlock(kdfBlock: bytes) -> tuple:
+    """
+    Function to parse the KDF block of a salted header.
+
+    Parameters:
+    kdfBlock (bytes): KDF ID, salt and encoded parameters.
+
+    Returns:
+    tuple: The KDF name, salt and parameters, or None if the block is truncated, unknown or out of range.
+    """
+    if len(kdfBlock) < kdfHeaderSize:
+        return None
+    kdf = next((key for key, value in kdfIds.items() if value == kdfBlock[0]), None)
+    if kdf in (None, "md5"):
+        return None
+    params = unpackKdfParams(kdf, kdfBlock[1 + saltSize:kdfHeaderSize])
+    return None if params is None else (kdf, kdfBlock[1:1 + saltSize], params)
+
+
+def parseContainerHeader(header: bytes) -> dict:
+    """
+    Function to parse the header of a v2 container.
+
+    Parameters:
+    header (bytes): The first bytes hidden in the image.
+
+    Returns:
+    dict: The same keys as for frames (see parseHeader), plus "version", "prefix" (nonce prefix of the
+          encrypted body) and "indexed". Indexed containers also have "fileSize", "chunkCount" and "indexOffset",
+          and their "headerSize" includes the chunk index. None if the header is truncated, of another version
+          or has unknown flags.
+    """
+    if len(header) < containerHeaderSize or header[4] != containerVersion or header[5] & ~supportedContainerFlags:
+        return None
+    codec = StegoCompress.codecName(header[6])
+    indexed = bool(header[5] & containerIndexedFlag)
+    if codec is None or indexed and len(header) < indexedHeaderSize:
+        return None
+
+    nameSize = int.from_bytes(header[7:9], byteorder='big')
+    dataSize = int.from_bytes(header[9:17], byteorder='big')
+    size, bodySize, encryption = containerHeaderSize, nameSize + dataSize, "none"
+    kdf, salt, params, prefix = "md5", None, None, None
+    if indexed:
+        fileSize = int.from_bytes(header[17:25], byteorder='big')
+        size = indexedHeaderSize
+    if header[5] & containerEncryptedFlag:
+        kdfBlock = parseKdfBlock(header[size:size + kdfHeaderSize])
+        if kdfBlock is None or len(header) < size + kdfHeaderSize + streamPrefixSize:
+            return None
+        kdf, salt, params = kdfBlock
+        prefix = header[size + kdfHeaderSize:size + kdfHeaderSize + streamPrefixSize]
+        size += kdfHeaderSize + streamPrefixSize
+        encryption, bodySize = "chunked", sealedSize(bodySize)
+
+    container = {"mode": "container",
+                 "encrypted": encryption != "none",
+                 "headerSize": size,
+                 "frameSize": size + bodySize,
+                 "nameSize": nameSize,
+                 "dataSize": dataSize,
+                 "encryption": encryption,
+                 "codec": codec,
+                 "kdf": kdf,
+                 "salt": salt,
+                 "kdfParams": params,
+                 "version": header[4],
+                 "prefix": prefix,
+                 "indexed": indexed}
+    if indexed:
+        chunkCount = -(-fileSize // chunkSize)
+        indexSize = chunkCount * indexEntrySize + crcSize
+        checkSize = tagSize if encryption != "none" else crcSize
+        container.update(fileSize=fileSize, chunkCount=chunkCount, indexOffset=size, headerSize=size + indexSize,
+                         frameSize=size + indexSize + nameSize + dataSize + (chunkCount + 1) * checkSize)
+    return container
+
+
+def parseArchiveHeader(header: bytes) -> dict:
+    """
+    Function to parse the header of an archive.
+
+    Parameters:
+    header (bytes): The first bytes hidden in the image.
+
+    Returns:
+    dict: Keys "mode", "encrypted", "headerSize", "frameSize", "kdf", "salt" and "kdfParams" as for frames (see
+          parseHeader), plus "memberCount", "tocSize", "bodySize" and "prefix" (nonce prefix of the encrypted table
+          of contents). None if the header is truncated, has unknown flags or its checksum does not match.
+    """
+    if len(header) < archiveHeaderSize + crcSize or header[4] & ~archiveEncryptedFlag:
+        return None
+
+    size, kdf, salt, params, prefix = archiveHeaderSize, "md5", None, None, None
+    if header[4] & archiveEncryptedFlag:
+        kdfBlock = parseKdfBlock(header[size:size + kdfHeaderSize])
+        if kdfBlock is None or len(header) < size + kdfHeaderSize + streamPrefixSize + crcSize:
+            return None
+        kdf, salt, params = kdfBlock
+        prefix = header[size + kdfHeaderSize:size + kdfHeaderSize + streamPrefixSize]
+        size += kdfHeaderSize + streamPrefixSize
+    if zlib.crc32(header[:size]) != int.from_bytes(header[size:size + crcSize], byteorder='big'):
+        return None
+
+    tocSize = int.from_bytes(header[9:13], byteorder='big')
+    bodySize = int.from_bytes(header[13:21], byteorder='big')
+    return {"mode": "archive",
+            "encrypted": bool(header[4] & archiveEncryptedFlag),
+            "headerSize": size + crcSize,
+            "frameSize": size + crcSize + tocSize + bodySize,
+            "memberCount": int.from_bytes(header[5:9], byteorder='big'),
+            "tocSize": tocSize,
+            "bodySize": bodySize,
+            "kdf": kdf,
+            "salt": salt,
+            "kdfParams": params,
+            "prefix": prefix}
+
+
+def storedPixelCount(header: dict, channels: int, size: int = None) -> int:
+    """
+    Function to return how many leading pixels hold the first bytes of a frame, or of the body of a layout.
+
+    Parameters:
+    header (dict): Parsed header of the image (see parseHeader).
+    channels (int): Number of channels of the carrier.
+    size (int): Number of bytes. Defaults to the frame size recorded in the header.
+
+    Returns:
+    int: Number of pixels, layout header included.
+    """
+    size = header["frameSize"] if size is None else size
+    if header["mode"] == "layout":
+        return layoutPixelCount(size, channels, header["bitsPerChannel"], header["channelMask"])
+    return framePixelCount(size, channels)
+
+
+def unpackFrame(pixels: np.ndarray, header: dict, size: int = None, offset: int = 0, workers: int = None) -> bytes:
+    """
+    Function to read the bytes of a frame, or of the body of a layout, from the leading pixels of an image.
+    Only the pixels holding the requested bytes are unpacked. Large frames read from their start are unpacked
+    in tiles by worker processes (see unpackTiled).
+
+    Parameters:
+    pixels (np.ndarray): Leading pixels of the image, array of shape (pixels, channels).
+    header (dict): Parsed header of the image (see parseHeader).
+    size (int): Number of bytes. Defaults to the frame size recorded in the header.
+    offset (int): Offset of the first byte in the frame.
+    workers (int): Maximum number of worker processes reading tiles (see tileWorkerCount).
+
+    Returns:
+    bytes: The hidden bytes, from the start of the frame header by default.
+    """
+    size = header["frameSize"] if size is None else size
+    layout = header["mode"] == "layout"
+    bits = header["bitsPerChannel"] if layout else defaultBitsPerChannel
+    workers = tileWorkerCount(-(-size * 8 // bits), workers) if offset == 0 else 1
+    if workers > 1:
+        selected = selectedChannels(header["channelMask"] if layout else None, pixels.shape[1])
+        return unpackTiled(pixels, size, bits, selected, bodyStartPixel(pixels.shape[1]) if layout else 0, None,
+                           workers)
+    elif layout:
+        selected = selectedChannels(header["channelMask"], pixels.shape[1])
+        # Symbols of 3 bits only start on a byte boundary every 3 bytes.
+        start = offset - offset % (3 if bits == 3 else 1)
+        first = start * 8 // bits
+        skip = first % len(selected)
+        symbols = readSymbols(pixels, bodyStartPixel(pixels.shape[1]) + first // len(selected),
+                              skip - (-(offset + size - start) * 8 // bits), bits, selected)[skip:]
+        return deserializeBits(symbols, bits)[offset - start:offset - start + size]
+    return deserializeDataVectorized(pixels.reshape(-1)[offset * 4:(offset + size) * 4] & 0b11)
+
+
+def probeImage(inputImagePath: str) -> dict:
+    """
+    Function to check whether an image carries a hidden file by decoding only its header pixels.
+
+    Parameters:
+    inputImagePath (str): Path to the input image file.
+
+    Returns:
+    dict: Parsed header (see probePixels), or None if the image has no hidden file.
+    """
+    return probePixels(lambda pixelCount: readLeadingPixels(inputImagePath, pixelCount))
+
+
+def probePixels(readPixels) -> dict:
+    """
+    Function to check whether the leading pixels of an image carry a hidden file.
+    For images hidden with a non-default layout, the pixels holding the frame header at the start
+    of the layout body are read as well.
+
+    Parameters:
+    readPixels (callable): Function returning the given number of leading pixels, array of shape (pixels, channels).
+
+    Returns:
+    dict: Parsed frame or shard header (see parseHeader) with the number of channels of the carrier under
+          "channels" and, for non-default layouts, the layout header under "layout". For scattered layouts,
+          whose frame header can only be read with the password, the layout header itself.
+          None if the image has no hidden file.
+    """
+    pixels = readPixels(headerCrumbs)
+    channels = pixels.shape[1]
+    header = parseHeader(deserializeDataVectorized(pixels.reshape(-1)[:headerCrumbs] & 0b11))
+    if header is None or header["mode"] != "layout" or header["scattered"]:
+        return header and dict(header, channels=channels)
+
+    frameHeaderSize = min(maxHeaderSize, header["frameSize"])
+    pixels = readPixels(storedPixelCount(header, channels, frameHeaderSize))
+    frameHeader = parseHeader(unpackFrame(pixels, header, frameHeaderSize))
+    if frameHeader is None or frameHeader["mode"] == "layout" or frameHeader["frameSize"] > header["frameSize"]:
+        return None
+    return dict(frameHeader, channels=channels, layout=header)
+
+
+def fileChunks(filePath: str):
+    """
+    Function to read a file in chunkSize blocks and close it once all blocks are read.
+
+    Parameters:
+    filePath (str): Path to the file.
+
+    Returns:
+    iterator: Blocks of data.
+    """
+    with open(filePath, "rb") as openedFile:
+        yield from readChunks(openedFile)
+
+
+def compressPayload(blocks, dataSize: int, sample, compression: str, observer: StegoObserver = None,
+                    independent: bool = False, limit: int = None) -> tuple:
+    """
+    Function to run the compression stage on a payload before it is encrypted and framed.
+    The compressed size and speed are reported. The compressed data is held in memory, since the frame header
+    records its size, but never more than the limit: compression stops as soon as the data outgrows the carrier.
+
+    Parameters:
+    blocks (iterable): Blocks of the payload, in order.
+    dataSize (int): Size of the payload in bytes.
+    sample (callable): Function returning a sample of the payload, only called in "auto" mode.
+    compression (str): Codec name, "auto" to pick one from a sample of the payload, or None for no compression.
+    observer (StegoObserver): Receives the measurements of the "selectCodec" and "compress" phases.
+    independent (bool): Compress every block on its own, in parallel on a thread pool, for indexed containers.
+    limit (int): Number of bytes the carrier can hide, or None for no limit.
+
+    Returns:
+    tuple: The codec used, an iterator over the blocks of data to frame and their total size in bytes.
+           Independently compressed blocks are returned as a list, one compressed block per block of the payload.
+
+    Raises:
+    PayloadTooLargeError: If the compressed data is larger than the limit.
+    """
+    codec = compression or "none"
+    if compression == "auto":
+        with phaseTimer(observer, "selectCodec"):
+            codec = StegoCompress.chooseCodec(sample())
+    if codec == "none":
+        return codec, blocks, dataSize
+
+    start = time.perf_counter()
+    with phaseTimer(observer, "compress", dataSize):
+        if independent:
+            pieces = mapOrdered(lambda block: StegoCompress.compressBlocks([block], codec),
+                                ((block,) for block in blocks))
+        else:
+            pieces = StegoCompress.compressStream(blocks, codec)
+        compressed, compressedSize = list(), 0
+        for piece in pieces:
+            compressedSize += len(piece)
+            if limit is not None and compressedSize > limit:
+                raise PayloadTooLargeError("Compressed data is larger than {} bytes, more than can be hidden in this "
+                                           "image. To hide this file, choose an image with a higher resolution or "
+                                           "shard it across several images.".format(limit), limit)
+            compressed.append(piece)
+    seconds = max(time.perf_counter() - start, 1e-9)
+    print("[*] Compressed data size: {} bytes, {:.1%} of the file, with {} at {:.1f} MB/s.".format(
+        compressedSize, compressedSize / max(1, dataSize), codec, dataSize / seconds / 1e6))
+    if independent:
+        return codec, compressed, compressedSize
+    return codec, rechunk(compressed), compressedSize
+
+
+def buildContainer(encodeName: bytes, blocks, dataSize: int, sample, password: str, compression: str = None,
+                   kdf: str = "scrypt", observer: StegoObserver = None, limit: int = None) -> tuple:
+    """
+    Function to build the indexed v2 container hiding a payload: one binary header with the chunk index, then the
+    name and the chunks of data, encrypted as one AES-GCM chunked stream that also authenticates the header, or
+    each followed by its CRC32. Every chunk is compressed on its own if requested, and encrypted lazily as the
+    container is consumed.
+
+    Parameters:
+    encodeName (bytes): Name of the hidden file.
+    blocks (iterable): Blocks of the payload, in order.
+    dataSize (int): Size of the payload in bytes.
+    sample (callable): Function returning a sample of the payload (see compressPayload).
+    password (str): Password used for encryption. Empty for no encryption.
+    compression (str): Codec name ("zlib", "bz2" or "lzma"), "auto" to pick one from a sample of the payload,
+                       or None for no compression.
+    kdf (str): Key derivation: "scrypt" or "pbkdf2", with a random salt.
+    observer (StegoObserver): Receives the measurements of the "kdf" and "encrypt" phases and of the
+                              phases of compressPayload.
+    limit (int): Number of bytes the carrier can hide, or None (see compressPayload).
+
+    Returns:
+    tuple: Iterator over the blocks of the container and its total size in bytes.
+
+    Raises:
+    PayloadTooLargeError: If the compressed data is larger than the limit.
+    """
+    fileSize = dataSize
+    codec, blocks, dataSize = compressPayload(rechunk(blocks), fileSize, sample, compression, observer, True, limit)
+    sizes = chunkSizes(fileSize) if codec == "none" else [len(block) for block in blocks]
+
+    flags = containerIndexedFlag | (containerEncryptedFlag if password else 0)
+    header = (magicBytes["container"]).to_bytes(4, byteorder='big') + \
+        bytes([containerVersion, flags, StegoCompress.codecIds[codec]]) + filesizeToBytes(encodeName, 2) + \
+        dataSize.to_bytes(8, byteorder='big') + fileSize.to_bytes(8, byteorder='big')
+    key, prefix = None, None
+    if password:
+        salt, prefix = os.urandom(saltSize), os.urandom(streamPrefixSize)
+        with phaseTimer(observer, "kdf"):
+            key = deriveSaltedKey(password, salt, kdf, kdfParams[kdf])
+        header += bytes([kdfIds[kdf]]) + salt + packKdfParams(kdf, kdfParams[kdf]) + prefix
+    header += packChunkIndex(sizes)
+    header += zlib.crc32(header).to_bytes(crcSize, byteorder='big')
+
+    body = sealItems(chain([encodeName], blocks), key, prefix, header)
+    bodySize = len(encodeName) + dataSize + (tagSize if password else crcSize) * (len(sizes) + 1)
+    if password:
+        body = timedBlocks(body, observer, "encrypt")
+        print("[*] Encrypted data size: {} bytes".format(bodySize))
+    return chain([header], body), len(header) + bodySize
+
+
+def chunkSizes(size: int) -> list:
+    """
+    Function to return the sizes of the chunks of chunkSize bytes a file of the given size is split into.
+
+    Parameters:
+    size (int): File size in bytes.
+
+    Returns:
+    list: Chunk sizes in bytes. Empty for an empty file.
+    """
+    return [chunkSize] * (size // chunkSize) + [size % chunkSize] * bool(size % chunkSize)
+
+
+def packChunkIndex(sizes: list) -> bytes:
+    """
+    Function to encode a chunk index: the stored size of every chunk.
+
+    Parameters:
+    sizes (list): Stored sizes of the chunks in bytes.
+
+    Returns:
+    bytes: The index.
+    """
+    return np.array(sizes, dtype=">u4").tobytes()
+
+
+def sealItems(items, key: bytes, prefix: bytes, associatedData: bytes = None):
+    """
+    Function to store the items of an indexed container or archive member: sealed as the AES-GCM chunks of one
+    stream (see sealChunks), or each followed by its CRC32 without a key.
+
+    Parameters:
+    items (iterable): Items, in order.
+    key (bytes): Key derived with deriveSaltedKey, or None to store the items unencrypted.
+    prefix (bytes): Random nonce prefix of the stream.
+    associatedData (bytes): Data authenticated with every sealed item.
+
+    Returns:
+    iterator: The stored items.
+    """
+    if key is not None:
+        return sealChunks(items, key, prefix, associatedData)
+    return (bytes(item) + zlib.crc32(item).to_bytes(crcSize, byteorder='big') for item in items)
+
+
+def frameMember(encodeName: bytes, blocks, dataSize: int, sample, key: bytes, compression: str = None,
+                observer: StegoObserver = None, limit: int = None) -> tuple:
+    """
+    Function to build a member of an archive: its chunk index followed by its chunks, each compressed on its own
+    if requested, and stored as the items of an indexed container (see sealItems) under a new nonce prefix.
+
+    Parameters:
+    encodeName (bytes): Name of the file.
+    blocks (iterable): Blocks of the file, in order.
+    dataSize (int): Size of the file in bytes.
+    sample (callable): Function returning a sample of the file (see compressPayload).
+    key (bytes): Key of an encrypted archive, or None.
+    compression (str): Codec name, "auto" to pick one from a sample of the file, or None for no compression.
+    observer (StegoObserver): Receives the measurements of the phases of compressPayload.
+    limit (int): Number of bytes left in the carrier, or None (see compressPayload).
+
+    Returns:
+    tuple: Table of contents entry of the member, without its offset (see packTocEntry), and an iterator over
+           its stored blocks.
+
+    Raises:
+    PayloadTooLargeError: If the compressed file is larger than the limit.
+    """
+    codec, blocks, storedSize = compressPayload(rechunk(blocks), dataSize, sample, compression, observer, True,
+                                                limit)
+    sizes = chunkSizes(dataSize) if codec == "none" else [len(block) for block in blocks]
+    prefix = os.urandom(streamPrefixSize) if key is not None else bytes(streamPrefixSize)
+    index = packChunkIndex(sizes)
+    entry = {"name": encodeName,
+             "storedSize": len(index) + storedSize + (tagSize if key is not None else crcSize) * (len(sizes) + 1),
+             "fileSize": dataSize,
+             "codec": codec,
+             "prefix": prefix}
+    return entry, sealItems(chain([index], blocks), key, prefix)
+
+
+def packTocEntry(entry: dict) -> bytes:
+    """
+    Function to encode the table of contents entry of an archive member.
+
+    Parameters:
+    entry (dict): Keys "name" (bytes), "offset" in the body of the archive, "storedSize", "fileSize", "codec"
+                  (StegoCompress.codecIds key) and "prefix" (nonce prefix of the member).
+
+    Returns:
+    bytes: The entry.
+    """
+    return filesizeToBytes(entry["name"], 2) + entry["name"] + entry["offset"].to_bytes(8, byteorder='big') + \
+        entry["storedSize"].to_bytes(8, byteorder='big') + entry["fileSize"].to_bytes(8, byteorder='big') + \
+        bytes([StegoCompress.codecIds[entry["codec"]]]) + entry["prefix"]
+
+
+def buildArchive(members: list, password: str, compression: str = None, kdf: str = "scrypt",
+                 observer: StegoObserver = None, archive: tuple = None, limit: int = None) -> tuple:
+    """
+    Function to build the frame of an archive holding several files: the header, the table of contents and the
+    members (see frameMember). The files are compressed upfront if requested, and otherwise read and encrypted
+    lazily as the frame is consumed.
+
+    Parameters:
+    members (list): Name (bytes), iterator over the blocks, size and sample function (see compressPayload) of
+                    every file to add.
+    password (str): Password used for encryption. Empty for no encryption.
+    compression (str): Codec name ("zlib", "bz2" or "lzma"), "auto" to pick one from a sample of every file,
+                       or None for no compression.
+    kdf (str): Key derivation: "scrypt" or "pbkdf2", with a random salt.
+    observer (StegoObserver): Receives the measurements of the "kdf" and "encrypt" phases and of the
+                              phases of compressPayload.
+    archive (tuple): Parsed header, table of contents entries, key and stored body of an archive to add the
+                     files to (see readArchive). Its members are copied as they are stored, and its password
+                     and KDF block are kept.
+    limit (int): Number of bytes the carrier can hide, or None. Compression stops when the members outgrow it.
+
+    Returns:
+    tuple: Iterator over the blocks of the frame and the total frame size in bytes.
+
+    Raises:
+    PayloadTooLargeError: If the compressed members are larger than the limit.
+    StegoError: If a name is too long or already in the archive.
+    """
+    if archive is None:
+        entries, body, key, kdfBlock = list(), list(), None, b""
+        if password:
+            salt = os.urandom(saltSize)
+            with phaseTimer(observer, "kdf"):
+                key = deriveSaltedKey(password, salt, kdf, kdfParams[kdf])
+            kdfBlock = bytes([kdfIds[kdf]]) + salt + packKdfParams(kdf, kdfParams[kdf])
+    else:
+        header, entries, key, storedBody = archive
+        entries, body = list(entries), [[storedBody]]
+        kdfBlock = bytes([kdfIds[header["kdf"]]]) + header["salt"] + packKdfParams(header["kdf"], header["kdfParams"]) \
+            if key is not None else b""
+
+    names = {entry["name"] for entry in entries}
+    for encodeName, _, _, _ in members:
+        if len(encodeName) > 0xffff:
+            raise StegoError("File name is too long.")
+        elif encodeName in names:
+            raise StegoError("Archive already holds a file named {}.".format(encodeName.decode()))
+        names.add(encodeName)
+
+    bodySize = sum(entry["storedSize"] for entry in entries)
+    for encodeName, blocks, dataSize, sample in members:
+        entry, stored = frameMember(encodeName, blocks, dataSize, sample, key, compression, observer,
+                                    None if limit is None else limit - bodySize)
+        entries.append(dict(entry, offset=bodySize))
+        body.append(stored)
+        bodySize += entry["storedSize"]
+
+    toc = b"".join(packTocEntry(entry) for entry in entries)
+    tocSize = len(toc) + (tagSize if key is not None else crcSize)
+    header = (magicBytes["archive"]).to_bytes(4, byteorder='big') + \
+        bytes([archiveEncryptedFlag if key is not None else 0]) + len(entries).to_bytes(4, byteorder='big') + \
+        tocSize.to_bytes(4, byteorder='big') + bodySize.to_bytes(8, byteorder='big')
+    if key is not None:
+        prefix = os.urandom(streamPrefixSize)
+        header += kdfBlock + prefix
+        header += zlib.crc32(header).to_bytes(crcSize, byteorder='big')
+        toc = aesgcm(key).encrypt(streamNonce(prefix, 0, True), toc, header)
+    else:
+        header += zlib.crc32(header).to_bytes(crcSize, byteorder='big')
+        toc += zlib.crc32(toc).to_bytes(crcSize, byteorder='big')
+
+    frame = chain([header, toc], chain.from_iterable(body))
+    if key is not None:
+        frame = timedBlocks(frame, observer, "encrypt")
+    return frame, len(header) + tocSize + bodySize
+
+
+def fileMembers(filePaths: list, observer: StegoObserver = None) -> list:
+    """
+    Function to prepare files to be added to an archive. Every file is read lazily as the archive is consumed.
+
+    Parameters:
+    filePaths (list): Paths to the files.
+    observer (StegoObserver): Receives the measurements of the "read" phase.
+
+    Returns:
+    list: Name, iterator over the blocks, size and sample function of every file (see buildArchive).
+    """
+    members = list()
+    for filePath in filePaths:
+        dataSize = os.path.getsize(filePath)
+        print("[*] {} file size: {} bytes.".format(filePath, dataSize))
+        members.append((os.path.basename(filePath).encode(), timedBlocks(fileChunks(filePath), observer, "read"),
+                        dataSize, lambda filePath=filePath: StegoCompress.sampleFile(filePath)))
+    return members
+
+
+def framePayload(encodeName: bytes, blocks, dataSize: int, sample, password: str, chunked: bool = True,
+                 compression: str = None, kdf: str = "scrypt", version: int = containerVersion,
+                 observer: StegoObserver = None, limit: int = None) -> tuple:
+    """
+    Function to build the frame hiding a payload: magic bytes, name and data lengths, name and data.
+    Version 2 builds a v2 container (see buildContainer), except with the legacy Fernet format or MD5 key,
+    which are only available as version 1 frames.
+    The data is encrypted in chunked mode lazily as the frame is consumed.
+    Compressed data and data keyed with a salted KDF are framed with the extended header,
+    which records the codec and the KDF block.
+
+    Parameters:
+    encodeName (bytes): Name of the hidden file.
+    blocks (iterable): Blocks of the payload, in order.
+    dataSize (int): Size of the payload in bytes.
+    sample (callable): Function returning a sample of the payload (see compressPayload).
+    password (str): Password used for encryption. Empty for no encryption.
+    chunked (bool): Encrypt with the chunked AES-GCM stream format instead of the legacy Fernet format.
+    compression (str): Codec name ("zlib", "bz2" or "lzma"), "auto" to pick one from a sample of the payload,
+                       or None for no compression.
+    kdf (str): Key derivation: "scrypt" or "pbkdf2" with a random salt, or "md5" for the legacy unsalted key.
+    version (int): 2 for the v2 container, 1 for the original frames.
+    observer (StegoObserver): Receives the measurements of the "kdf" and "encrypt" phases and of the
+                              phases of compressPayload.
+    limit (int): Number of bytes the carrier can hide, or None (see compressPayload).
+
+    Returns:
+    tuple: Iterator over the blocks of the frame and the total frame size in bytes.
+
+    Raises:
+    PayloadTooLargeError: If the compressed data is larger than the limit.
+    StegoError: If the name is too long to be recorded in the header.
+    """
+    if version == containerVersion and chunked and kdf != "md5":
+        if len(encodeName) > 0xffff:
+            raise StegoError("File name is too long.")
+        return buildContainer(encodeName, blocks, dataSize, sample, password, compression, kdf, observer, limit)
+
+    codec, blocks, dataSize = compressPayload(blocks, dataSize, sample, compression, observer, limit=limit)
+
+    key, kdfBlock = password, b""
+    if password and kdf != "md5":
+        salt = os.urandom(saltSize)
+        with phaseTimer(observer, "kdf"):
+            key = deriveSaltedKey(password, salt, kdf, kdfParams[kdf])
+        kdfBlock = bytes([kdfIds[kdf]]) + salt + packKdfParams(kdf, kdfParams[kdf])
+
+    if password and chunked:
+        encryption, magic = "chunked", magicBytes["encryptedChunked"]
+        encodeName = encryptDataChunked(encodeName, key)
+        dataSize = chunkedSize(dataSize)
+        blocks = timedBlocks(encryptChunks(blocks, key), observer, "encrypt")
+        print("[*] Encrypted data size: {} bytes".format(dataSize))
+    elif password:
+        encryption, magic = "fernet", magicBytes["encrypted"]
+        data = b"".join(blocks)
+        with phaseTimer(observer, "encrypt", len(data)):
+            blocks = [encryptData(data, key)]
+        encodeName = encryptData(encodeName, key)
+        dataSize = len(blocks[0])
+        print("[*] Encrypted data size: {} bytes".format(dataSize))
+    else:
+        encryption, magic = "none", magicBytes["unencrypted"]
+
+    if len(encodeName) > 0xffffff:
+        raise StegoError("File name is too long.")
+    header = filesizeToBytes(encodeName, 3) + dataSize.to_bytes(8, byteorder='big')
+    if codec == "none" and not kdfBlock:
+        header = magic.to_bytes(4, byteorder='big') + header
+    else:
+        encryptionId = encryptionIds[encryption] | (saltedFlag if kdfBlock else 0)
+        header = magicBytes["extended"].to_bytes(4, byteorder='big') + header + \
+                 bytes([encryptionId, StegoCompress.codecIds[codec]]) + kdfBlock
+    return chain((header, encodeName), blocks), len(header) + len(encodeName) + dataSize
+
+
+def frameFile(fileToHidePath: str, password: str, chunked: bool = True, compression: str = None,
+              kdf: str = "scrypt", version: int = containerVersion, observer: StegoObserver = None,
+              limit: int = None) -> tuple:
+    """
+    Function to build the frame hiding a file (see framePayload). The file is read lazily as the frame is consumed.
+
+    Parameters:
+    fileToHidePath (str): Path to the file to be hidden.
+    password (str): Password used for encryption. Empty for no encryption.
+    chunked (bool): Encrypt with the chunked AES-GCM stream format instead of the legacy Fernet format.
+    compression (str): Codec name ("zlib", "bz2" or "lzma"), "auto" to pick one from a sample of the file,
+                       or None for no compression.
+    kdf (str): Key derivation: "scrypt" or "pbkdf2" with a random salt, or "md5" for the legacy unsalted key.
+    version (int): 2 for the v2 container, 1 for the original frames.
+    observer (StegoObserver): Receives the measurements of the "read" phase and of the phases of framePayload.
+    limit (int): Number of bytes the carrier can hide, or None (see compressPayload).
+
+    Returns:
+    tuple: Iterator over the blocks of the frame and the total frame size in bytes.
+
+    Raises:
+    PayloadTooLargeError: If the compressed file is larger than the limit.
+    """
+    dataSize = os.path.getsize(fileToHidePath)
+    print("[*] {} file size: {} bytes.".format(fileToHidePath, dataSize))
+    return framePayload(os.path.basename(fileToHidePath).encode(), timedBlocks(fileChunks(fileToHidePath), observer, "read"),
+                        dataSize, lambda: StegoCompress.sampleFile(fileToHidePath), password, chunked, compression,
+                        kdf, version, observer, limit)
+
+
+def readBoundedBlocks(openedFile, limit: int, observer: StegoObserver = None) -> list:
+    """
+    Function to read a stream whose size is not known in advance, such as standard input, in blocks of chunkSize
+    bytes, stopping as soon as it holds more than a limit.
+
+    Parameters:
+    openedFile (file): Stream opened in binary mode.
+    limit (int): Maximum number of bytes to read.
+    observer (StegoObserver): Receives the measurements of the "read" phase.
+
+    Returns:
+    list: Blocks of data.
+
+    Raises:
+    PayloadTooLargeError: If the stream holds more than limit bytes.
+    """
+    blocks, size = list(), 0
+    for block in timedBlocks(readChunks(openedFile), observer, "read"):
+        size += len(block)
+        if size > limit:
+            raise PayloadTooLargeError("Input is larger than {} bytes, more than can be hidden in this image. To hide "
+                                       "it, choose an image with a higher resolution.".format(limit), limit)
+        blocks.append(block)
+    return blocks
+
+
+def frameStream(openedFile, limit: int, password: str, name: str = "", chunked: bool = True, compression: str = None,
+                kdf: str = "scrypt", version: int = containerVersion, observer: StegoObserver = None) -> tuple:
+    """
+    Function to build the frame hiding the data read from a stream, such as standard input (see framePayload).
+    The size of the frame is recorded in its header, so the stream is read up front, but never past the limit,
+    which keeps the memory used bounded by the carrier instead of the stream.
+
+    Parameters:
+    openedFile (file): Stream opened in binary mode.
+    limit (int): Maximum number of bytes to read (see payloadLimit).
+    password (str): Password used for encryption. Empty for no encryption.
+    name (str): File name recorded with the data.
+    chunked, compression, kdf, version, observer: See frameFile.
+
+    Returns:
+    tuple: Iterator over the blocks of the frame and the total frame size in bytes.
+
+    Raises:
+    PayloadTooLargeError: If the stream holds more than limit bytes.
+    """
+    blocks = readBoundedBlocks(openedFile, limit, observer)
+    dataSize = sum(len(block) for block in blocks)
+    print("[*] {} size: {} bytes.".format(targetName(openedFile), dataSize))
+    return framePayload(name.encode(), iter(blocks), dataSize, lambda: StegoCompress.sampleData(b"".join(blocks)),
+                        password, chunked, compression, kdf, version, observer)
+
+
+def payloadLimit(inputImagePath, bitsPerChannel: int = defaultBitsPerChannel, channelMask: int = None,
+                 scatter: bool = False, compression: str = None) -> int:
+    """
+    Function to return how much data read from a stream can be kept in memory while a frame hiding it is built
+    for an image (see frameStream): the capacity of the image, or the number of its channel values when the data
+    is compressed, since it may then be larger than the capacity and still fit.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    bitsPerChannel (int): Number of LSBs used in each selected channel.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    scatter (bool): Spread the frame over every pixel of the image.
+    compression (str): Codec name, "auto", or None for no compression.
+
+    Returns:
+    int: Limit in bytes.
+    """
+    if isMultiFrame(inputImagePath):
+        geometry = [(width, height, nativeChannels[mode])
+                    for width, height, mode in StegoFrames.frameGeometry(inputImagePath)]
+    else:
+        geometry = [carrierGeometry(inputImagePath)]
+    if compression is None:
+        return sum(maxHiddenSize((width, height), channels, bitsPerChannel, channelMask, scatter)
+                   for width, height, channels in geometry)
+    return sum(width * height * channels for width, height, channels in geometry)
+
+
+def maxHiddenSize(imageSize: tuple, channels: int = 3, bitsPerChannel: int = defaultBitsPerChannel,
+                  channelMask: int = None, scatter: bool = False) -> int:
+    """
+    Function to return how many bytes an image of the given size can hide.
+
+    Parameters:
+    imageSize (tuple): Width and height of the image.
+    channels (int): Number of channels of the carrier.
+    bitsPerChannel (int): Number of LSBs used in each selected channel.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    scatter (bool): Hide the data in a scattered layout.
+
+    Returns:
+    int: Capacity in bytes, layout header excluded.
+    """
+    if not scatter and isDefaultLayout(bitsPerChannel, channelMask, channels):
+        return (imageSize[0] * imageSize[1] * channels * 2) // 8
+
+    pixels = imageSize[0] * imageSize[1] - bodyStartPixel(channels, scatteredFlag if scatter else 0)
+    return max(0, pixels * len(selectedChannels(channelMask, channels)) * bitsPerChannel // 8)
+
+
+def isPath(target) -> bool:
+    """
+    Function to check whether an image or file is given by its path, rather than as encoded bytes or a file object
+    (see hideDataToImage).
+
+    Parameters:
+    target: Path, encoded image file or binary file object.
+
+    Returns:
+    bool: True for paths.
+    """
+    return isinstance(target, (str, os.PathLike))
+
+
+def targetName(target) -> str:
+    """
+    Function to return the name of an output shown in messages.
+
+    Parameters:
+    target (str | file): Path, or binary file object.
+
+    Returns:
+    str: The path, or the name of the file object, such as <stdout>.
+    """
+    return str(target) if isPath(target) else str(getattr(target, "name", "stream"))
+
+
+def openImageFile(inputImagePath) -> Image.Image:
+    """
+    Function to open an image file without decoding it.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the image file, or encoded image file.
+
+    Returns:
+    Image.Image: The opened image.
+    """
+    return Image.open(inputImagePath if isPath(inputImagePath) else io.BytesIO(inputImagePath))
+
+
+def carrierGeometry(inputImagePath) -> tuple:
+    """
+    Function to return the size and number of channels of a carrier, reading only its header.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+
+    Returns:
+    tuple: Width, height and number of channels.
+    """
+    layout = StegoRaw.rawLayout(inputImagePath) if isPath(inputImagePath) else None
+    if layout:
+        return layout["width"], layout["height"], StegoRaw.rawChannels(layout)
+
+    with openImageFile(inputImagePath) as image:
+        return image.size[0], image.size[1], nativeChannels.get(image.mode, 3)
+
+
+def carrierCapacity(inputImagePath: str, bitsPerChannel: int = defaultBitsPerChannel, channelMask: int = None) -> int:
+    """
+    Function to return how many bytes an image can hide, reading only its header.
+
+    Parameters:
+    inputImagePath (str): Path to the input image file.
+    bitsPerChannel (int): Number of LSBs used in each selected channel.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+
+    Returns:
+    int: Capacity in bytes.
+    """
+    width, height, channels = carrierGeometry(inputImagePath)
+    return maxHiddenSize((width, height), channels, bitsPerChannel, channelMask)
+
+
+def checkOptions(compression: str = None, kdf: str = "scrypt", version: int = containerVersion) -> None:
+    """
+    Function to check the options of the data to hide before anything is read or derived.
+
+    Parameters:
+    compression (str): Codec name, "auto", or None for no compression.
+    kdf (str): Key derivation function name.
+    version (int): Hidden data format version.
+
+    Returns:
+    None
+
+    Raises:
+    StegoError: If the codec, the key derivation function or the version is unknown.
+    """
+    if compression is not None and compression not in StegoCompress.compressionModes:
+        raise StegoError("Unknown compression {!r}. Use one of: {}.".format(
+            compression, ", ".join(StegoCompress.compressionModes)))
+    elif kdf not in kdfIds:
+        raise StegoError("Unknown key derivation {!r}. Use one of: {}.".format(kdf, ", ".join(kdfIds)))
+    elif version not in (1, containerVersion):
+        raise StegoError("Unknown format version {!r}. Use 1 or {}.".format(version, containerVersion))
+
+
+def checkLayout(channels: int, bitsPerChannel: int, channelMask: int) -> None:
+    """
+    Function to check that a layout can be used with a carrier.
+
+    Parameters:
+    channels (int): Number of channels of the carrier.
+    bitsPerChannel (int): Number of LSBs used in each selected channel.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+
+    Returns:
+    None
+
+    Raises:
+    StegoError: If the number of bits is not between 1 and 4 or no channel of the carrier is selected.
+    """
+    if not 1 <= bitsPerChannel <= 4 or not selectedChannels(channelMask, channels):
+        raise StegoError("Bits per channel should be from 1 to 4 and the channel mask should select a channel of the image.")
+
+
+def checkCapacity(frameSize: int, capacity: int) -> None:
+    """
+    Function to check that a frame fits in a carrier.
+
+    Parameters:
+    frameSize (int): Frame size in bytes.
+    capacity (int): Number of bytes the carrier can hide.
+
+    Returns:
+    None
+
+    Raises:
+    PayloadTooLargeError: If the frame does not fit.
+    """
+    if frameSize > capacity:
+        raise PayloadTooLargeError("Maximum hidden file size for this image: {} bytes. To hide this file, choose an image "
+                                   "with a higher resolution or shard it across several images.".format(capacity), capacity)
+
+
+def checkOutputFormat(outputImagePath) -> None:
+    """
+    Function to check that an output image is not saved in a lossy format (see lossyFormats).
+
+    Parameters:
+    outputImagePath (str | file): Path or binary file object to save the output image to.
+
+    Returns:
+    None
+
+    Raises:
+    StegoError: If the extension of the output path is the one of a lossy format.
+    """
+    if isPath(outputImagePath) and \
+            Image.registered_extensions().get(os.path.splitext(outputImagePath)[1].lower()) in lossyFormats:
+        raise StegoError("Output image {} cannot be saved as a GIF or JPEG file, which would lose the hidden data. "
+                         "Save it as a PNG.".format(outputImagePath))
+
+
+def rawOutputLayout(inputImagePath, outputImagePath) -> dict:
+    """
+    Function to return the layout of a raw carrier, whose output is written by copying it and rewriting its pixels
+    in place, so it is saved in the same format, under the same extension.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    outputImagePath (str | file): Path or binary file object to save the output image to.
+
+    Returns:
+    dict: Layout of the pixel data (see StegoRaw.rawLayout), or None if the input image is not a raw image.
+
+    Raises:
+    StegoError: If the input image is a raw image and the output is a file object or has another extension.
+    """
+    layout = StegoRaw.rawLayout(inputImagePath) if isPath(inputImagePath) else None
+    if layout and not isPath(outputImagePath):
+        raise StegoError("Raw images can only be saved to a file.")
+    elif layout and os.path.splitext(outputImagePath)[1].lower() != os.path.splitext(inputImagePath)[1].lower():
+        raise StegoError("Output image {} should be in the same format as the raw input image {}.".format(
+            outputImagePath, inputImagePath))
+    return layout
+
+
+def embedRawCarrier(inputImagePath: str, layout: dict, blocks, size: int, outputImagePath: str,
+                    bitsPerChannel: int = defaultBitsPerChannel, channelMask: int = None,
+                    scatterKey: tuple = None) -> None:
+    """
+    Function to hide a frame in a memory-mapped raw image. The image is copied to the output path and
+    only the rows holding the frame are read and written, or every row for scattered layouts.
+
+    Parameters:
+    inputImagePath (str): Path to the input image file.
+    layout (dict): Layout of the pixel data (see StegoRaw.rawLayout).
+    blocks (iterable): Blocks of the frame, in order.
+    size (int): Frame size in bytes.
+    outputImagePath (str): Path to save the output image with hidden data, in the same format as the input.
+    bitsPerChannel (int): Number of LSBs used in each selected channel, from 1 to 4.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    scatterKey (tuple): KDF block and key of a scattered layout (see embedFrameInArray), or None.
+
+    Returns:
+    None
+    """
+    mapping, pixels = StegoRaw.mapRawCarrier(inputImagePath, layout, outputImagePath)
+    embedFrameInArray(pixels, blocks, size, bitsPerChannel, channelMask, scatterKey)
+    mapping.flush()
+
+
+def embedFrame(inputImagePath: str, frame: bytes, outputImagePath: str, bitsPerChannel: int = defaultBitsPerChannel,
+               channelMask: int = None, compressLevel: int = -1) -> str:
+    """
+    Function to hide a complete frame or shard in an image and save it. Used by the worker processes of the sharded mode.
+
+    Parameters:
+    inputImagePath (str): Path to the input image file.
+    frame (bytes): Frame or shard to hide.
+    outputImagePath (str): Path to save the output image with hidden data.
+    bitsPerChannel (int): Number of LSBs used in each selected channel, from 1 to 4.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    compressLevel (int): zlib compression level of PNG outputs, from 0 to 9, or -1 for the zlib default.
+
+    Returns:
+    str: Path of the saved image.
+    """
+    layout = rawOutputLayout(inputImagePath, outputImagePath)
+    if layout:
+        embedRawCarrier(inputImagePath, layout, [frame], len(frame), outputImagePath, bitsPerChannel, channelMask)
+        return outputImagePath
+    elif os.path.splitext(outputImagePath)[1].lower() == ".png" and StegoPng.isStreamable(inputImagePath):
+        embedPngStream(inputImagePath, [frame], len(frame), outputImagePath, bitsPerChannel, channelMask,
+                       compressLevel)
+        return outputImagePath
+
+    pixels = openCarrier(Image.open(inputImagePath), copy=False)
+    embedCarrier(pixels, [frame], len(frame), True, bitsPerChannel, channelMask)
+    saveCarrier(pixels, outputImagePath, compressLevel, source=inputImagePath)
+    return outputImagePath
+
+
+def readFrame(inputImagePath, observer: StegoObserver = None, password: str = "") -> tuple:
+    """
+    Function to read the frame or shard hidden in an image, decoding only the rows that hold it.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    observer (StegoObserver): Receives the measurements of the "probe", "decode", "kdf" and "unpack" phases.
+    password (str): Password keying the order of scattered layouts (see readPixelFrame).
+
+    Returns:
+    tuple: Parsed header (see probeImage) and the hidden bytes, header included. (None, None) if the image has no hidden file.
+    """
+    return readPixelFrame(lambda pixelCount: readLeadingPixels(inputImagePath, pixelCount), observer, password)
+
+
+def readImageFrame(inputImagePath, observer: StegoObserver = None, password: str = "",
+                   workers: int = None) -> tuple:
+    """
+    Function to read the frame hidden in an image file (see readFrame). When the first frame of a multi-page TIFF
+    or APNG image holds the first shard of a frame hidden across its frames, the other shards are read from the
+    following frames, on parallel threads for TIFF pages, and joined. Frames after the last shard are not decoded.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    observer (StegoObserver): Receives the measurements of the "probe", "decode", "kdf" and "unpack" phases
+                              and can cancel the operation between frames.
+    password (str): Password keying the order of scattered layouts.
+    workers (int): Number of threads decoding TIFF pages. Defaults to the number of CPU cores.
+
+    Returns:
+    tuple: Parsed header (see probeImage) and the hidden bytes, header included. (None, None) if the image has no hidden file.
+
+    Raises:
+    NoHiddenDataError: If a frame holding a shard has no hidden shard, or the shards don't hold a valid hidden file.
+    OperationCancelled: If the observer cancelled the operation.
+    """
+    header, data = readFrame(inputImagePath, observer, password)
+    if header is None or header["mode"] != "shard" or header["index"] != 0 or not isMultiFrame(inputImagePath):
+        return header, data
+
+    def readShard(index: int, image: Image.Image) -> tuple:
+        checkCancelled(observer)
+        shardHeader, shardData = readPixelFrame(lambda pixelCount: decodeLeadingPixels(image, pixelCount), workers=1)
+        if shardHeader is None or shardHeader["mode"] != "shard":
+            raise NoHiddenDataError("Frame {} of image don't have any hidden shard.".format(index + 1))
+        return shardHeader, shardData
+
+    shards = {0: (header, data)}
+    count = min(header["count"], StegoFrames.frameCount(inputImagePath))
+    with phaseTimer(observer, "decode") as record:
+        for shardHeader, shardData in StegoFrames.mapFrames(readShard, inputImagePath, count - 1, 1, workers):
+            shards[shardHeader["index"]] = (shardHeader, shardData)
+            record["bytes"] = record.get("bytes", 0) + len(shardData)
+
+    frameHeader, frame = joinShards(shards)
+    if "layout" in header:
+        frameHeader["layout"] = header["layout"]
+    return frameHeader, frame
+
+
+def openImageFrame(inputImagePath, password: str, observer: StegoObserver = None) -> tuple:
+    """
+    Function to find the frame hidden in an image file and return a reader of parts of it (see openFrame).
+    Frames hidden across the frames of a multi-frame image are joined in full first (see readImageFrame).
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    password (str): Password keying the order of scattered layouts.
+    observer (StegoObserver): Receives the measurements of the "probe", "decode", "kdf" and "unpack" phases.
+
+    Returns:
+    tuple: Parsed header, or None if the image has no hidden file, and a function returning the bytes of the frame
+           in a list of (start, end) offset ranges.
+    """
+    if isMultiFrame(inputImagePath):
+        header, data = readImageFrame(inputImagePath, observer, password)
+        return header, lambda ranges: [data[start:end] for start, end in ranges]
+    return openFrame(lambda pixelCount: readLeadingPixels(inputImagePath, pixelCount), password, observer)
+
+
+def readPixelFrame(readPixels, observer: StegoObserver = None, password: str = "", workers: int = None) -> tuple:
+    """
+    Function to read the frame or shard hidden in the leading pixels of an image.
+    Frames hidden in a scattered layout are gathered from every pixel, in the order keyed by the password.
+
+    Parameters:
+    readPixels (callable): Function returning the given number of leading pixels, or every pixel for None
+                           (see probePixels).
+    observer (StegoObserver): Receives the measurements of the "probe", "decode", "kdf" and "unpack" phases.
+    password (str): Password keying the order of scattered layouts.
+    workers (int): Maximum number of worker processes unpacking large frames in tiles (see tileWorkerCount).
+
+    Returns:
+    tuple: Parsed header (see probePixels) and the hidden bytes, header included. (None, None) if the image has no hidden file.
+
+    Raises:
+    InvalidPasswordError: If the frame of a scattered layout cannot be found with the password.
+    """
+    with phaseTimer(observer, "probe"):
+        header = probePixels(readPixels)
+    if header is None:
+        return None, None
+    elif header["mode"] == "layout":
+        return readScatteredFrame(readPixels, header, password, observer, workers)
+
+    layout = header.get("layout", header)
+    pixelCount = storedPixelCount(layout, header["channels"])
+    with phaseTimer(observer, "decode") as record:
+        pixels = readPixels(pixelCount)
+        record["bytes"] = pixels.nbytes
+    if len(pixels) < pixelCount:
+        return None, None
+
+    with phaseTimer(observer, "unpack", layout["frameSize"]):
+        return header, unpackFrame(pixels, layout, workers=workers)
+
+
+def readScatteredFrame(readPixels, layout: dict, password: str, observer: StegoObserver = None,
+                       workers: int = None) -> tuple:
+    """
+    Function to gather the frame hidden in a scattered layout, reading every pixel of the image once.
+    Large frames are gathered in tiles by worker processes (see unpackTiled).
+
+    Parameters:
+    readPixels (callable): Function returning leading pixels (see readPixelFrame).
+    layout (dict): Parsed scattered layout header (see probePixels).
+    password (str): Password keying the order of the layout.
+    observer (StegoObserver): Receives the measurements of the "decode", "kdf" and "unpack" phases.
+    workers (int): Maximum number of worker processes (see tileWorkerCount).
+
+    Returns:
+    tuple: Parsed frame header (see probePixels) and the hidden bytes, header included.
+
+    Raises:
+    InvalidPasswordError: If no frame is found in the order keyed by the password.
+    """
+    channels, bits = layout["channels"], layout["bitsPerChannel"]
+    with phaseTimer(observer, "decode") as record:
+        pixels = readPixels(None)
+        record["bytes"] = pixels.nbytes
+    with phaseTimer(observer, "kdf"):
+        roundKeys = scatterRoundKeys(deriveSaltedKey(password, layout["salt"], layout["kdf"], layout["kdfParams"]))
+
+    samples = pixels.reshape(-1)
+    selected = selectedChannels(layout["channelMask"], channels)
+    startPixel = bodyStartPixel(channels, layout["flags"])
+    unpack = lambda size: deserializeBits(readScattered(samples, -(-size * 8 // bits), bits, roundKeys, channels,
+                                                        selected, startPixel), bits)[:size]
+    if layout["frameSize"] * 8 > (len(pixels) - startPixel) * len(selected) * bits:
+        return None, None
+    with phaseTimer(observer, "unpack", layout["frameSize"]):
+        header = parseHeader(unpack(min(maxHeaderSize, layout["frameSize"])))
+        if header is None or header["mode"] == "layout" or header["frameSize"] > layout["frameSize"]:
+            raise InvalidPasswordError("Invalid password or data.")
+        workers = tileWorkerCount(-(-layout["frameSize"] * 8 // bits), workers)
+        frame = unpack(layout["frameSize"]) if workers == 1 else \
+            unpackTiled(pixels, layout["frameSize"], bits, selected, startPixel, roundKeys, workers)
+        return dict(header, channels=channels, layout=layout), frame
+
+
+def readArchive(header: dict, read, password: str, observer: StegoObserver = None) -> tuple:
+    """
+    Function to read the table of contents of the archive hidden in an image. Only the header and the table are read.
+
+    Parameters:
+    header (dict): Parsed header of the frame (see openFrame).
+    read (callable): Reader of parts of the frame (see openFrame).
+    password (str): Password used for decryption if the archive is encrypted.
+    observer (StegoObserver): Receives the measurements of the "kdf" and "decrypt" or "verify" phases, and of the
+                              phases of the reader.
+
+    Returns:
+    tuple: The header, the table of contents entries (see packTocEntry) and the key of the archive, or None if it
+           is not encrypted.
+
+    Raises:
+    NoHiddenDataError: If the image has no hidden file.
+    StegoError: If the image holds a single file or a shard instead of an archive.
+    InvalidPasswordError: If the password is invalid or the table of contents cannot be decrypted.
+    CorruptedDataError: If the checksum of an unencrypted table of contents does not match.
+    """
+    if header is None:
+        raise NoHiddenDataError("Image don't have any hidden file.")
+    elif header["mode"] != "archive":
+        raise StegoError("Image doesn't hold an archive.")
+
+    stored = read([(0, header["headerSize"] + header["tocSize"])])[0]
+    headerBytes, toc = stored[:header["headerSize"]], stored[header["headerSize"]:]
+    key = containerKey(header, password, observer)
+    with phaseTimer(observer, "decrypt" if key is not None else "verify", len(toc)):
+        if key is not None:
+            try:
+                toc = aesgcm(key).decrypt(streamNonce(header["prefix"], 0, True), toc, headerBytes)
+            except Exception:
+                raise InvalidPasswordError("Invalid password or data.") from None
+        elif len(toc) < crcSize or zlib.crc32(toc[:-crcSize]) != int.from_bytes(toc[-crcSize:], byteorder='big'):
+            raise CorruptedDataError("Archive table of contents is corrupted.")
+        else:
+            toc = toc[:-crcSize]
+
+    entries, position = list(), 0
+    for _ in range(header["memberCount"]):
+        nameSize = int.from_bytes(toc[position:position + 2], byteorder='big')
+        entry = toc[position + 2:position + tocEntrySize + nameSize]
+        codec = StegoCompress.codecName(entry[nameSize + 24]) if len(entry) == tocEntrySize - 2 + nameSize else None
+        if codec is None:
+            raise CorruptedDataError("Archive table of contents is corrupted.")
+        entries.append({"name": bytes(entry[:nameSize]),
+                        "offset": int.from_bytes(entry[nameSize:nameSize + 8], byteorder='big'),
+                        "storedSize": int.from_bytes(entry[nameSize + 8:nameSize + 16], byteorder='big'),
+                        "fileSize": int.from_bytes(entry[nameSize + 16:nameSize + 24], byteorder='big'),
+                        "codec": codec,
+                        "prefix": bytes(entry[nameSize + 25:])})
+        if entries[-1]["offset"] + entries[-1]["storedSize"] > header["bodySize"]:
+            raise CorruptedDataError("Archive table of contents is corrupted.")
+        position += tocEntrySize + nameSize
+    return header, entries, key
+
+
+def memberBlocks(stored: bytes, entry: dict, key: bytes, observer: StegoObserver = None):
+    """
+    Function to check, decrypt and decompress the chunks of an archive member, in parallel on a thread pool
+    (see openIndexedChunks). The key was verified by the table of contents, so a chunk that cannot be decrypted
+    is damaged.
+
+    Parameters:
+    stored (bytes): The stored member.
+    entry (dict): Table of contents entry of the member (see readArchive).
+    key (bytes): Key of an encrypted archive, or None.
+    observer (StegoObserver): Receives the measurements of the "decrypt" or "verify" phase.
+
+    Returns:
+    iterator: Blocks of file data.
+
+    Raises:
+    CorruptedDataError: If a chunk cannot be decrypted or its checksum does not match, or the chunk index does not
+                        match the entry.
+    """
+    chunkCount = -(-entry["fileSize"] // chunkSize)
+    member = {"encrypted": key is not None, "headerSize": 0, "prefix": entry["prefix"], "chunkCount": chunkCount,
+              "codec": entry["codec"]}
+    checkSize = tagSize if key is not None else crcSize
+    indexEnd = chunkCount * indexEntrySize + checkSize
+    index = next(openIndexedChunks(stored, member, key, [(0, indexEnd)], [0], verified=True))
+    sizes = np.frombuffer(index, dtype=">u4").astype(np.int64)
+    ends = indexEnd + np.cumsum(sizes + checkSize)
+    if len(sizes) != chunkCount or (ends[-1] if chunkCount else indexEnd) != entry["storedSize"]:
+        raise CorruptedDataError("Chunk index of {} is corrupted.".format(entry["name"].decode()))
+
+    offsets = [(0, indexEnd)] + list(zip([indexEnd] + ends[:-1].tolist(), ends.tolist()))
+    blocks = openIndexedChunks(stored, member, key, offsets, range(1, chunkCount + 1), verified=True)
+    return timedBlocks(blocks, observer, "decrypt" if key is not None else "verify")
+
+
+def saveArchiveMembers(header: dict, read, password: str, names: list = None, observer: StegoObserver = None,
+                       output=None) -> None:
+    """
+    Function to extract members of the archive hidden in an image, by default to the current working directory.
+    Only the header, the table of contents and the selected members are unpacked.
+
+    Parameters:
+    header (dict): Parsed header of the frame (see openFrame).
+    read (callable): Reader of parts of the frame (see openFrame).
+    password (str): Password used for decryption if the archive is encrypted.
+    names (list): Names of the members to extract, or None for every member.
+    observer (StegoObserver): Receives the measurements of every phase.
+    output (str | file): Directory to save the members to, created if needed, or a binary file object receiving
+                         the only selected member. A single selected member can also be saved to a file path
+                         (see saveHiddenFile). None for the current working directory.
+
+    Returns:
+    None
+
+    Raises:
+    NoHiddenDataError: If the image has no archive, or no member with one of the names.
+    InvalidPasswordError: If the password is invalid or the table of contents cannot be decrypted.
+    CorruptedDataError: If a member cannot be decrypted or a checksum does not match.
+    StegoError: If several members are selected with a file object as output.
+    """
+    header, entries, key = readArchive(header, read, password, observer)
+    selected = entries
+    if names is not None:
+        byName = {entry["name"].decode(): entry for entry in entries}
+        missing = [name for name in names if name not in byName]
+        if missing:
+            raise NoHiddenDataError("Archive has no file named {}.".format(", ".join(missing)))
+        selected = [byName[name] for name in dict.fromkeys(names)]
+    if len(selected) > 1 and output is not None:
+        if not isPath(output):
+            raise StegoError("Only one file of an archive can be written to a stream. Select it by name.")
+        os.makedirs(output, exist_ok=True)
+
+    base = header["headerSize"] + header["tocSize"]
+    print("[*] Extracting {} of {} files from archive.".format(len(selected), len(entries)))
+    members = read([(base + entry["offset"], base + entry["offset"] + entry["storedSize"]) for entry in selected])
+    for entry, stored in zip(selected, members):
+        with phaseTimer(observer, "write"):
+            saveHiddenFile(entry["name"], memberBlocks(stored, entry, key, observer), output)
+
+
+def checkHiddenFrame(header: dict) -> None:
+    """
+    Function to check that the header read from an image belongs to a hidden file that can be extracted on its own.
+
+    Parameters:
+    header (dict): Parsed header (see probePixels), or None.
+
+    Returns:
+    None
+
+    Raises:
+    NoHiddenDataError: If the image has no hidden file.
+    StegoError: If the image holds one shard of a file hidden in several images, or an archive.
+    """
+    if header is None:
+        raise NoHiddenDataError("Image don't have any hidden file.")
+    elif header["mode"] == "shard":
+        raise StegoError("Image holds shard {} of {}, extract it together with the other shards.".format(
+            header["index"] + 1, header["count"]))
+    elif header["mode"] == "archive":
+        raise StegoError("Image holds an archive of {} files, extract them by name.".format(header["memberCount"]))
+
+
+def decodeFrame(data: bytes, header: dict, password: str, observer: StegoObserver = None) -> tuple:
+    """
+    Function to split a frame into the hidden file name and data, decrypting them if needed.
+    Keys of salted frames are derived once and cached (see deriveSaltedKey).
+
+    Parameters:
+    data (bytes): The frame, header included.
+    header (dict): Parsed frame header (see parseHeader).
+    password (str): Password used for decryption if the hidden data is encrypted.
+    observer (StegoObserver): Receives the measurements of the "kdf", "decrypt" and "decompress" phases.
+
+    Returns:
+    tuple: The file name as bytes and an iterator over the blocks of file data, decompressed lazily.
+
+    Raises:
+    InvalidPasswordError: If the password is invalid or the file name cannot be decrypted.
+    CorruptedDataError: If the file data cannot be decrypted once the file name was, or its checksum does not match.
+    """
+    if header["mode"] == "container":
+        return decodeContainer(data, header, password, observer)
+
+    nameEnd = header["headerSize"] + header["nameSize"]
+    encodeName = data[header["headerSize"] : nameEnd]
+    data = data[nameEnd : (nameEnd + header["dataSize"])]
+    key = password
+    if header["encrypted"] and header["kdf"] != "md5":
+        with phaseTimer(observer, "kdf"):
+            key = deriveSaltedKey(password, header["salt"], header["kdf"], header["kdfParams"])
+
+    if header["encryption"] == "chunked":
+        encodeName = decryptDataChunked(encodeName, key)
+        blocks = timedBlocks(decryptChunks(data, key, verified=True), observer, "decrypt")
+    elif header["encryption"] == "fernet":
+        with phaseTimer(observer, "decrypt", len(data)):
+            encodeName = decryptData(encodeName, key)
+            try:
+                blocks = [decryptData(data, key)]
+            except InvalidPasswordError:
+                raise CorruptedDataError("Hidden data is corrupted.") from None
+    else:
+        blocks = [data]
+    return encodeName, timedBlocks(StegoCompress.decompressBlocks(blocks, header["codec"]), observer, "decompress")
+
+
+def decodeContainer(data: bytes, header: dict, password: str, observer: StegoObserver = None) -> tuple:
+    """
+    Function to split a v2 container into the hidden file name and data, decrypting and authenticating
+    its body together with its header if needed.
+
+    Parameters:
+    data (bytes): The container, header included.
+    header (dict): Parsed container header (see parseContainerHeader).
+    password (str): Password used for decryption if the hidden data is encrypted.
+    observer (StegoObserver): Receives the measurements of the "kdf", "decrypt" and "decompress" phases.
+
+    Returns:
+    tuple: The file name as bytes and an iterator over the blocks of file data, decompressed lazily.
+    """
+    view = memoryview(data)
+    if header["indexed"]:
+        offsets = parseChunkIndex(view, header)
+        blocks = openIndexedChunks(view, header, containerKey(header, password, observer), offsets,
+                                   range(header["chunkCount"] + 1))
+        blocks = timedBlocks(blocks, observer, "decrypt" if header["encrypted"] else "verify")
+        return bytes(next(blocks)), blocks
+
+    body = view[header["headerSize"]:header["frameSize"]]
+    blocks = [body]
+    if header["encrypted"]:
+        with phaseTimer(observer, "kdf"):
+            key = deriveSaltedKey(password, header["salt"], header["kdf"], header["kdfParams"])
+        blocks = openChunks(body, key, header["prefix"], associatedData=view[:header["headerSize"]].tobytes())
+        blocks = timedBlocks(blocks, observer, "decrypt")
+
+    encodeName, blocks = splitBlocks(blocks, header["nameSize"])
+    return bytes(encodeName), timedBlocks(StegoCompress.decompressBlocks(blocks, header["codec"]), observer, "decompress")
+
+
+def containerKey(header: dict, password: str, observer: StegoObserver = None) -> bytes:
+    """
+    Function to derive the key of an encrypted container from the password (see deriveSaltedKey).
+
+    Parameters:
+    header (dict): Parsed container header (see parseContainerHeader).
+    password (str): Password used for decryption.
+    observer (StegoObserver): Receives the measurements of the "kdf" phase.
+
+    Returns:
+    bytes: The key, or None if the container is not encrypted.
+    """
+    if not header["encrypted"]:
+        return None
+    with phaseTimer(observer, "kdf"):
+        return deriveSaltedKey(password, header["salt"], header["kdf"], header["kdfParams"])
+
+
+def parseChunkIndex(data: bytes, header: dict) -> list:
+    """
+    Function to read and check the chunk index of an indexed container.
+
+    Parameters:
+    data (bytes | memoryview): Leading bytes of the container, at least up to the end of its index.
+    header (dict): Parsed container header (see parseContainerHeader).
+
+    Returns:
+    list: Start and end offsets in the container of the name (item 0) and of every chunk, checks included.
+
+    Raises:
+    CorruptedDataError: If the checksum of the header and index does not match, or the index does not match the header.
+    """
+    end = header["headerSize"]
+    if zlib.crc32(data[:end - crcSize]) != int.from_bytes(data[end - crcSize:end], byteorder='big'):
+        raise CorruptedDataError("Hidden data header is corrupted.")
+
+    sizes = np.frombuffer(data, dtype=">u4", count=header["chunkCount"], offset=header["indexOffset"]).astype(np.int64)
+    if int(sizes.sum()) != header["dataSize"]:
+        raise CorruptedDataError("Hidden data index is corrupted.")
+    checkSize = tagSize if header["encrypted"] else crcSize
+    ends = header["headerSize"] + np.cumsum(np.concatenate(([header["nameSize"]], sizes)) + checkSize)
+    return list(zip([header["headerSize"]] + ends[:-1].tolist(), ends.tolist()))
+
+
+def openIndexedChunks(data: bytes, header: dict, key: bytes, offsets: list, items, base: int = 0,
+                      workers: int = None, verified: bool = False):
+    """
+    Function to check and decode items of an indexed container: the name (item 0) or chunks of data (items 1 and up).
+    Items are decrypted and authenticated, or checked against their CRC32, then decompressed, in parallel on a
+    thread pool. An item that cannot be decrypted after another one was decrypted with the same key is damaged.
+
+    Parameters:
+    data (bytes | memoryview): Bytes of the container from offset base, holding the items. The header and index
+                               must be included for encrypted containers, which authenticate them with every item.
+    header (dict): Parsed container header (see parseContainerHeader).
+    key (bytes): Key of an encrypted container (see containerKey), or None.
+    offsets (list): Offsets of the items (see parseChunkIndex).
+    items (iterable): Indices of the items to decode, in order.
+    base (int): Offset in the container of the first byte of data.
+    workers (int): Number of threads. Defaults to the number of CPU cores.
+    verified (bool): The key already decrypted other data, such as the table of contents of an archive.
+
+    Returns:
+    iterator: Decoded items.
+
+    Raises:
+    InvalidPasswordError: If the password is invalid or the first encrypted item cannot be decrypted.
+    CorruptedDataError: If the checksum of an unencrypted item does not match, or an encrypted item cannot be
+                        decrypted with a verified key.
+    """
+    view = memoryview(data)
+    aead = aesgcm(key) if header["encrypted"] else None
+    associatedData = view[:header["headerSize"]].tobytes() if aead is not None and header["headerSize"] else None
+
+    def openItem(item):
+        start, end = offsets[item]
+        stored = view[start - base:end - base]
+        if aead is not None:
+            try:
+                block = aead.decrypt(streamNonce(header["prefix"], item, item == header["chunkCount"]), stored,
+                                     associatedData)
+            except Exception:
+                return item, None
+        else:
+            block = stored[:-crcSize]
+            if len(stored) < crcSize or zlib.crc32(block) != int.from_bytes(stored[-crcSize:], byteorder='big'):
+                raise CorruptedDataError("Hidden data is corrupted in chunk {} of {}.".format(item, header["chunkCount"])
+                                         if item else "Hidden file name is corrupted.")
+        if item and header["codec"] != "none":
+            return item, b"".join(StegoCompress.decompressBlocks([block], header["codec"]))
+        return item, block
+
+    for item, block in mapOrdered(openItem, ((item,) for item in items), workers):
+        if block is None and not verified:
+            raise InvalidPasswordError("Invalid password or data.")
+        elif block is None:
+            raise CorruptedDataError("Hidden data is corrupted in chunk {} of {}.".format(item, header["chunkCount"])
+                                     if item else "Hidden file name is corrupted.")
+        verified = True
+        yield block
+
+
+def readPixelRange(readPixels, offset: int, length: int, password: str, observer: StegoObserver = None) -> bytes:
+    """
+    Function to read a range of the file hidden in the leading pixels of an image. For indexed containers, only the
+    header, the chunk index, the file name if it is encrypted and the chunks overlapping the range are unpacked,
+    checked and decrypted, from the leading pixels up to the last of these chunks. Scattered layouts are gathered from every pixel, and frames
+    without an index are decoded in full.
+
+    Parameters:
+    readPixels (callable): Function returning leading pixels (see readPixelFrame).
+    offset (int): Offset of the range in the hidden file.
+    length (int): Length of the range. The range ends early at the end of the file.
+    password (str): Password used for decryption if the hidden data is encrypted.
+    observer (StegoObserver): Receives the measurements of the "probe", "decode", "kdf", "unpack" and "decrypt"
+                              or "verify" phases.
+
+    Returns:
+    bytes: The data in the range.
+
+    Raises:
+    NoHiddenDataError: If the image has no hidden file.
+    InvalidPasswordError: If the password is invalid or the file name cannot be decrypted.
+    CorruptedDataError: If a chunk cannot be decrypted once the file name was, or a checksum does not match.
+    StegoError: If the range is negative or the image holds one shard of a file hidden in several images,
+                or an archive.
+    """
+    header, read = openFrame(readPixels, password, observer)
+    return readFrameRange(header, read, offset, length, password, observer)
+
+
+def readFrameRange(header: dict, read, offset: int, length: int, password: str, observer: StegoObserver = None) -> bytes:
+    """
+    Function to read a range of the file hidden in a frame opened with openFrame or openImageFrame (see readPixelRange).
+
+    Parameters:
+    header (dict): Parsed header of the frame, or None if the image has no hidden file.
+    read (callable): Function returning the bytes of the frame in a list of (start, end) offset ranges.
+    offset, length, password, observer: See readPixelRange.
+
+    Returns:
+    bytes: The data in the range.
+
+    Raises:
+    NoHiddenDataError, InvalidPasswordError, CorruptedDataError, StegoError: See readPixelRange.
+    """
+    if offset < 0 or length < 0:
+        raise StegoError("Range offset and length should not be negative.")
+    checkHiddenFrame(header)
+    if not header.get("indexed"):
+        _, blocks = decodeFrame(read([(0, header["frameSize"])])[0], header, password, observer)
+        return b"".join(blocks)[offset:offset + length]
+
+    headerBytes = read([(0, header["headerSize"])])[0]
+    offsets = parseChunkIndex(headerBytes, header)
+    end = min(offset + length, header["fileSize"])
+    if end <= offset:
+        return b""
+
+    first, last = offset // chunkSize, (end - 1) // chunkSize
+    start, end = offsets[first + 1][0], offsets[last + 1][1]
+    body = read([(start, end)])[0]
+    key = containerKey(header, password, observer)
+    if header["encrypted"]:
+        # The name is opened first, so a chunk of the range that fails to open is damaged, not a wrong password.
+        next(openIndexedChunks(headerBytes + read([offsets[0]])[0], header, key, offsets, [0]))
+        body = headerBytes + body
+        start -= header["headerSize"]
+    blocks = openIndexedChunks(body, header, key, offsets, range(first + 1, last + 2), start, verified=True)
+    data = b"".join(timedBlocks(blocks, observer, "decrypt" if header["encrypted"] else "verify"))
+    return data[offset - first * chunkSize:offset - first * chunkSize + length]
+
+
+def openFrame(readPixels, password: str, observer: StegoObserver = None) -> tuple:
+    """
+    Function to find the frame hidden in the leading pixels of an image and return a reader of parts of it.
+    Frames hidden in a scattered layout are gathered in full first.
+
+    Parameters:
+    readPixels (callable): Function returning leading pixels (see readPixelFrame).
+    password (str): Password keying the order of scattered layouts.
+    observer (StegoObserver): Receives the measurements of the "probe", "decode", "kdf" and "unpack" phases.
+
+    Returns:
+    tuple: Parsed header (see probePixels), or None if the image has no hidden file, and a function returning
+           the bytes of the frame in a list of (start, end) offset ranges (see readFrameBytes).
+    """
+    with phaseTimer(observer, "probe"):
+        header = probePixels(readPixels)
+    if header is not None and header["mode"] == "layout":
+        header, data = readScatteredFrame(readPixels, header, password, observer)
+        return header, lambda ranges: [data[start:end] for start, end in ranges]
+    return header, lambda ranges: readFrameBytes(readPixels, header, ranges, observer)
+
+
+def readFrameBytes(readPixels, header: dict, ranges: list, observer: StegoObserver = None) -> list:
+    """
+    Function to read parts of the frame hidden in the leading pixels of an image. The leading pixels are read once,
+    up to the end of the last part, and only the pixels holding the parts are unpacked.
+
+    Parameters:
+    readPixels (callable): Function returning leading pixels (see readPixelFrame).
+    header (dict): Parsed header of the frame (see probePixels).
+    ranges (list): Start and end offsets of the parts in the frame.
+    observer (StegoObserver): Receives the measurements of the "decode" and "unpack" phases.
+
+    Returns:
+    list: The bytes of every part.
+
+    Raises:
+    NoHiddenDataError: If the image is too small to hold the parts.
+    """
+    layout = header.get("layout", header)
+    pixelCount = storedPixelCount(layout, header["channels"], max((end for _, end in ranges), default=0))
+    with phaseTimer(observer, "decode") as record:
+        pixels = readPixels(pixelCount)
+        record["bytes"] = pixels.nbytes
+    if len(pixels) < pixelCount:
+        raise NoHiddenDataError("Image don't have any hidden file.")
+    with phaseTimer(observer, "unpack", sum(end - start for start, end in ranges)):
+        return [unpackFrame(pixels, layout, end - start, start) for start, end in ranges]
+
+
+def saveHiddenFile(encodeName: bytes, blocks, output=None) -> None:
+    """
+    Function to write an extracted file, by default to the current working directory, under the base name of the
+    hidden file. The partly written file is removed if the operation is cancelled or the data cannot be decrypted.
+
+    Parameters:
+    encodeName (bytes): Name of the hidden file.
+    blocks (iterable): Blocks of file data.
+    output (str | file): Path to save the file to, directory to save it to under its base name, or a binary file
+                         object such as standard output, which is written block by block and left open.
+                         None for the current working directory.
+
+    Returns:
+    None
+    """
+    baseName = os.path.basename(encodeName.decode()) or "hidden_file"
+    if output is None or isPath(output) and os.path.isdir(output):
+        outputFilePath = os.path.join(os.getcwd() if output is None else output, baseName)
+    else:
+        outputFilePath = output
+
+    print("[+] Saving hidden file to {}.".format(targetName(outputFilePath)))
+
+    f = open(outputFilePath, 'wb') if isPath(outputFilePath) else outputFilePath
+    recoveredSize = 0
+    try:
+        for block in blocks:
+            f.write(block)
+            recoveredSize += len(block)
+    except StegoError:
+        if isPath(outputFilePath):
+            f.close()
+            os.remove(outputFilePath)
+        raise
+    if isPath(outputFilePath):
+        f.close()
+    else:
+        f.flush()
+
+    print("[*] Size of hidden file recovered: {} bytes.".format(recoveredSize))
+
+
+def arrayPixels(pixels: np.ndarray) -> np.ndarray:
+    """
+    Function to return the view of a carrier array holding hidden data: the R, G, B and alpha channels,
+    or the gray channel, with shape (height, width, channels). Further channels are left out.
+
+    Parameters:
+    pixels (np.ndarray): Array of unsigned integers, of shape (height, width) or (height, width, channels).
+
+    Returns:
+    np.ndarray: View of the array.
+
+    Raises:
+    StegoError: If the array cannot be used as a carrier.
+    """
+    if pixels.ndim not in (2, 3) or pixels.dtype.kind != "u" or pixels.dtype.itemsize > 2 or pixels.size == 0:
+        raise StegoError("Carrier arrays should hold 8-bit or 16-bit unsigned pixels, "
+                         "with shape (height, width) or (height, width, channels).")
+    return pixels[..., None] if pixels.ndim == 2 else pixels[..., :4]
+
+
+def openCarrier(carrier, observer: StegoObserver = None, copy: bool = True):
+    """
+    Function to copy an in-memory carrier into pixels that can be modified. Images in one of the modes of
+    nativeChannels keep their mode, and encoded RGB and RGBA images with 16 bits per channel are decoded
+    into arrays of 16-bit values, which Pillow cannot hold (see decodeWidePixels).
+
+    Parameters:
+    carrier (bytes | Image.Image | np.ndarray): Encoded image file, PIL image or array of pixels (see arrayPixels).
+    observer (StegoObserver): Receives the measurements of the "decode" and "convert" phases.
+    copy (bool): Copy PIL images. Set to False for images opened from a file to be modified, which are then
+                 used as they are, or decoded into an array if they have 16 bits per channel.
+
+    Returns:
+    Image.Image | np.ndarray: Image in its own mode or converted to RGB, or copy of an array.
+
+    Raises:
+    StegoError: If the carrier is not a valid image.
+    """
+    if isinstance(carrier, np.ndarray):
+        arrayPixels(carrier)
+        return carrier.copy()
+
+    encoded = isinstance(carrier, (bytes, bytearray, memoryview))
+    try:
+        with phaseTimer(observer, "decode") as record:
+            image = Image.open(io.BytesIO(carrier)) if encoded else carrier
+            if (encoded or not copy) and wideRawmode(image):
+                pixels = decodeWidePixels(image, image.size[1]).reshape(image.size[1], image.size[0], -1)
+                record["bytes"] = pixels.nbytes
+                return pixels
+            image.load()
+            record["bytes"] = image.size[0] * image.size[1] * len(image.getbands())
+    except (OSError, SyntaxError):
+        raise StegoError("Carrier is not a valid image.") from None
+    if image.mode in nativeChannels:
+        return image.copy() if copy and not encoded else image
+    with phaseTimer(observer, "convert", image.size[0] * image.size[1] * 3):
+        return image.convert('RGB')
+
+
+def saveCarrier(pixels, output, compressLevel: int = -1, imageFormat: str = None, source=None) -> None:
+    """
+    Function to save an opened carrier (see openCarrier). Arrays of 16-bit RGB or RGBA values are saved as PNG
+    files by StegoPng.writePng, since Pillow cannot save them, with the ancillary chunks of the PNG file they were
+    decoded from, such as its colour profile and transparency key.
+
+    Parameters:
+    pixels (Image.Image | np.ndarray): Opened carrier.
+    output (str | file): Path to the output image file, or a binary file object.
+    compressLevel (int): zlib compression level of PNG outputs, from 0 to 9, or -1 for the zlib default.
+    imageFormat (str): Format of the output, or None to choose it from the extension of the path.
+    source (str | bytes): Path to the image file the array was decoded from, or encoded image file. None if it
+                          was not decoded from a file.
+
+    Returns:
+    None
+
+    Raises:
+    StegoError: If an array is saved in another format than PNG.
+    """
+    if isinstance(pixels, Image.Image):
+        pixels.save(output, format=imageFormat, compress_level=compressLevel)
+        return
+    elif (imageFormat or Image.registered_extensions().get(os.path.splitext(str(output))[1].lower())) != "PNG":
+        raise StegoError("Images with 16 bits per channel can only be saved as PNG.")
+    leading, trailing = StegoPng.ancillaryChunks(source) if source is not None else ((), ())
+    StegoPng.writePng(output, pixels, compressLevel, leading, trailing)
+
+
+def pixelGeometry(pixels) -> tuple:
+    """
+    Function to return the size and number of channels holding hidden data of an opened carrier.
+
+    Parameters:
+    pixels (Image.Image | np.ndarray): Image or array of pixels (see openCarrier).
+
+    Returns:
+    tuple: Width, height and number of channels.
+    """
+    if isinstance(pixels, np.ndarray):
+        height, width, channels = arrayPixels(pixels).shape
+        return width, height, channels
+    return pixels.size[0], pixels.size[1], nativeChannels[pixels.mode]
+
+
+def embedCarrier(pixels, frame, frameSize: int, vectorized: bool = True, bitsPerChannel: int = defaultBitsPerChannel,
+                 channelMask: int = None, observer: StegoObserver = None, scatterKey: tuple = None) -> None:
+    """
+    Function to hide a frame in an opened carrier, modified in place.
+
+    Parameters:
+    pixels (Image.Image | np.ndarray): Image or array of pixels (see openCarrier).
+    frame (iterable): Blocks of the frame, in order.
+    frameSize (int): Frame size in bytes.
+    vectorized (bool): Use the NumPy engine. Set to False to fall back to the pure-Python pixel loop,
+                       which is only available for RGB images with the default layout.
+    bitsPerChannel (int): Number of LSBs used in each selected channel, from 1 to 4.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    observer (StegoObserver): Receives the progress of the "embed" phase and the measurements of the "embed"
+                              phase, or of the "serialize" and "pixelLoop" phases of the pure-Python engine.
+    scatterKey (tuple): KDF block and key of a scattered layout (see embedFrameInArray), or None.
+                        Scattered layouts always use the NumPy engine.
+
+    Returns:
+    None
+    """
+    width, _, channels = pixelGeometry(pixels)
+    rowsFor = None if scatterKey else \
+        lambda done: -(-hiddenPixelCount(done, channels, bitsPerChannel, channelMask) // width)
+    frame = observeBlocks(frame, observer, "embed", frameSize, rowsFor)
+    if isinstance(pixels, np.ndarray):
+        with phaseTimer(observer, "embed", frameSize):
+            embedFrameInArray(arrayPixels(pixels), frame, frameSize, bitsPerChannel, channelMask, scatterKey)
+        return
+    elif vectorized or scatterKey or pixels.mode != "RGB" or not isDefaultLayout(bitsPerChannel, channelMask, 3):
+        with phaseTimer(observer, "embed", frameSize):
+            embedBlocks(pixels, frame, frameSize, bitsPerChannel, channelMask, scatterKey)
+        return
+
+    image, pixels = pixels, pixels.load()
+    with phaseTimer(observer, "serialize", frameSize):
+        data = serializeData(b"".join(frame), padding=3)
+    data.reverse()
+
+    with phaseTimer(observer, "pixelLoop", frameSize):
+        imageX, imageY = 0, 0
+        while data:
+            pixel_val = pixels[imageX, imageY]
+            pixel_val = (changeLast2Bits(pixel_val[0], data.pop()),
+                         changeLast2Bits(pixel_val[1], data.pop()),
+                         changeLast2Bits(pixel_val[2], data.pop()))
+            pixels[imageX, imageY] = pixel_val
+
+            if imageX == image.size[0] - 1:
+                imageX = 0
+                imageY += 1
+            else:
+                imageX += 1
+
+
+def embedPngStream(inputImagePath: str, frame, frameSize: int, outputImagePath,
+                   bitsPerChannel: int = defaultBitsPerChannel, channelMask: int = None, compressLevel: int = -1,
+                   observer: StegoObserver = None) -> None:
+    """
+    Function to hide a frame in a PNG file without decoding it whole. Only the rows holding the frame,
+    and the row after them, are decoded and encoded again. The other scanlines are streamed to the output
+    unchanged, through a pipeline inflating and deflating them on separate threads (see StegoPng.rewritePng).
+
+    Parameters:
+    inputImagePath (str): Path to the input PNG file (see StegoPng.isStreamable).
+    frame (iterable): Blocks of the frame, in order.
+    frameSize (int): Frame size in bytes.
+    outputImagePath (str | file): Path to save the output PNG file, or a binary file object.
+    bitsPerChannel (int): Number of LSBs used in each selected channel, from 1 to 4.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    compressLevel (int): zlib compression level of the output, from 0 to 9, or -1 for the zlib default.
+    observer (StegoObserver): Receives the progress of the "embed" and "save" phases and the measurements of the
+                              "decode", "embed" and "save" phases, and can cancel the operation between bands.
+
+    Returns:
+    None
+    """
+    width, height, channels = carrierGeometry(inputImagePath)
+    rows = min(height, -(-hiddenPixelCount(frameSize, channels, bitsPerChannel, channelMask) // width) + 1)
+    with phaseTimer(observer, "decode", rows * width * channels):
+        leading = decodeLeadingPixels(Image.open(inputImagePath), rows * width).reshape(rows, width, channels)
+
+    def onBand(rowsDone):
+        checkCancelled(observer)
+        if observer is not None:
+            observer.progress("save", rowsDone * width * channels, height * width * channels, rowsDone)
+
+    # Rows holding a frame written in tiles are copied into shared memory, which the worker processes write into.
+    tiled = tileWorkerCount(-(-frameSize * 8 // bitsPerChannel)) > 1
+    with SharedArray.copyOf(leading) if tiled else nullcontext() as shared:
+        pixels = np.array(leading) if shared is None else shared.array
+        embedCarrier(pixels, frame, frameSize, True, bitsPerChannel, channelMask, observer)
+        checkCancelled(observer)
+        with phaseTimer(observer, "save", width * height * channels):
+            StegoPng.rewritePng(inputImagePath, outputImagePath, pixels, compressLevel, onBand)
+
+
+def hide(carrier, payload: bytes, name: str = "", password: str = "", vectorized: bool = True, chunked: bool = True,
+         bitsPerChannel: int = defaultBitsPerChannel, channelMask: int = None, compression: str = None,
+         kdf: str = "scrypt", version: int = containerVersion, compressLevel: int = -1, scatter: bool = False,
+         observer: StegoObserver = None):
+    """
+    Function to hide data within an in-memory image using LSB steganography. Nothing is read from or written to disk.
+
+    Parameters:
+    carrier (bytes | Image.Image | np.ndarray): Encoded image file, PIL image, or array of 8-bit or 16-bit pixels
+                                                of shape (height, width) or (height, width, channels).
+                                                RGBA carriers hide data in their alpha channel too, unless the
+                                                channel mask leaves it out. The carrier itself is not modified.
+    payload (bytes): Data to hide.
+    name (str): File name recorded with the data.
+    password (str): Password used for encryption. Empty for no encryption.
+    vectorized, chunked, bitsPerChannel, channelMask, compression, kdf, version, compressLevel, scatter, observer:
+        See hideDataToImage.
+
+    Returns:
+    bytes | Image.Image | np.ndarray: The image with hidden data, of the same kind as the carrier: a PNG file with
+                                      the channels and bit depth of the carrier, a PIL image in the mode of the
+                                      carrier, or RGB for modes not in nativeChannels, or an array of the same shape
+                                      and type.
+
+    Raises:
+    PayloadTooLargeError: If the data does not fit in the carrier.
+    StegoError: If the carrier, the layout or an option cannot be used.
+    OperationCancelled: If the observer cancelled the operation.
+    """
+    checkOptions(compression, kdf, version)
+    pixels = openCarrier(carrier, observer)
+    width, height, channels = pixelGeometry(pixels)
+    checkLayout(channels, bitsPerChannel, channelMask)
+    if observer is not None:
+        observer.progress("prepare", 0, 0)
+    capacity = maxHiddenSize((width, height), channels, bitsPerChannel, channelMask, scatter)
+    frame, frameSize = framePayload(name.encode(), readChunks(io.BytesIO(payload)), memoryview(payload).nbytes,
+                                    lambda: StegoCompress.sampleData(payload), password, chunked, compression, kdf,
+                                    version, observer, capacity)
+    checkCancelled(observer)
+    checkCapacity(frameSize, capacity)
+
+    scatterKey = None
+    if scatter:
+        with phaseTimer(observer, "kdf"):
+            scatterKey = newScatterKey(password, kdf)
+    embedCarrier(pixels, frame, frameSize, vectorized, bitsPerChannel, channelMask, observer, scatterKey)
+    checkCancelled(observer)
+    if not isinstance(carrier, (bytes, bytearray, memoryview)):
+        return pixels
+
+    if observer is not None:
+        observer.progress("save", 0, 0)
+    output = io.BytesIO()
+    with phaseTimer(observer, "save", width * height * channels):
+        saveCarrier(pixels, output, compressLevel, "PNG", carrier)
+    return output.getvalue()
+
+
+def extract(image, password: str = "", observer: StegoObserver = None) -> tuple:
+    """
+    Function to extract hidden data from an in-memory image. Nothing is read from or written to disk.
+    Only the leading rows of encoded images are decoded.
+
+    Parameters:
+    image (bytes | Image.Image | np.ndarray): Encoded image file, PIL image or array of pixels (see hide).
+    password (str): Password used for decryption if the hidden data is encrypted.
+    observer (StegoObserver): Receives the progress and measurements of every phase and can cancel the operation.
+
+    Returns:
+    tuple: Name of the hidden file (str) and its data (bytes).
+
+    Raises:
+    NoHiddenDataError: If the image has no hidden file.
+    InvalidPasswordError: If the password is invalid or the data cannot be decrypted.
+    StegoError: If the image is not valid or holds one shard of a file hidden in several images.
+    OperationCancelled: If the observer cancelled the operation.
+    """
+    if observer is not None:
+        observer.progress("decode", 0, 0)
+    try:
+        header, data = readPixelFrame(imagePixelReader(image), observer, password)
+    except (OSError, SyntaxError):
+        raise StegoError("Image is not valid.") from None
+    checkCancelled(observer)
+    checkHiddenFrame(header)
+
+    encodeName, blocks = decodeFrame(data, header, password, observer)
+    total = header["dataSize"] if header["codec"] == "none" and header["encryption"] != "fernet" else 0
+    return encodeName.decode(), b"".join(observeBlocks(blocks, observer, "extract", total))
+
+
+def extractRange(image, offset: int, length: int, password: str = "", observer: StegoObserver = None) -> bytes:
+    """
+    Function to extract a range of the data hidden in an in-memory image. Nothing is read from or written to disk.
+    For data hidden in indexed chunks, only the chunks overlapping the range are checked and decrypted, and only the
+    leading rows up to the last of them are decoded.
+
+    Parameters:
+    image (bytes | Image.Image | np.ndarray): Encoded image file, PIL image or array of pixels (see hide).
+    offset (int): Offset of the range in the hidden file.
+    length (int): Length of the range. The range ends early at the end of the file.
+    password (str): Password used for decryption if the hidden data is encrypted.
+    observer (StegoObserver): Receives the measurements of every phase (see readPixelRange).
+
+    Returns:
+    bytes: The data in the range.
+
+    Raises:
+    NoHiddenDataError: If the image has no hidden file.
+    InvalidPasswordError: If the password is invalid or the data cannot be decrypted.
+    CorruptedDataError: If a checksum of unencrypted data does not match.
+    StegoError: If the image is not valid, the range is negative or the image holds one shard of a file hidden
+                in several images.
+    """
+    try:
+        return readPixelRange(imagePixelReader(image), offset, length, password, observer)
+    except (OSError, SyntaxError):
+        raise StegoError("Image is not valid.") from None
+
+
+def imagePixelReader(image):
+    """
+    Function to return a reader of the leading pixels of an in-memory image (see readPixelFrame).
+
+    Parameters:
+    image (bytes | Image.Image | np.ndarray): Encoded image file, PIL image or array of pixels (see hide).
+                                              Only the leading rows of encoded images are decoded.
+
+    Returns:
+    callable: Function returning the given number of leading pixels, or every pixel for None.
+    """
+    if isinstance(image, np.ndarray):
+        pixels = arrayPixels(image)
+        pixels = pixels.reshape(-1, pixels.shape[2])
+        return lambda pixelCount: pixels[:pixelCount]
+    elif isinstance(image, (bytes, bytearray, memoryview)):
+        return lambda pixelCount: decodeLeadingPixels(Image.open(io.BytesIO(image)), pixelCount)
+    image = image if image.mode in nativeChannels else image.convert('RGB')
+    pixels = np.asarray(image).reshape(-1, nativeChannels[image.mode])
+    return lambda pixelCount: pixels[:pixelCount]
+
+
+def hideDataToImage(inputImagePath, fileToHidePath, outputImagePath, password: str,
+                    vectorized: bool = True, chunked: bool = True, bitsPerChannel: int = defaultBitsPerChannel,
+                    channelMask: int = None, compression: str = None, kdf: str = "scrypt",
+                    version: int = containerVersion, compressLevel: int = -1, streaming: bool = True,
+                    scatter: bool = False, observer: StegoObserver = None) -> None:
+    """
+    Function to hide data within an image using LSB steganography.
+    The file is read, and the carrier is modified, like with hide, but the payload is streamed from disk and
+    raw carriers are modified through a memory map. PNG carriers saved as PNG are streamed, so only
+    the rows holding the file are decoded (see embedPngStream).
+    The carrier, the file and the output can also be pipes: an encoded image read in memory, a stream read
+    up to the capacity of the carrier (see frameStream), and a stream receiving the output as a PNG file.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    fileToHidePath (str | file): Path to the file to be hidden within the image, or a stream opened in binary
+                                 mode, hidden without a name.
+    outputImagePath (str | file): Path to save the output image with hidden data, or a binary file object.
+    password (str): Password used for encryption.
+    vectorized (bool): Use the NumPy engine. Set to False to fall back to the pure-Python pixel loop.
+                       Both engines produce identical images. Raw carriers always use the NumPy engine.
+    chunked (bool): Encrypt with the chunked AES-GCM stream format. Set to False to use the legacy
+                    whole-payload Fernet format.
+    bitsPerChannel (int): Number of LSBs used in each selected channel, from 1 to 4.
+    channelMask (int): Bit 0 selects R (or gray), bit 1 G, bit 2 B and bit 3 alpha. None selects every channel.
+                       Any other layout than 2 bits in every channel is recorded in a layout header
+                       and always uses the NumPy engine.
+    compression (str): Codec name ("zlib", "bz2" or "lzma") used to compress the file before it is encrypted,
+                       "auto" to pick one from a sample of the file, or None for no compression.
+    kdf (str): Key derivation: "scrypt" or "pbkdf2" with a random salt recorded in the header,
+               or "md5" for the legacy unsalted key.
+    version (int): 2 to hide the file in a v2 container, 1 for the original frame formats.
+    compressLevel (int): zlib compression level of PNG outputs, from 0 (fastest) to 9 (smallest),
+                         or -1 for the zlib default.
+    streaming (bool): Stream PNG carriers with the NumPy engine. Set to False to decode and encode
+                      them whole.
+    scatter (bool): Spread the file over every pixel of the image, in an order keyed by the password and a random
+                    salt recorded in a scattered layout header, instead of writing it from the first pixel.
+                    The whole image is decoded and encoded again.
+    observer (StegoObserver): Receives the progress and measurements of every phase and can cancel the operation
+                              between chunks, in which case OperationCancelled is raised and no output image is
+                              left behind.
+
+    Returns:
+    None
+
+    Raises:
+    PayloadTooLargeError: If the file does not fit in the image.
+    StegoError: If the layout cannot be used with the image, the output image cannot be saved in the format of its
+                path (see embedFrameToImage), or an option is unknown.
+    OperationCancelled: If the observer cancelled the operation.
+    """
+    checkOptions(compression, kdf, version)
+    _, _, channels = carrierGeometry(inputImagePath)
+    checkLayout(channels, bitsPerChannel, channelMask)
+    if observer is not None:
+        observer.progress("prepare", 0, 0)
+    if isPath(fileToHidePath):
+        frame, frameSize = frameFile(fileToHidePath, password, chunked, compression, kdf, version, observer,
+                                     payloadLimit(inputImagePath, bitsPerChannel, channelMask, scatter))
+    else:
+        limit = payloadLimit(inputImagePath, bitsPerChannel, channelMask, scatter, compression)
+        frame, frameSize = frameStream(fileToHidePath, limit, password, "", chunked, compression, kdf, version,
+                                       observer)
+    checkCancelled(observer)
+    embedFrameToImage(inputImagePath, frame, frameSize, outputImagePath, password, vectorized, bitsPerChannel,
+                      channelMask, kdf, compressLevel, streaming, scatter, observer)
+
+
+def embedFrameToImage(inputImagePath, frame, frameSize: int, outputImagePath, password: str,
+                      vectorized: bool = True, bitsPerChannel: int = defaultBitsPerChannel, channelMask: int = None,
+                      kdf: str = "scrypt", compressLevel: int = -1, streaming: bool = True, scatter: bool = False,
+                      observer: StegoObserver = None) -> None:
+    """
+    Function to hide a frame in an image file and save the output image, through a memory map for raw carriers,
+    streaming PNG carriers, across the frames of multi-page TIFF and APNG carriers (see embedFrameToFrames),
+    or decoding and encoding the image whole otherwise. Images saved to a file object are PNG files, or APNG files
+    for multi-frame carriers.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    frame (iterable): Blocks of the frame, in order.
+    frameSize (int): Size of the frame in bytes.
+    outputImagePath (str | file): Path to save the output image with hidden data, or a binary file object.
+    password (str): Password keying the order of scattered layouts.
+    vectorized, bitsPerChannel, channelMask, kdf, compressLevel, streaming, scatter, observer: See hideDataToImage.
+
+    Returns:
+    None
+
+    Raises:
+    PayloadTooLargeError: If the frame does not fit in the image.
+    StegoError: If a multi-frame image is scattered or saved in another format than TIFF or PNG, a raw image
+                is saved to a file object or under another extension, or the output is a GIF or JPEG file.
+    OperationCancelled: If the observer cancelled the operation.
+    """
+    checkOutputFormat(outputImagePath)
+    if isMultiFrame(inputImagePath):
+        if scatter:
+            raise StegoError("Scattering is not supported with multi-frame images.")
+        embedFrameToFrames(inputImagePath, frame, frameSize, outputImagePath, bitsPerChannel, channelMask,
+                           compressLevel, observer)
+        return
+
+    width, height, channels = carrierGeometry(inputImagePath)
+    checkCapacity(frameSize, maxHiddenSize((width, height), channels, bitsPerChannel, channelMask, scatter))
+
+    scatterKey = None
+    if scatter:
+        with phaseTimer(observer, "kdf"):
+            scatterKey = newScatterKey(password, kdf)
+    print("[*] Hiding file in image.")
+    layout = rawOutputLayout(inputImagePath, outputImagePath)
+    if layout:
+        rowsFor = None if scatter else \
+            lambda done: -(-hiddenPixelCount(done, channels, bitsPerChannel, channelMask) // width)
+        frame = observeBlocks(frame, observer, "embed", frameSize, rowsFor)
+        try:
+            with phaseTimer(observer, "embed", frameSize):
+                embedRawCarrier(inputImagePath, layout, frame, frameSize, outputImagePath, bitsPerChannel, channelMask,
+                                scatterKey)
+        except OperationCancelled:
+            if os.path.abspath(outputImagePath) != os.path.abspath(inputImagePath):
+                os.remove(outputImagePath)
+            raise
+        print(f"[+] Saving image to {outputImagePath}.")
+        return
+    elif streaming and vectorized and not scatter and isPath(inputImagePath) and StegoPng.isStreamable(inputImagePath) \
+            and (not isPath(outputImagePath) or os.path.splitext(outputImagePath)[1].lower() == ".png"):
+        print(f"[+] Saving image to {targetName(outputImagePath)}.")
+        embedPngStream(inputImagePath, frame, frameSize, outputImagePath, bitsPerChannel, channelMask,
+                       compressLevel, observer)
+        return
+
+    pixels = openCarrier(Image.open(inputImagePath) if isPath(inputImagePath) else inputImagePath, observer,
+                         copy=False)
+    embedCarrier(pixels, frame, frameSize, vectorized, bitsPerChannel, channelMask, observer, scatterKey)
+
+    checkCancelled(observer)
+    if observer is not None:
+        observer.progress("save", 0, 0)
+    print(f"[+] Saving image to {targetName(outputImagePath)}.")
+    with phaseTimer(observer, "save", width * height * channels):
+        saveCarrier(pixels, outputImagePath, compressLevel, None if isPath(outputImagePath) else "PNG",
+                    inputImagePath)
+
+
+def isMultiFrame(inputImagePath) -> bool:
+    """
+    Function to check whether the frames of an image are all used as carriers, reading only its header.
+    Only the first frame of encoded image files held in memory is used.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+
+    Returns:
+    bool: True for multi-page TIFF and APNG files (see StegoFrames.frameCount).
+    """
+    return isPath(inputImagePath) and not StegoRaw.rawLayout(inputImagePath) and \
+        StegoFrames.frameCount(inputImagePath) > 1
+
+
+def embedFrameToFrames(inputImagePath: str, frame, frameSize: int, outputImagePath,
+                       bitsPerChannel: int = defaultBitsPerChannel, channelMask: int = None, compressLevel: int = -1,
+                       observer: StegoObserver = None, workers: int = None) -> None:
+    """
+    Function to hide a frame across the frames of a multi-page TIFF or APNG image and save every frame.
+    The frame is split into shards filling the frames in order, each one with a shard header holding its index
+    and the number of shards, so only the leading frames hold data and the following ones are left unchanged.
+    TIFF pages are decoded and embedded on parallel threads (see StegoFrames.mapFrames).
+
+    Parameters:
+    inputImagePath (str): Path to the input image file.
+    frame (iterable): Blocks of the frame, in order.
+    frameSize (int): Size of the frame in bytes.
+    outputImagePath (str | file): Path to save the output image, as a TIFF or PNG file, or a binary file object
+                                  receiving an APNG file.
+    bitsPerChannel (int): Number of LSBs used in each selected channel of every frame, from 1 to 4.
+    channelMask (int): Bit i selects channel i. None selects every channel.
+    compressLevel (int): zlib compression level of APNG outputs (see hideDataToImage).
+    observer (StegoObserver): Receives the measurements of the "embed" and "save" phases and can cancel
+                              the operation between frames.
+    workers (int): Number of threads decoding TIFF pages. Defaults to the number of CPU cores.
+
+    Returns:
+    None
+
+    Raises:
+    PayloadTooLargeError: If the frame does not fit in the frames of the image.
+    OperationCancelled: If the observer cancelled the operation.
+    """
+    capacities = list()
+    for width, height, mode in StegoFrames.frameGeometry(inputImagePath)[:0xffff]:
+        capacity = maxHiddenSize((width, height), nativeChannels[mode], bitsPerChannel, channelMask) - shardHeaderSize
+        if capacity <= 0:
+            break
+        capacities.append(capacity)
+    if frameSize > sum(capacities):
+        raise PayloadTooLargeError("Maximum hidden file size for this image: {} bytes. To hide this file, choose an "
+                                   "image with more frames or a higher resolution.".format(sum(capacities)),
+                                   sum(capacities))
+
+    shardSizes, remaining = list(), frameSize
+    while remaining:
+        shardSizes.append(min(capacities[len(shardSizes)], remaining))
+        remaining -= shardSizes[-1]
+    # TIFF pages are embedded on parallel threads in any order, so every shard is sliced off the frame upfront.
+    shards = list(packShards(frame, shardSizes))
+
+    def embedShard(index: int, image: Image.Image) -> tuple:
+        checkCancelled(observer)
+        mode = StegoFrames.frameMode(image)
+        pixels = np.array(image.convert(mode))
+        if index < len(shards):
+            shard, shards[index] = shards[index], None
+            embedFrameInArray(arrayPixels(pixels), [shard], len(shard), bitsPerChannel, channelMask, workers=1)
+        return Image.fromarray(pixels, mode), image.info.get("duration")
+
+    with Image.open(inputImagePath) as image:
+        count, info = image.n_frames, dict(image.info)
+    print("[*] Hiding file in {} of {} frames of image.".format(len(shards), count))
+    with phaseTimer(observer, "embed", frameSize):
+        frames, durations = zip(*StegoFrames.mapFrames(embedShard, inputImagePath, count, workers=workers))
+
+    checkCancelled(observer)
+    if observer is not None:
+        observer.progress("save", 0, 0)
+    print(f"[+] Saving image to {targetName(outputImagePath)}.")
+    with phaseTimer(observer, "save", sum(image.size[0] * image.size[1] * len(image.getbands()) for image in frames)):
+        try:
+            StegoFrames.saveFrames(list(frames), outputImagePath, list(durations), info.get("loop", 0),
+                                   info.get("compression"), compressLevel, None if isPath(outputImagePath) else "PNG")
+        except ValueError as error:
+            raise StegoError(str(error)) from None
+
+
+def packShards(frame, shardSizes: list):
+    """
+    Function to split a frame into shards of the given sizes, each one with a shard header.
+    The frame is consumed one shard at a time, as the shards are.
+
+    Parameters:
+    frame (iterable): Blocks of the frame, in order.
+    shardSizes (list): Number of frame bytes in every shard, in order. Their sum is the frame size.
+
+    Returns:
+    iterator: The shards, in index order.
+    """
+    payloadId = os.urandom(8)
+    for index, shardSize in enumerate(shardSizes):
+        data, frame = splitBlocks(frame, shardSize)
+        yield (magicBytes["shard"]).to_bytes(4, byteorder='big') + payloadId + index.to_bytes(2, byteorder='big') + \
+            len(shardSizes).to_bytes(2, byteorder='big') + shardSize.to_bytes(8, byteorder='big') + data
+
+
+def joinShards(shards: dict) -> tuple:
+    """
+    Function to join shards in index order into the frame they were split from.
+
+    Parameters:
+    shards (dict): Parsed header (see probePixels) and bytes of every shard, by shard index.
+
+    Returns:
+    tuple: Parsed header (see parseHeader) and bytes of the frame.
+
+    Raises:
+    NoHiddenDataError: If shards are missing, belong to different hidden files or don't hold a valid frame.
+    """
+    headers = [header for header, _ in shards.values()]
+    if len({(header["payloadId"], header["count"]) for header in headers}) != 1 or \
+            sorted(shards) != list(range(headers[0]["count"])):
+        raise NoHiddenDataError("Shards are missing or belong to different hidden files.")
+
+    frame = b"".join(shards[index][1][shardHeaderSize:] for index in sorted(shards))
+    header = parseHeader(frame[:maxHeaderSize])
+    if header is None or header["mode"] in ("shard", "layout") or header["frameSize"] > len(frame):
+        raise NoHiddenDataError("Shards don't hold a valid hidden file.")
+    return header, frame
+
+
+def hideDataToImages(inputImagePaths: list, fileToHidePath: str, outputImagePaths: list, password: str,
+                     chunked: bool = True, workers: int = None, bitsPerChannel: int = defaultBitsPerChannel,
+                     channelMask: int = None, compression: str = None, kdf: str = "scrypt",
+                     version: int = containerVersion, compressLevel: int = -1, observer: StegoObserver = None) -> None:
+    """
+    Function to hide data across an ordered set of images, one shard per image, embedded in parallel worker processes.
+    The frame is split in proportion to the capacity of each image, and read one shard at a time as the workers
+    take them.
+
+    Parameters:
+    inputImagePaths (list): Paths to the input image files.
+    fileToHidePath (str): Path to the file to be hidden within the images.
+    outputImagePaths (list): Paths to save the output images, in the same order as the input images.
+    password (str): Password used for encryption.
+    chunked (bool): Encrypt with the chunked AES-GCM stream format instead of the legacy Fernet format.
+    workers (int): Number of worker processes. Defaults to the number of CPU cores.
+    bitsPerChannel (int): Number of LSBs used in each selected channel of every image, from 1 to 4.
+    channelMask (int): Bit 0 selects R (or gray), bit 1 G, bit 2 B and bit 3 alpha. None selects every channel.
+    compression (str): Codec name ("zlib", "bz2" or "lzma"), "auto" or None (see hideDataToImage).
+    kdf (str): Key derivation: "scrypt", "pbkdf2" or "md5" (see hideDataToImage).
+    version (int): 2 for a v2 container, 1 for the original frame formats.
+    compressLevel (int): zlib compression level of PNG outputs (see hideDataToImage).
+    observer (StegoObserver): Receives the measurements of the phases run in this process. The worker processes
+                              are measured as a whole, in the "embed" phase.
+
+    Returns:
+    None
+
+    Raises:
+    PayloadTooLargeError: If the file does not fit in the images.
+    StegoError: If the layout cannot be used with one of the images, a raw image is saved under another extension,
+                an output is a GIF or JPEG file or an option is unknown.
+    """
+    checkOptions(compression, kdf, version)
+    for inputImagePath, outputImagePath in zip(inputImagePaths, outputImagePaths):
+        checkLayout(carrierGeometry(inputImagePath)[2], bitsPerChannel, channelMask)
+        checkOutputFormat(outputImagePath)
+        rawOutputLayout(inputImagePath, outputImagePath)
+    capacities = [carrierCapacity(inputImagePath, bitsPerChannel, channelMask) - shardHeaderSize
+                  for inputImagePath in inputImagePaths]
+    frame, frameSize = frameFile(fileToHidePath, password, chunked, compression, kdf, version, observer,
+                                 max(0, sum(capacities)))
+
+    if len(inputImagePaths) > 0xffff or min(capacities) < 0 or frameSize > sum(capacities):
+        capacity = max(0, sum(capacities))
+        raise PayloadTooLargeError("Maximum hidden file size for these images: {} bytes. To hide this file, add more "
+                                   "images or choose images with a higher resolution.".format(capacity), capacity)
+
+    shardSizes = [frameSize * capacity // sum(capacities) for capacity in capacities]
+    for index in range(len(shardSizes)):
+        if sum(shardSizes) < frameSize and shardSizes[index] < capacities[index]:
+            shardSizes[index] += 1
+
+    print("[*] Hiding file in {} images.".format(len(shardSizes)))
+    jobs = zip(inputImagePaths, packShards(frame, shardSizes), outputImagePaths, repeat(bitsPerChannel),
+               repeat(channelMask), repeat(compressLevel))
+    with phaseTimer(observer, "embed", frameSize):
+        for outputImagePath in mapOrdered(embedFrame, jobs, workers, processes=True):
+            print(f"[+] Saving image to {outputImagePath}.")
+
+
+def extractDataFromImage(inputImagePath, password: str, observer: StegoObserver = None, output=None) -> None:
+    """
+    Function to extract hidden data from an image using LSB steganography, and save it, by default to the current
+    working directory. Only the header pixels are decoded to detect a hidden file, and only the rows holding it
+    are decoded to extract it. Every file of an archive is extracted.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    password (str): Password used for decryption if the hidden data is encrypted.
+    observer (StegoObserver): Receives the progress and measurements of every phase and can cancel the operation
+                              between chunks, in which case OperationCancelled is raised and no extracted file
+                              is left behind.
+    output (str | file): Path, directory or binary file object the hidden file is saved to (see saveHiddenFile),
+                         or the files of an archive (see saveArchiveMembers). None for the current working directory.
+
+    Returns:
+    None
+
+    Raises:
+    NoHiddenDataError: If the image has no hidden file.
+    InvalidPasswordError: If the password is invalid or the data cannot be decrypted.
+    StegoError: If the image holds one shard of a file hidden in several images.
+    OperationCancelled: If the observer cancelled the operation.
+    """
+    if observer is not None:
+        observer.progress("decode", 0, 0)
+    header, data = readImageFrame(inputImagePath, observer, password)
+    checkCancelled(observer)
+    if header is not None and header["mode"] == "archive":
+        print("[+] Archive of {} files found in image.".format(header["memberCount"]))
+        saveArchiveMembers(header, lambda ranges: [data[start:end] for start, end in ranges], password,
+                           observer=observer, output=output)
+        return
+    checkHiddenFrame(header)
+
+    if header["encrypted"]:
+        print("[*] Hidden file is encrypted.")
+    else:
+        print("[+] Hidden file found in image.")
 
     print("[*] Extracting hidden file from image.")
-    hiddenPathSize = int.from_bytes(deserializeData(data)[4:7], byteorder='big') * 4
-    hiddenDataSize = int.from_bytes(deserializeData(data)[7:15], byteorder='big') * 4
-    data = list()
-    
-    for imageY in range(image.size[1]):
-        for imageX in range(image.size[0]):
-            if len(data) >= hiddenPathSize + hiddenDataSize + 60:
-                break
-            pixel = pixels[imageX, imageY]
-            data.append(pixel[0] & 0b11)
-            data.append(pixel[1] & 0b11)
-            data.append(pixel[2] & 0b11)
-
-    encodeName = deserializeData(data[60 : (60 + hiddenPathSize)])
-    data = deserializeData(data[(60 + hiddenPathSize) :])
-    if encrypted:
-        encodeName = decryptData(encodeName, password)
-        data = decryptData(data, password)
-    outputFilePath = os.path.join(os.getcwd(), encodeName.decode())
-
-    print("[+] Saving hidden file to {}.".format(outputFilePath))
-    print("[*] Size of hidden file recovered: {} bytes.".format(len(data)))
-
-    f = open(outputFilePath, 'wb')
-    f.write(data)
-    f.close()
+    encodeName, blocks = decodeFrame(data, header, password, observer)
+    total = header["dataSize"] if header["codec"] == "none" and header["encryption"] != "fernet" else 0
+    with phaseTimer(observer, "write"):
+        saveHiddenFile(encodeName, observeBlocks(blocks, observer, "extract", total), output)
+
+
+def extractRangeFromImage(inputImagePath: str, offset: int, length: int, password: str,
+                          observer: StegoObserver = None) -> bytes:
+    """
+    Function to extract a range of the data hidden in an image file, without saving it. For data hidden in indexed
+    chunks, only the chunks overlapping the range are checked and decrypted, and only the leading rows up to the last
+    of them are decoded. Memory-mapped raw images only touch the pages holding them.
+
+    Parameters:
+    inputImagePath (str): Path to the input image file.
+    offset, length, password, observer: See extractRange.
+
+    Returns:
+    bytes: The data in the range.
+
+    Raises:
+    NoHiddenDataError: If the image has no hidden file.
+    InvalidPasswordError: If the password is invalid or the file name cannot be decrypted.
+    CorruptedDataError: If a chunk cannot be decrypted once the file name was, or a checksum does not match.
+    StegoError: If the range is negative or the image holds one shard of a file hidden in several images.
+    """
+    header, read = openImageFrame(inputImagePath, password, observer)
+    return readFrameRange(header, read, offset, length, password, observer)
+
+
+def hideFilesToImage(inputImagePath, filePaths: list, outputImagePath, password: str,
+                     vectorized: bool = True, bitsPerChannel: int = defaultBitsPerChannel, channelMask: int = None,
+                     compression: str = None, kdf: str = "scrypt", compressLevel: int = -1, streaming: bool = True,
+                     scatter: bool = False, observer: StegoObserver = None) -> None:
+    """
+    Function to hide several files within an image as an archive, with a table of contents after the header.
+    Files can then be listed, extracted by name and added without touching the other files.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    filePaths (list): Paths to the files to be hidden within the image. Their base names should be distinct.
+    outputImagePath (str | file): Path to save the output image with hidden data, or a binary file object.
+    password (str): Password used for encryption. Empty for no encryption.
+    compression (str): Codec name ("zlib", "bz2" or "lzma") used to compress every file before it is encrypted,
+                       "auto" to pick one for every file from a sample of it, or None for no compression.
+    kdf (str): Key derivation: "scrypt" or "pbkdf2" with a random salt recorded in the header.
+    vectorized, bitsPerChannel, channelMask, compressLevel, streaming, scatter, observer: See hideDataToImage.
+
+    Returns:
+    None
+
+    Raises:
+    PayloadTooLargeError: If the files do not fit in the image.
+    StegoError: If the layout cannot be used with the image, an option is unknown, or names are too long or
+                not distinct.
+    OperationCancelled: If the observer cancelled the operation.
+    """
+    checkOptions(compression, kdf)
+    _, _, channels = carrierGeometry(inputImagePath)
+    checkLayout(channels, bitsPerChannel, channelMask)
+    if observer is not None:
+        observer.progress("prepare", 0, 0)
+    frame, frameSize = buildArchive(fileMembers(filePaths, observer), password, compression, kdf, observer,
+                                    limit=payloadLimit(inputImagePath, bitsPerChannel, channelMask, scatter))
+    checkCancelled(observer)
+    embedFrameToImage(inputImagePath, frame, frameSize, outputImagePath, password, vectorized, bitsPerChannel,
+                      channelMask, kdf, compressLevel, streaming, scatter, observer)
+
+
+def appendFilesToImage(inputImagePath, filePaths: list, outputImagePath, password: str,
+                       vectorized: bool = True, compression: str = None, compressLevel: int = -1,
+                       streaming: bool = True, observer: StegoObserver = None) -> None:
+    """
+    Function to add files to the archive hidden in an image. The stored members are copied as they are, without
+    being decrypted, and only the table of contents is sealed again. The archive keeps its layout and password.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the image holding the archive, or encoded image file.
+    filePaths (list): Paths to the files to add. Their base names should not be in the archive yet.
+    outputImagePath (str | file): Path to save the output image, or a binary file object. Raw images can be
+                                  modified in place.
+    password (str): Password of the archive if it is encrypted.
+    vectorized, compression, compressLevel, streaming, observer: See hideFilesToImage.
+
+    Returns:
+    None
+
+    Raises:
+    NoHiddenDataError: If the image has no hidden file.
+    InvalidPasswordError: If the password is invalid or the table of contents cannot be decrypted.
+    PayloadTooLargeError: If the archive no longer fits in the image.
+    StegoError: If the image holds no archive, the compression is unknown, or a name is too long or already in
+                the archive.
+    OperationCancelled: If the observer cancelled the operation.
+    """
+    checkOptions(compression)
+    if observer is not None:
+        observer.progress("prepare", 0, 0)
+    header, read = openImageFrame(inputImagePath, password, observer)
+    header, entries, key = readArchive(header, read, password, observer)
+    body = read([(header["headerSize"] + header["tocSize"], header["frameSize"])])[0]
+    print("[*] Adding {} files to the archive of {} files.".format(len(filePaths), len(entries)))
+
+    layout = header.get("layout", {"bitsPerChannel": defaultBitsPerChannel, "channelMask": None, "scattered": False})
+    kdf = header["kdf"] if key is not None else "scrypt"
+    frame, frameSize = buildArchive(fileMembers(filePaths, observer), password, compression, kdf, observer,
+                                    (header, entries, key, body),
+                                    payloadLimit(inputImagePath, layout["bitsPerChannel"], layout["channelMask"],
+                                                 layout["scattered"]))
+    checkCancelled(observer)
+    embedFrameToImage(inputImagePath, frame, frameSize, outputImagePath, password, vectorized,
+                      layout["bitsPerChannel"], layout["channelMask"], kdf, compressLevel, streaming,
+                      layout["scattered"], observer)
+
+
+def listArchive(inputImagePath, password: str = "", observer: StegoObserver = None) -> list:
+    """
+    Function to list the files of the archive hidden in an image, decoding only the pixels up to the end of its
+    table of contents.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    password (str): Password of the archive if it is encrypted.
+    observer (StegoObserver): Receives the measurements of every phase.
+
+    Returns:
+    list: One dict per file, in the order they were added: "name", "size", "storedSize" and "codec".
+
+    Raises:
+    NoHiddenDataError: If the image has no hidden file.
+    InvalidPasswordError: If the password is invalid or the table of contents cannot be decrypted.
+    CorruptedDataError: If the checksum of an unencrypted table of contents does not match.
+    StegoError: If the image holds no archive.
+    """
+    header, read = openImageFrame(inputImagePath, password, observer)
+    _, entries, _ = readArchive(header, read, password, observer)
+    return [{"name": entry["name"].decode(), "size": entry["fileSize"], "storedSize": entry["storedSize"],
+             "codec": entry["codec"]} for entry in entries]
+
+
+def extractFilesFromImage(inputImagePath, password: str, names: list = None,
+                          observer: StegoObserver = None, output=None) -> None:
+    """
+    Function to extract files from the archive hidden in an image, and save them, by default to the current working
+    directory.
+    Only the pixels up to the end of the last selected file are decoded, and only the pixels holding the table
+    of contents and the selected files are unpacked.
+
+    Parameters:
+    inputImagePath (str | bytes): Path to the input image file, or encoded image file.
+    password (str): Password of the archive if it is encrypted.
+    names (list): Names of the files to extract, or None for every file.
+    observer (StegoObserver): Receives the measurements of every phase.
+    output (str | file): Directory, path or binary file object the files are saved to (see saveArchiveMembers).
+
+    Returns:
+    None
+
+    Raises:
+    NoHiddenDataError: If the image has no hidden file, or the archive has no file with one of the names.
+    InvalidPasswordError: If the password is invalid or the data cannot be decrypted.
+    CorruptedDataError: If a checksum of unencrypted data does not match.
+    StegoError: If the image holds no archive, or several files are written to a file object.
+    """
+    header, read = openImageFrame(inputImagePath, password, observer)
+    saveArchiveMembers(header, read, password, names, observer, output)
+
+
+def extractDataFromImages(inputImagePaths: list, password: str, workers: int = None,
+                          observer: StegoObserver = None, output=None) -> None:
+    """
+    Function to extract data sharded across several images. Shards are read in parallel worker processes
+    and reassembled in index order, whatever the order of the input images.
+
+    Parameters:
+    inputImagePaths (list): Paths to the input image files, in any order.
+    password (str): Password used for decryption if the hidden data is encrypted.
+    workers (int): Number of worker processes. Defaults to the number of CPU cores.
+    observer (StegoObserver): Receives the measurements of the phases run in this process. The worker processes
+                              are measured as a whole, in the "decode" phase.
+    output (str | file): Path, directory or binary file object the hidden file is saved to (see saveHiddenFile).
+
+    Returns:
+    None
+
+    Raises:
+    NoHiddenDataError: If an image has no hidden shard, or the shards don't hold a complete hidden file.
+    InvalidPasswordError: If the password is invalid or the data cannot be decrypted.
+    """
+    shards = dict()
+    with phaseTimer(observer, "decode") as record, ProcessPoolExecutor(workers) as executor:
+        for inputImagePath, (header, data) in zip(inputImagePaths, executor.map(readFrame, inputImagePaths)):
+            if header is None or header["mode"] != "shard":
+                raise NoHiddenDataError("Image {} don't have any hidden shard.".format(inputImagePath))
+            shards[header["index"]] = (header, data)
+            record["bytes"] = record.get("bytes", 0) + len(data)
+
+    header, frame = joinShards(shards)
+    if header["mode"] == "archive":
+        raise NoHiddenDataError("Shards don't hold a valid hidden file.")
+    elif header["encrypted"]:
+        print("[*] Hidden file is encrypted.")
+    else:
+        print("[+] Hidden file found in {} images.".format(len(shards)))
+
+    print("[*] Extracting hidden file from images.")
+    encodeName, blocks = decodeFrame(frame, header, password, observer)
+    with phaseTimer(observer, "write"):
+        saveHiddenFile(encodeName, blocks, output)
@@ -0,0 +1,435 @@
+from getopt import getopt, GetoptError
+from sys import exit, argv
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import multiprocessing, platform, datetime, hashlib, json, math, io, os
+import numpy as np
+from PIL import Image
+from StegoAlgorithm import StegoProfiler, StegoError, hideDataToImage, extractDataFromImage, carrierCapacity
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Baseline file format version, bumped when the fields of a case change incompatibly.
+baselineVersion = 1
+# Carrier sizes in megapixels, with a 4:3 aspect ratio, and payload sizes: byte counts with an optional
+# k or m suffix, or fractions of the carrier capacity.
+defaultCarriers = (0.3, 1, 4, 12, 25, 100)
+defaultPayloads = ("1k", "0.1", "0.5", "0.95")
+defaultModes = ("plain", "encrypted")
+# Engines: the NumPy engine on PNG carriers, streamed through StegoPng, the NumPy engine with whole-image Pillow
+# decoding and encoding, the original per-pixel engine on PNG carriers (too slow for large carriers, so it only runs
+# up to pythonEngineLimit megapixels) and the memory-mapped engine on PPM carriers.
+engines = {"vectorized": ".png", "pillow": ".png", "python": ".png", "raw": ".ppm"}
+# Engines whose extraction is measured. Extraction has no per-pixel engine: the outputs of the python engine are
+# extracted like those of the vectorized one, so they are only extracted once, to check them.
+extractEngines = ("vectorized", "pillow", "raw")
+pythonEngineLimit = 1
+benchmarkPassword = "benchmark"
+# Metrics compared against the baseline. Higher values are regressions for all of them.
+comparedMetrics = ("hideSeconds", "extractSeconds", "hidePeakRss", "extractPeakRss")
+defaultThreshold = 10.0
+
+
+def usage():
+    """
+    Display usage instructions for the benchmark.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    print("Usage: python StegoBenchmark.py run [-o <baseline>] [-d <work_dir>] [-s <carriers>] [-l <payloads>]")
+    print("                                    [-g <engines>] [-m <modes>] [-r <repeats>]")
+    print("       python StegoBenchmark.py compare [-t <percent>] <baseline> <current>")
+    print("Options:")
+    print("  -o <baseline>       Path to the JSON results file. Defaults to benchmark.json.")
+    print("  -d <work_dir>       Directory for the generated carriers and payloads. Defaults to benchmark_data.")
+    print("  -s <carriers>       Comma-separated carrier sizes in megapixels. Defaults to 0.3,1,4,12,25,100.")
+    print("  -l <payloads>       Comma-separated payload sizes, in bytes with an optional k or m suffix, or as")
+    print("                      fractions of the carrier capacity. Defaults to 1k,0.1,0.5,0.95.")
+    print("  -g <engines>        Comma-separated engines: vectorized, pillow, python and raw. Defaults to all")
+    print("                      of them. Extraction is not measured for python, which only hides.")
+    print("  -m <modes>          Comma-separated modes: plain and encrypted. Defaults to both.")
+    print("  -r <repeats>        Number of runs of every case, the fastest of which is kept. Defaults to 3.")
+    print("  -t <percent>        Slowdown or memory growth, in percent, reported as a regression. Defaults to 10.")
+    print("  --help              Display usage instructions for the benchmark.")
+    exit()
+
+
+def syntheticGeometry(megapixels: float) -> tuple:
+    """
+    Function to return the dimensions of a 4:3 carrier with the given number of pixels.
+
+    Parameters:
+    megapixels (float): Number of pixels, in millions.
+
+    Returns:
+    tuple: Width and height in pixels.
+    """
+    width = round(math.sqrt(megapixels * 1e6 * 4 / 3))
+    return width, max(1, round(megapixels * 1e6 / width))
+
+
+def generateCarrier(megapixels: float, extension: str, workDirectory: str) -> str:
+    """
+    Function to generate a synthetic carrier, or reuse it if it was generated before. The pixels are smooth
+    gradients with seeded noise, so the carrier compresses like a photograph and is identical on every run.
+
+    Parameters:
+    megapixels (float): Number of pixels, in millions.
+    extension (str): File extension, which selects the image format.
+    workDirectory (str): Directory of the generated files.
+
+    Returns:
+    str: Path to the carrier.
+    """
+    width, height = syntheticGeometry(megapixels)
+    carrierPath = os.path.join(workDirectory, "carrier-{}x{}{}".format(width, height, extension))
+    if os.path.isfile(carrierPath):
+        return carrierPath
+
+    random = np.random.default_rng(height * width)
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    columns = np.linspace(0, 255, width, dtype=np.float32)
+    for start in range(0, height, 256):
+        rows = np.linspace(start, start + 255, 256, dtype=np.float32)[:height - start, None] * 255 / height
+        band = np.stack([columns + rows * 0, rows + columns * 0, (columns + rows) / 2], axis=-1)
+        band += random.normal(0, 6, band.shape).astype(np.float32)
+        pixels[start:start + 256] = np.clip(band, 0, 255).astype(np.uint8)
+
+    Image.fromarray(pixels).save(carrierPath)
+    return carrierPath
+
+
+def generatePayload(size: int, workDirectory: str) -> str:
+    """
+    Function to generate a payload of seeded random bytes, or reuse it if it was generated before.
+    Random bytes do not compress, so the payload is hidden at its full size.
+
+    Parameters:
+    size (int): Size of the payload in bytes.
+    workDirectory (str): Directory of the generated files.
+
+    Returns:
+    str: Path to the payload.
+    """
+    payloadPath = os.path.join(workDirectory, "payload-{}.bin".format(size))
+    if not os.path.isfile(payloadPath) or os.path.getsize(payloadPath) != size:
+        random = np.random.default_rng(size)
+        with open(payloadPath, "wb") as payloadFile:
+            for start in range(0, size, 1 << 24):
+                payloadFile.write(random.bytes(min(1 << 24, size - start)))
+    return payloadPath
+
+
+def parsePayloadSize(spec: str, capacity: int) -> int:
+    """
+    Function to convert a payload size specification to a number of bytes.
+
+    Parameters:
+    spec (str): Byte count with an optional k or m suffix, or a fraction of the capacity below 1.
+    capacity (int): Number of bytes the carrier can hold.
+
+    Returns:
+    int: Payload size in bytes.
+    """
+    spec = spec.strip().lower()
+    if spec.endswith(("k", "m")):
+        return int(float(spec[:-1]) * (1024 if spec.endswith("k") else 1 << 20))
+    value = float(spec)
+    return int(capacity * value) if value < 1 else int(value)
+
+
+def peakRss() -> int:
+    """
+    Function to return the peak resident set size of the current process.
+
+    Parameters:
+    None
+
+    Returns:
+    int: Peak RSS in bytes, or None where the resource module is unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+def runTask(task: dict) -> dict:
+    """
+    Function to run one timed hide or extraction in a fresh worker process, so the peak RSS belongs
+    to that operation alone. Messages printed by the algorithm are captured.
+
+    Parameters:
+    task (dict): Keys "operation" ("hide" or "extract"), "engine", "carrier", "payload", "output",
+                 "password" and "extractDirectory", where the extracted file is written.
+
+    Returns:
+    dict: Keys "seconds", "peakRss" and "phases" (seconds per phase, excluding nested phases), or "error".
+    """
+    log = io.StringIO()
+    try:
+        with redirect_stdout(log), StegoProfiler(traceMemory=False) as profiler:
+            if task["operation"] == "hide":
+                hideDataToImage(task["carrier"], task["payload"], task["output"], task["password"],
+                                vectorized=task["engine"] != "python", streaming=task["engine"] == "vectorized",
+                                observer=profiler)
+            else:
+                extractDataFromImage(task["output"], task["password"], observer=profiler,
+                                     output=task["extractDirectory"])
+    except StegoError as err:
+        return {"error": str(err)}
+
+    phases = dict()
+    for record in profiler.phases:
+        phases[record["phase"]] = round(phases.get(record["phase"], 0) + record["selfSeconds"], 6)
+    return {"seconds": profiler.seconds, "peakRss": peakRss(), "phases": phases}
+
+
+def runIsolated(task: dict) -> dict:
+    """
+    Function to run a task in a new spawned process.
+
+    Parameters:
+    task (dict): Task (see runTask).
+
+    Returns:
+    dict: Result of the task.
+    """
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(runTask, task).result()
+
+
+def fileDigest(filePath: str) -> str:
+    """
+    Function to compute the SHA-256 digest of a file.
+
+    Parameters:
+    filePath (str): Path to the file.
+
+    Returns:
+    str: Hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(filePath, "rb") as openedFile:
+        for block in iter(lambda: openedFile.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def runCase(engine: str, mode: str, megapixels: float, payloadSpec: str, repeats: int, workDirectory: str) -> dict:
+    """
+    Function to benchmark hiding a payload in a carrier and extracting it again. Every run is made in a fresh
+    process, the fastest of the repeated runs is kept, and the extracted file is checked against the payload.
+    Extraction is only measured for the engines in extractEngines.
+
+    Parameters:
+    engine (str): Engine name (see engines).
+    mode (str): "plain" or "encrypted".
+    megapixels (float): Carrier size, in millions of pixels.
+    payloadSpec (str): Payload size specification (see parsePayloadSize).
+    repeats (int): Number of runs.
+    workDirectory (str): Directory of the generated files.
+
+    Returns:
+    dict: Case description and measurements, without the extraction ones for engines not in extractEngines,
+          or the description with an "error" field.
+    """
+    carrierPath = generateCarrier(megapixels, engines[engine], workDirectory)
+    width, height = syntheticGeometry(megapixels)
+    payloadSize = max(1, parsePayloadSize(payloadSpec, carrierCapacity(carrierPath)))
+    payloadPath = generatePayload(payloadSize, workDirectory)
+    case = {"id": "{}/{}/{}mp/{}".format(engine, mode, megapixels, payloadSpec), "engine": engine, "mode": mode,
+            "carrierMegapixels": width * height / 1e6, "width": width, "height": height, "payloadBytes": payloadSize}
+
+    outputPath = os.path.join(workDirectory, "output-{}{}".format(os.getpid(), engines[engine]))
+    extractDirectory = os.path.join(workDirectory, "extracted")
+    extractedPath = os.path.join(extractDirectory, os.path.basename(payloadPath))
+    os.makedirs(extractDirectory, exist_ok=True)
+    task = {"engine": engine, "carrier": carrierPath, "payload": payloadPath, "output": outputPath,
+            "password": benchmarkPassword if mode == "encrypted" else str(), "extractDirectory": extractDirectory}
+
+    try:
+        for operation in ("hide", "extract"):
+            timed = operation == "hide" or engine in extractEngines
+            results = [runIsolated(dict(task, operation=operation)) for _ in range(repeats if timed else 1)]
+            failed = [result for result in results if "error" in result]
+            if failed:
+                return dict(case, error="{}: {}".format(operation, failed[0]["error"]))
+            if not timed:
+                continue
+
+            fastest = min(results, key=lambda result: result["seconds"])
+            case[operation + "Seconds"] = round(fastest["seconds"], 6)
+            case[operation + "MegabytesPerSecond"] = round(payloadSize / fastest["seconds"] / 1e6, 3)
+            case[operation + "MegapixelsPerSecond"] = round(width * height / fastest["seconds"] / 1e6, 3)
+            case[operation + "PeakRss"] = max(result["peakRss"] or 0 for result in results) or None
+            case[operation + "Phases"] = fastest["phases"]
+
+        case["verified"] = fileDigest(extractedPath) == fileDigest(payloadPath)
+    finally:
+        for path in (outputPath, extractedPath):
+            if os.path.isfile(path):
+                os.remove(path)
+    return case
+
+
+def runBenchmark(outputPath: str, workDirectory: str, carriers: list, payloads: list, engineNames: list,
+                 modes: list, repeats: int) -> dict:
+    """
+    Function to run every combination of carrier, payload, engine and mode, and write the results.
+
+    Parameters:
+    outputPath (str): Path to the JSON results file.
+    workDirectory (str): Directory of the generated files.
+    carriers (list): Carrier sizes, in megapixels.
+    payloads (list): Payload size specifications (see parsePayloadSize).
+    engineNames (list): Engine names (see engines).
+    modes (list): "plain" and/or "encrypted".
+    repeats (int): Number of runs of every case.
+
+    Returns:
+    dict: The results.
+    """
+    os.makedirs(workDirectory, exist_ok=True)
+    workDirectory = os.path.abspath(workDirectory)
+    results = {"version": baselineVersion, "created": datetime.datetime.now().isoformat(timespec="seconds"),
+               "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                           "numpy": np.__version__, "cpus": os.cpu_count()},
+               "repeats": repeats, "cases": list()}
+
+    for megapixels in carriers:
+        for engine in engineNames:
+            if engine == "python" and megapixels > pythonEngineLimit:
+                continue
+            for mode in modes:
+                for payloadSpec in payloads:
+                    case = runCase(engine, mode, megapixels, payloadSpec, repeats, workDirectory)
+                    results["cases"].append(case)
+                    if "error" in case:
+                        print("[!] {}: {}".format(case["id"], case["error"]))
+                    elif "extractSeconds" in case:
+                        print("[+] {}: hide {:.3f} s ({:.1f} MB/s, {:.1f} MP/s), extract {:.3f} s ({:.1f} MB/s).".format(
+                            case["id"], case["hideSeconds"], case["hideMegabytesPerSecond"],
+                            case["hideMegapixelsPerSecond"], case["extractSeconds"], case["extractMegabytesPerSecond"]))
+                    else:
+                        print("[+] {}: hide {:.3f} s ({:.1f} MB/s, {:.1f} MP/s).".format(
+                            case["id"], case["hideSeconds"], case["hideMegabytesPerSecond"],
+                            case["hideMegapixelsPerSecond"]))
+
+    with open(outputPath, "w") as outputFile:
+        json.dump(results, outputFile, indent=2)
+    print("[*] {} cases measured. Results written to {}.".format(len(results["cases"]), outputPath))
+    return results
+
+
+def compareResults(baselinePath: str, currentPath: str, threshold: float = defaultThreshold) -> list:
+    """
+    Function to compare benchmark results with a baseline and report the cases that regressed.
+
+    Parameters:
+    baselinePath (str): Path to the baseline results file.
+    currentPath (str): Path to the current results file.
+    threshold (float): Increase of a metric, in percent, reported as a regression.
+
+    Returns:
+    list: One (case ID, metric, baseline value, current value) tuple per regression.
+    """
+    with open(baselinePath) as baselineFile:
+        baseline = {case["id"]: case for case in json.load(baselineFile)["cases"]}
+    with open(currentPath) as currentFile:
+        current = {case["id"]: case for case in json.load(currentFile)["cases"]}
+
+    regressions = list()
+    for caseId in sorted(set(baseline) & set(current)):
+        for metric in comparedMetrics:
+            before, after = baseline[caseId].get(metric), current[caseId].get(metric)
+            if not before or not after:
+                continue
+            change = (after - before) / before * 100
+            if change > threshold:
+                regressions.append((caseId, metric, before, after))
+                print("[!] {} {}: {} -> {} (+{:.1f}%).".format(caseId, metric, before, after, change))
+            elif change < -threshold:
+                print("[+] {} {}: {} -> {} ({:.1f}%).".format(caseId, metric, before, after, change))
+
+    for caseId in sorted(set(baseline) ^ set(current)):
+        print("[~] {} is only in the {} results.".format(caseId, "baseline" if caseId in baseline else "current"))
+    for caseId in sorted(caseId for caseId in current if "error" in current[caseId]):
+        print("[!] {} failed: {}".format(caseId, current[caseId]["error"]))
+        if "error" not in baseline.get(caseId, {"error": None}):
+            regressions.append((caseId, "error", None, current[caseId]["error"]))
+
+    print("[*] {} regressions above {}% in {} shared cases.".format(len(regressions), threshold,
+                                                                   len(set(baseline) & set(current))))
+    return regressions
+
+
+def main():
+    """
+    Function to handle command-line arguments and run or compare benchmarks.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    outputPath = "benchmark.json"
+    workDirectory = "benchmark_data"
+    carriers = list(defaultCarriers)
+    payloads = list(defaultPayloads)
+    engineNames = list(engines)
+    modes = list(defaultModes)
+    repeats = 3
+    threshold = defaultThreshold
+    if argv[1:2] not in (["run"], ["compare"]):
+        usage()
+
+    try:
+        options, arguments = getopt(argv[2:], "o:d:s:l:g:m:r:t:", ["help"])
+        for opt, arg in options:
+            if opt == "-o":
+                outputPath = arg
+            elif opt == "-d":
+                workDirectory = arg
+            elif opt == "-s":
+                carriers = [float(value) for value in arg.split(",")]
+            elif opt == "-l":
+                payloads = arg.split(",")
+                for value in payloads:
+                    parsePayloadSize(value, 1)
+            elif opt == "-g":
+                engineNames = arg.split(",")
+                if not set(engineNames) <= set(engines):
+                    raise ValueError("engines should be among: {}".format(", ".join(engines)))
+            elif opt == "-m":
+                modes = arg.split(",")
+                if not set(modes) <= set(defaultModes):
+                    raise ValueError("modes should be among: {}".format(", ".join(defaultModes)))
+            elif opt == "-r":
+                repeats = max(1, int(arg))
+            elif opt == "-t":
+                threshold = float(arg)
+            elif opt == "--help":
+                usage()
+    except (GetoptError, ValueError) as err:
+        print(str(err))
+        usage()
+
+    if argv[1] == "run":
+        runBenchmark(outputPath, workDirectory, carriers, payloads, engineNames, modes, repeats)
+    elif len(arguments) != 2:
+        usage()
+    elif compareResults(arguments[0], arguments[1], threshold):
+        exit(1)
+
+if __name__ == '__main__':
+    main()
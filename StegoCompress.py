@@ -0,0 +1,227 @@
+import os, time, zlib, bz2, lzma
+import numpy as np
+
+
+# Codec IDs recorded in the frame header. "auto" picks one of them from a sample of the payload.
+codecIds = {"none": 0, "zlib": 1, "bz2": 2, "lzma": 3}
+compressionModes = tuple(codecIds) + ("auto",)
+
+# Auto mode: sampleBlocks blocks of sampleBlockSize bytes, spread evenly over the payload, are measured.
+# Payloads whose sample has more entropy than entropyThreshold bits per byte are stored uncompressed,
+# as are payloads that no codec shrinks below minimumRatio of their size.
+sampleBlocks = 16
+sampleBlockSize = 4096
+entropyThreshold = 7.5
+minimumRatio = 0.95
+
+
+def codecName(codecId: int) -> str:
+    """
+    Function to return the name of a codec from its ID.
+
+    Parameters:
+    codecId (int): Codec ID recorded in the frame header.
+
+    Returns:
+    str: Codec name, or None if the ID is unknown.
+    """
+    return next((name for name, value in codecIds.items() if value == codecId), None)
+
+
+def compressor(codec: str):
+    """
+    Function to create an incremental compressor for a codec.
+
+    Parameters:
+    codec (str): Codec name.
+
+    Returns:
+    object: Compressor with compress() and flush() methods.
+    """
+    if codec == "zlib":
+        return zlib.compressobj(9)
+    elif codec == "bz2":
+        return bz2.BZ2Compressor(9)
+    return lzma.LZMACompressor()
+
+
+def decompressor(codec: str):
+    """
+    Function to create an incremental decompressor for a codec.
+
+    Parameters:
+    codec (str): Codec name.
+
+    Returns:
+    object: Decompressor with a decompress() method.
+    """
+    if codec == "zlib":
+        return zlib.decompressobj()
+    elif codec == "bz2":
+        return bz2.BZ2Decompressor()
+    return lzma.LZMADecompressor()
+
+
+def compressStream(blocks, codec: str):
+    """
+    Function to compress a stream of data blocks lazily, as the compressed stream is consumed.
+
+    Parameters:
+    blocks (iterable): Blocks of data, in order.
+    codec (str): Codec name.
+
+    Returns:
+    iterator: Blocks of compressed data, some of them empty.
+    """
+    engine = compressor(codec)
+    for block in blocks:
+        yield engine.compress(block)
+    yield engine.flush()
+
+
+def compressBlocks(blocks, codec: str) -> bytes:
+    """
+    Function to compress a stream of data blocks.
+
+    Parameters:
+    blocks (iterable): Blocks of data, in order.
+    codec (str): Codec name.
+
+    Returns:
+    bytes: Compressed data.
+    """
+    return b"".join(compressStream(blocks, codec))
+
+
+def decompressBlocks(blocks, codec: str):
+    """
+    Function to decompress a stream of compressed data blocks lazily.
+
+    Parameters:
+    blocks (iterable): Blocks of compressed data, in order.
+    codec (str): Codec name. "none" passes the blocks through.
+
+    Returns:
+    iterator: Blocks of decompressed data.
+    """
+    if codec == "none":
+        yield from blocks
+        return
+
+    engine = decompressor(codec)
+    for block in blocks:
+        yield engine.decompress(block)
+    if codec == "zlib":
+        yield engine.flush()
+
+
+def sampleFile(filePath: str) -> bytes:
+    """
+    Function to read blocks spread evenly over a file, or the whole file if it is small.
+
+    Parameters:
+    filePath (str): Path to the file.
+
+    Returns:
+    bytes: The sampled blocks, joined.
+    """
+    size = os.path.getsize(filePath)
+    with open(filePath, "rb") as openedFile:
+        if size <= sampleBlocks * sampleBlockSize:
+            return openedFile.read()
+
+        sample = list()
+        for index in range(sampleBlocks):
+            openedFile.seek((size - sampleBlockSize) * index // (sampleBlocks - 1))
+            sample.append(openedFile.read(sampleBlockSize))
+        return b"".join(sample)
+
+
+def sampleData(data: bytes) -> bytes:
+    """
+    Function to take blocks spread evenly over in-memory data, or the whole data if it is small.
+
+    Parameters:
+    data (bytes): Input data.
+
+    Returns:
+    bytes: The sampled blocks, joined.
+    """
+    size = len(data)
+    if size <= sampleBlocks * sampleBlockSize:
+        return bytes(data)
+
+    offsets = [(size - sampleBlockSize) * index // (sampleBlocks - 1) for index in range(sampleBlocks)]
+    return b"".join(bytes(data[offset:offset + sampleBlockSize]) for offset in offsets)
+
+
+def entropy(data: bytes) -> float:
+    """
+    Function to compute the Shannon entropy of data from its byte histogram.
+
+    Parameters:
+    data (bytes): Input data.
+
+    Returns:
+    float: Entropy in bits per byte, from 0 to 8.
+    """
+    if not data:
+        return 0.0
+    probabilities = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256) / len(data)
+    probabilities = probabilities[probabilities > 0]
+    return float(-(probabilities * np.log2(probabilities)).sum())
+
+
+def measureCodecs(sample: bytes) -> list:
+    """
+    Function to compress a sample with every codec and measure the size and speed of each.
+
+    Parameters:
+    sample (bytes): Sample of the payload.
+
+    Returns:
+    list: One dict per codec with keys "codec", "size" (compressed size in bytes), "ratio" and "speed" (MB/s).
+    """
+    results = list()
+    for codec in codecIds:
+        if codec == "none":
+            continue
+        start = time.perf_counter()
+        size = len(compressBlocks([sample], codec))
+        seconds = max(time.perf_counter() - start, 1e-9)
+        results.append({"codec": codec, "size": size, "ratio": size / max(1, len(sample)),
+                        "speed": len(sample) / seconds / 1e6})
+    return results
+
+
+def chooseCodec(sample: bytes) -> str:
+    """
+    Function to pick a codec for a payload from a sample of it (see sampleFile and sampleData): no compression
+    for high-entropy data such as already compressed or encrypted files, otherwise the codec with the smallest
+    sample output. The size and speed of every codec on the sample are reported.
+
+    Parameters:
+    sample (bytes): Sample of the payload.
+
+    Returns:
+    str: Codec name.
+    """
+    if not sample:
+        return "none"
+
+    sampleEntropy = entropy(sample)
+    print("[*] Payload sample entropy: {:.2f} bits per byte.".format(sampleEntropy))
+    if sampleEntropy > entropyThreshold:
+        print("[*] Payload looks already compressed, storing it uncompressed.")
+        return "none"
+
+    results = measureCodecs(sample)
+    for result in results:
+        print("[*] {}: {:.1%} of the sample size at {:.1f} MB/s.".format(result["codec"], result["ratio"], result["speed"]))
+
+    best = min(results, key=lambda result: result["size"])
+    if best["ratio"] > minimumRatio:
+        print("[*] No codec shrinks the payload, storing it uncompressed.")
+        return "none"
+    print("[*] Selected codec: {}.".format(best["codec"]))
+    return best["codec"]
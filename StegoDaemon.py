@@ -0,0 +1,271 @@
+import socket, struct, signal, json, sys, os
+
+
+# Environment variable holding the path of the daemon socket. While it is set, StegoScript sends its commands
+# to the daemon, and runs them itself when no daemon is listening.
+socketVariable = "STEGO_DAEMON"
+# Standard streams of the client, passed to the daemon as file descriptors.
+standardStreams = (0, 1, 2)
+# Connections waiting to be accepted.
+listenBacklog = 128
+maxRequestSize = 1 << 24
+
+
+def isSupported() -> bool:
+    """
+    Function to check whether the daemon can run on this platform: it needs Unix sockets able to pass
+    file descriptors and fork().
+
+    Parameters:
+    None
+
+    Returns:
+    bool: True on Unix platforms.
+    """
+    return hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds") and hasattr(os, "fork")
+
+
+def defaultSocketPath() -> str:
+    """
+    Function to return the socket path used when none is given: the STEGO_DAEMON environment variable,
+    or a socket named after the user in the temporary directory.
+
+    Parameters:
+    None
+
+    Returns:
+    str: Path of the Unix socket.
+    """
+    return os.environ.get(socketVariable) or \
+        os.path.join(os.environ.get("TMPDIR", "/tmp"), "stego-{}.sock".format(os.getuid()))
+
+
+def receiveExactly(connection: socket.socket, size: int) -> bytes:
+    """
+    Function to read a number of bytes from a socket.
+
+    Parameters:
+    connection (socket.socket): Connected socket.
+    size (int): Number of bytes to read.
+
+    Returns:
+    bytes: The bytes read, or None if the connection was closed before.
+    """
+    data = bytearray()
+    while len(data) < size:
+        block = connection.recv(size - len(data))
+        if not block:
+            return None
+        data += block
+    return bytes(data)
+
+
+def isOpen(descriptor: int) -> bool:
+    """
+    Function to check whether a file descriptor is open.
+
+    Parameters:
+    descriptor (int): File descriptor.
+
+    Returns:
+    bool: True if the descriptor is open.
+    """
+    try:
+        os.fstat(descriptor)
+        return True
+    except OSError:
+        return False
+
+
+def runRemote(socketPath: str, arguments: list) -> int:
+    """
+    Function to run a command in the daemon with the working directory, environment and standard streams of
+    the current process, and wait until it finishes. The output of the command is written straight to
+    the standard streams of the current process.
+
+    Parameters:
+    socketPath (str): Path of the daemon socket.
+    arguments (list): Command-line arguments, without the script name.
+
+    Returns:
+    int: Exit status of the command, or None if no daemon is listening on the socket.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socketPath)
+    except OSError:
+        client.close()
+        return None
+
+    with client:
+        descriptors = [descriptor for descriptor in standardStreams if isOpen(descriptor)]
+        request = json.dumps({"arguments": arguments, "cwd": os.getcwd(), "environ": dict(os.environ),
+                              "descriptors": descriptors}).encode()
+        # A daemon rejecting the connection closes it without reading the request.
+        try:
+            socket.send_fds(client, [struct.pack(">I", len(request))], descriptors)
+            client.sendall(request)
+            status = receiveExactly(client, 4)
+        except OSError:
+            status = None
+    if status is None:
+        print("[!] The daemon stopped before the command finished.", file=sys.stderr)
+        return 1
+    return struct.unpack(">i", status)[0]
+
+
+def isSameUser(connection: socket.socket) -> bool:
+    """
+    Function to check that the peer of a Unix socket connection runs as the user of the current process.
+    Platforms without peer credentials rely on the permissions of the socket file.
+
+    Parameters:
+    connection (socket.socket): Accepted connection.
+
+    Returns:
+    bool: True if the peer may run commands.
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True
+    credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", credentials)[1] == os.getuid()
+
+
+def exitStatus(code) -> int:
+    """
+    Function to convert the code of a SystemExit into an exit status, like the interpreter does.
+
+    Parameters:
+    code: Code of the SystemExit.
+
+    Returns:
+    int: Exit status.
+    """
+    if code is None:
+        return 0
+    elif isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def runCommand(connection: socket.socket, run) -> int:
+    """
+    Function to run the command sent over a connection in a child process of the daemon: the standard streams
+    of the client replace those of the process, and its working directory and environment are applied.
+    The exit status is sent back to the client.
+
+    Parameters:
+    connection (socket.socket): Accepted connection.
+    run (callable): Function running a command with its command-line arguments.
+
+    Returns:
+    int: Exit status of the command.
+    """
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    header, descriptors, _, _ = socket.recv_fds(connection, 4, len(standardStreams))
+    header += receiveExactly(connection, 4 - len(header)) or b""
+    size = struct.unpack(">I", header)[0] if len(header) == 4 else maxRequestSize + 1
+    request = receiveExactly(connection, size) if size <= maxRequestSize else None
+    if request is None:
+        return 1
+    request = json.loads(request)
+
+    for target in standardStreams:
+        if target in request["descriptors"]:
+            os.dup2(descriptors[request["descriptors"].index(target)], target)
+        else:
+            os.dup2(os.open(os.devnull, os.O_RDWR), target)
+    for descriptor in descriptors:
+        if descriptor not in standardStreams:
+            os.close(descriptor)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["environ"])
+    sys.stdout.reconfigure(line_buffering=os.isatty(1))
+
+    try:
+        run(request["arguments"])
+        status = 0
+    except SystemExit as exit:
+        status = exitStatus(exit.code)
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        status = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    connection.sendall(struct.pack(">i", status))
+    return status
+
+
+def isListening(socketPath: str) -> bool:
+    """
+    Function to check whether a daemon is listening on a socket.
+
+    Parameters:
+    socketPath (str): Path of the Unix socket.
+
+    Returns:
+    bool: True if a connection can be made.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socketPath)
+            return True
+        except OSError:
+            return False
+
+
+def serve(socketPath: str, run) -> None:
+    """
+    Function to run the daemon until it is interrupted. Every connection is served by a child process forked from
+    the daemon, so commands start with the modules of the daemon already imported and don't share any state.
+    Only the user running the daemon can connect to the socket.
+
+    Parameters:
+    socketPath (str): Path of the Unix socket.
+    run (callable): Function running a command with its command-line arguments, in the child process.
+
+    Returns:
+    None
+    """
+    if os.path.exists(socketPath):
+        if isListening(socketPath):
+            print("[!] A daemon is already listening on {}.".format(socketPath))
+            return
+        os.remove(socketPath)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        server.bind(socketPath)
+    finally:
+        os.umask(umask)
+    server.listen(listenBacklog)
+    # Finished children are reaped by the kernel.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit())
+    print("[*] Listening on {}.".format(socketPath))
+
+    try:
+        while True:
+            connection, _ = server.accept()
+            with connection:
+                if not isSameUser(connection):
+                    continue
+                sys.stdout.flush()
+                sys.stderr.flush()
+                if os.fork() == 0:
+                    status = 1
+                    try:
+                        server.close()
+                        status = runCommand(connection, run)
+                    finally:
+                        os._exit(status)
+    except (KeyboardInterrupt, SystemExit):
+        print("[*] Daemon stopped.")
+    finally:
+        server.close()
+        os.remove(socketPath)
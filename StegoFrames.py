@@ -0,0 +1,158 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+from PIL import Image
+
+
+# Formats whose frames are all used as carriers. Animated GIF frames are palette-based, and quantizing them
+# again when they are saved would destroy the hidden bits, so only their first frame is used, and output images
+# cannot be saved as GIF files (see StegoAlgorithm.checkOutputFormat).
+frameFormats = ("TIFF", "PNG")
+# TIFF compressions kept when the pages are saved again. Pages in other compressions, such as JPEG, are saved
+# with Deflate.
+losslessCompressions = ("raw", "tiff_lzw", "tiff_deflate", "tiff_adobe_deflate", "packbits")
+
+
+def frameCount(imagePath: str) -> int:
+    """
+    Function to return the number of frames of an image used as carriers, reading only its header.
+
+    Parameters:
+    imagePath (str): Path to the image file.
+
+    Returns:
+    int: Number of pages of a TIFF file or frames of an APNG file, 1 for other images.
+    """
+    with Image.open(imagePath) as image:
+        return getattr(image, "n_frames", 1) if image.format in frameFormats else 1
+
+
+def isMultiPage(imagePath: str) -> bool:
+    """
+    Function to check whether an image is a TIFF file with several pages, which is saved again as a TIFF file.
+
+    Parameters:
+    imagePath (str): Path to the image file.
+
+    Returns:
+    bool: True for TIFF files with more than one page.
+    """
+    with Image.open(imagePath) as image:
+        return image.format == "TIFF" and getattr(image, "n_frames", 1) > 1
+
+
+def frameGeometry(imagePath: str) -> list:
+    """
+    Function to return the size and carrier mode of every frame of an image, reading only the page headers
+    of TIFF files.
+
+    Parameters:
+    imagePath (str): Path to the image file.
+
+    Returns:
+    list: Width, height and mode (see frameMode) of every frame, in order.
+    """
+    with Image.open(imagePath) as image:
+        if image.format != "TIFF":
+            return [image.size + (frameMode(image),)] * frameCount(imagePath)
+        geometry = list()
+        for index in range(image.n_frames):
+            image.seek(index)
+            geometry.append(image.size + (frameMode(image),))
+        return geometry
+
+
+def openFrame(imagePath: str, index: int) -> Image.Image:
+    """
+    Function to open one page of a TIFF file and decode it.
+
+    Parameters:
+    imagePath (str): Path to the image file.
+    index (int): Index of the page.
+
+    Returns:
+    Image.Image: The decoded page.
+    """
+    image = Image.open(imagePath)
+    image.seek(index)
+    image.load()
+    return image
+
+
+def mapFrames(function, imagePath: str, count: int, first: int = 0, workers: int = None):
+    """
+    Function to decode frames of an image and apply a function to each of them, yielding the results in frame order.
+    TIFF pages are independent, so each one is opened and decoded on its own thread. Threads are enough: Pillow
+    releases the GIL while it decodes a page, and so does NumPy while the function embeds or reads the bits, whereas
+    worker processes would have to pickle every decoded page back to this process. APNG frames are composed
+    on the previous ones and are decoded in order. Frames after the last one requested are not decoded.
+
+    Parameters:
+    function (callable): Function called with the index of the frame and the decoded frame.
+    imagePath (str): Path to the image file.
+    count (int): Number of frames to decode, from the first one.
+    first (int): Index of the first frame to decode.
+    workers (int): Number of threads decoding TIFF pages. Defaults to the number of CPU cores.
+
+    Returns:
+    iterator: Results of the function calls.
+    """
+    with Image.open(imagePath) as image:
+        if image.format == "TIFF":
+            with ThreadPoolExecutor(workers or os.cpu_count() or 1) as executor:
+                yield from executor.map(lambda index: function(index, openFrame(imagePath, index)),
+                                        range(first, first + count))
+            return
+
+        for index in range(first + count):
+            image.seek(index)
+            if index >= first:
+                image.load()
+                yield function(index, image)
+
+
+def frameMode(image: Image.Image) -> str:
+    """
+    Function to return the mode a frame is converted to before data is hidden in it.
+
+    Parameters:
+    image (Image.Image): Opened frame.
+
+    Returns:
+    str: The mode of RGB, RGBA and 16-bit grayscale frames, "RGBA" for other frames with transparency,
+         "RGB" otherwise.
+    """
+    if image.mode in ("RGB", "RGBA", "I;16"):
+        return image.mode
+    return "RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB"
+
+
+def saveFrames(frames: list, outputImagePath, durations: list = None, loop: int = 0,
+               compression: str = None, compressLevel: int = -1, imageFormat: str = None) -> None:
+    """
+    Function to save frames as a multi-page TIFF file or an APNG file, chosen by the extension of the output path.
+
+    Parameters:
+    frames (list): Frames to save, in order.
+    outputImagePath (str | file): Path to save the output image, or a binary file object.
+    durations (list): Display duration of every APNG frame in milliseconds, or None.
+    loop (int): Number of APNG loops, 0 for an endless loop.
+    compression (str): Compression of the TIFF pages of the input image. Lossy compressions are replaced by Deflate.
+    compressLevel (int): zlib compression level of APNG outputs, from 0 to 9, or -1 for the zlib default.
+    imageFormat (str): "TIFF" or "PNG", or None to choose it from the extension of the path.
+
+    Returns:
+    None
+
+    Raises:
+    ValueError: If the output is not a PNG or TIFF file.
+    """
+    outputFormat = imageFormat or Image.registered_extensions().get(os.path.splitext(str(outputImagePath))[1].lower())
+    if outputFormat == "TIFF":
+        frames[0].save(outputImagePath, format="TIFF", save_all=True, append_images=frames[1:],
+                       compression=compression if compression in losslessCompressions else "tiff_deflate")
+    elif outputFormat == "PNG":
+        options = {"duration": durations, "loop": loop} if durations and None not in durations else {"loop": loop}
+        frames[0].save(outputImagePath, format="PNG", save_all=True, append_images=frames[1:], disposal=0, blend=0,
+                       compress_level=compressLevel, **options)
+    else:
+        raise ValueError("Multi-frame images can only be saved as PNG or TIFF.")
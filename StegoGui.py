@@ -1,11 +1,94 @@
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QLabel, QPushButton, QGridLayout, QFileDialog
 from PyQt5.QtWidgets import QLineEdit, QCheckBox, QTextEdit, QDesktopWidget, QAction, QDialog, QVBoxLayout
+from PyQt5.QtWidgets import QProgressBar
 from PyQt5.QtGui import QIcon, QFont
+from PyQt5.QtCore import QThread, pyqtSignal
 import sys, os
-from StegoAlgorithm import hideDataToImage, extractDataFromImage
+from StegoAlgorithm import hideDataToImage, extractDataFromImage, StegoObserver, StegoError, OperationCancelled
 import StyleSheets
 
 
+phaseNames = {"prepare": "Preparing", "embed": "Embedding", "save": "Saving image",
+              "decode": "Decoding image", "extract": "Extracting"}
+
+
+class StegoWorker(QThread, StegoObserver):
+    """
+    Runs a hiding or extraction operation off the main thread and reports its progress through signals.
+    The operation checks the cancel flag between chunks.
+    """
+    progressChanged = pyqtSignal(str, object, object, object)
+    succeeded = pyqtSignal()
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, function, *args, parent=None):
+        super().__init__(parent)
+        self.function = function
+        self.args = args
+        self.cancelRequested = False
+
+    def run(self):
+        """
+        Runs the operation and reports how it ended.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        try:
+            self.function(*self.args, observer=self)
+        except OperationCancelled:
+            self.cancelled.emit()
+        except StegoError as err:
+            self.failed.emit(str(err))
+        except Exception as err:
+            self.failed.emit("{}: {}".format(type(err).__name__, err))
+        else:
+            self.succeeded.emit()
+
+    def progress(self, phase, done, total, rows=0):
+        """
+        Forwards the progress of the operation to the main thread.
+
+        Parameters:
+        phase (str): Name of the phase.
+        done (int): Bytes processed so far.
+        total (int): Bytes the phase processes in total, 0 if unknown.
+        rows (int): Image rows processed so far.
+
+        Returns:
+        None
+        """
+        self.progressChanged.emit(phase, done, total, rows)
+
+    def isCancelled(self):
+        """
+        Returns whether the Cancel button was pressed.
+
+        Parameters:
+        None
+
+        Returns:
+        bool: True if the operation should stop.
+        """
+        return self.cancelRequested
+
+    def cancel(self):
+        """
+        Asks the operation to stop at the next chunk.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        self.cancelRequested = True
+
+
 class CustomDialog(QDialog):
     def __init__(self, title, message, parent=None):
         super().__init__(parent)
@@ -31,6 +114,7 @@ class CustomDialog(QDialog):
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.worker = None
         self.initUI()
 
     def initUI(self):
@@ -47,7 +131,7 @@ class MainWindow(QMainWindow):
         base_path = getattr(sys, '_MEIPASS', os.path.abspath(os.path.dirname(__file__)))
         icon_path = os.path.join(base_path, 'icon.ico')
         self.setWindowIcon(QIcon(icon_path))
-        self.setFixedSize(800, 270)
+        self.setFixedSize(800, 305)
 
         self.centerWindow()
         central_widget = QWidget()
@@ -144,13 +228,27 @@ class MainWindow(QMainWindow):
         self.buttonHideExtract.clicked.connect(lambda: self.runHideExtract())
         grid_layout.addWidget(self.buttonHideExtract, 4, 2)
 
+        # Progress bar / Cancel button
+        self.progressBar = QProgressBar()
+        self.progressBar.setStyleSheet(StyleSheets.progressBarStyle)
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setValue(0)
+        self.progressBar.setFormat('')
+        grid_layout.addWidget(self.progressBar, 5, 0, 1, 2)
+        self.buttonCancel = QPushButton('Cancel')
+        self.buttonCancel.setMinimumWidth(100)
+        self.buttonCancel.setEnabled(False)
+        self.buttonCancel.setStyleSheet(StyleSheets.buttonChooseFileOffStyle)
+        self.buttonCancel.clicked.connect(self.cancelOperation)
+        grid_layout.addWidget(self.buttonCancel, 5, 2)
+
         # Message box
         self.message_box = QTextEdit()
         self.message_box.setReadOnly(True)
         self.message_box.setMaximumHeight(60)
         self.message_box.setStyleSheet(StyleSheets.messageBoxStyle)
         self.message_box.append('Hiding mode selected.')
-        grid_layout.addWidget(self.message_box, 5, 0, 1, 3)
+        grid_layout.addWidget(self.message_box, 6, 0, 1, 3)
         
     def clearFields(self):
         """
@@ -265,7 +363,7 @@ class MainWindow(QMainWindow):
 
     def hideData(self):
         """
-        Hides data within an image file.
+        Hides data within an image file on a worker thread.
         
         Parameters:
         None
@@ -281,19 +379,13 @@ class MainWindow(QMainWindow):
         if not (input_image_path and hidden_file_path and output_image_path):
             self.message_box.append('Please fill all required fields.')
             return
-        
-        try:
-            hideDataToImage(input_image_path, hidden_file_path, output_image_path, password)
-        except (SystemExit, Exception):
-            self.message_box.append('Data not hidden.')
-            self.message_box.append('File size too large to hide.')
-            return
-        
-        self.message_box.append('Data hidden successfully.')
+
+        self.startWorker(StegoWorker(hideDataToImage, input_image_path, hidden_file_path, output_image_path, password),
+                         'Data hidden successfully.', 'Data not hidden.')
 
     def extractData(self):
         """
-        Extracts hidden data from an image file.
+        Extracts hidden data from an image file on a worker thread.
         
         Parameters:
         None
@@ -307,15 +399,122 @@ class MainWindow(QMainWindow):
         if not input_image_path:
             self.message_box.append('Please select an input image.')
             return
-        
-        try:
-            extractDataFromImage(input_image_path, password)
-        except (SystemExit, Exception):
-            self.message_box.append('Data not extracted.')
-            self.message_box.append('Image has no hidden file or wrong password is given.')
-            return
-        
-        self.message_box.append('Data extracted successfully.')
+
+        self.startWorker(StegoWorker(extractDataFromImage, input_image_path, password),
+                         'Data extracted successfully.', 'Data not extracted.')
+
+    def startWorker(self, worker, success_message, failure_message):
+        """
+        Starts a worker thread and locks the controls until it finishes.
+
+        Parameters:
+        worker (StegoWorker): The worker running the operation.
+        success_message (str): Message displayed when the operation succeeds.
+        failure_message (str): Message displayed before the reason when the operation fails.
+
+        Returns:
+        None
+        """
+        self.worker = worker
+        worker.progressChanged.connect(self.updateProgress)
+        worker.succeeded.connect(lambda: self.onWorkerFinished(success_message))
+        worker.failed.connect(lambda message: self.onWorkerFinished(failure_message, message))
+        worker.cancelled.connect(lambda: self.onWorkerFinished('Operation cancelled.'))
+        self.setControlsEnabled(False)
+        self.progressBar.setValue(0)
+        worker.start()
+
+    def updateProgress(self, phase, done, total, rows):
+        """
+        Shows the progress reported by the worker. Phases of unknown length show a busy indicator.
+
+        Parameters:
+        phase (str): Name of the phase.
+        done (int): Bytes processed so far.
+        total (int): Bytes the phase processes in total, 0 if unknown.
+        rows (int): Image rows processed so far.
+
+        Returns:
+        None
+        """
+        name = phaseNames.get(phase, phase)
+        if total:
+            self.progressBar.setRange(0, 100)
+            self.progressBar.setValue(min(100, done * 100 // total))
+            details = '{} of {} bytes'.format(done, total)
+            if rows:
+                details += ', {} rows'.format(rows)
+            self.progressBar.setFormat('{}: %p% ({})'.format(name, details))
+        else:
+            self.progressBar.setRange(0, 0)
+            self.progressBar.setFormat('{}...'.format(name))
+
+    def onWorkerFinished(self, message, reason=None):
+        """
+        Displays the result of the operation and unlocks the controls.
+
+        Parameters:
+        message (str): Result message.
+        reason (str): Reason of the failure, if any.
+
+        Returns:
+        None
+        """
+        self.worker.wait()
+        self.worker = None
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setValue(100 if reason is None and message.endswith('successfully.') else 0)
+        self.progressBar.setFormat('')
+        self.message_box.append(message)
+        if reason:
+            self.message_box.append(reason)
+        self.setControlsEnabled(True)
+
+    def cancelOperation(self):
+        """
+        Asks the running operation to stop at the next chunk.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        if self.worker is not None:
+            self.worker.cancel()
+            self.buttonCancel.setEnabled(False)
+            self.message_box.append('Cancelling...')
+
+    def setControlsEnabled(self, enabled):
+        """
+        Locks the controls while an operation runs, and enables the Cancel button instead.
+
+        Parameters:
+        enabled (bool): True to unlock the controls.
+
+        Returns:
+        None
+        """
+        self.buttonHideExtract.setEnabled(enabled)
+        self.extractionMode.setEnabled(enabled)
+        self.buttonCancel.setEnabled(not enabled)
+        self.buttonCancel.setStyleSheet(StyleSheets.buttonChooseFileOffStyle if enabled
+                                        else StyleSheets.buttonChooseFileStyle)
+
+    def closeEvent(self, event):
+        """
+        Cancels the running operation and waits for it before the window closes.
+
+        Parameters:
+        event (QCloseEvent): The close event.
+
+        Returns:
+        None
+        """
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        event.accept()
 
     def onSwitchChange(self, state):
         """
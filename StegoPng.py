@@ -0,0 +1,589 @@
+import io, os, zlib, struct, queue, threading
+from contextlib import nullcontext
+import numpy as np
+
+
+# Streamed PNG carriers: 8-bit and 16-bit RGB and RGBA, and 16-bit grayscale, without interlacing. Their pixels
+# are hidden in as they are, so they are written back in the same format. Scanlines are inflated, re-filtered or
+# passed through, and deflated in bands of about bandSize bytes, with at most queueDepth bands waiting between
+# two stages.
+pngSignature = b"\x89PNG\r\n\x1a\n"
+bandSize = 1 << 20
+queueDepth = 4
+readSize = 1 << 16
+idatSize = 1 << 16
+colorChannels = {0: 1, 2: 3, 6: 4}
+colorTypes = {channels: colorType for colorType, channels in colorChannels.items()}
+# Samples per pixel of every PNG color type, palette indices included, for reading the leading rows of any PNG file.
+colorSamples = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+streamableFormats = ((2, 8), (6, 8), (2, 16), (6, 16), (0, 16))
+# Ancillary chunks marked unsafe to copy that describe how the pixels are rendered, not what they hold. Hiding data
+# only changes the least significant bits, so they stay valid and are copied like the safe-to-copy chunks.
+renderingChunks = (b"iCCP", b"sRGB", b"gAMA", b"cHRM", b"cICP", b"mDCv", b"cLLi", b"sBIT", b"tRNS", b"bKGD")
+
+
+def pngHeader(pngPath: str) -> dict:
+    """
+    Function to read the IHDR chunk of a PNG file.
+
+    Parameters:
+    pngPath (str): Path to the image file.
+
+    Returns:
+    dict: Keys "width", "height", "bitDepth", "colorType" and "interlace", or None if the file is not a PNG.
+    """
+    with open(pngPath, "rb") as pngFile:
+        head = pngFile.read(len(pngSignature) + 8 + 13)
+
+    if len(head) < 29 or head[:8] != pngSignature or head[12:16] != b"IHDR":
+        return None
+    width, height, bitDepth, colorType, _, _, interlace = struct.unpack(">IIBBBBB", head[16:29])
+    return {"width": width, "height": height, "bitDepth": bitDepth, "colorType": colorType, "interlace": interlace}
+
+
+def isStreamable(pngPath: str) -> bool:
+    """
+    Function to check whether a PNG file can be rewritten by streaming its scanlines (see rewritePng).
+
+    Parameters:
+    pngPath (str): Path to the image file.
+
+    Returns:
+    bool: True for non-interlaced PNG files in one of the streamable formats.
+    """
+    header = pngHeader(pngPath) if os.path.isfile(pngPath) else None
+    return header is not None and (header["colorType"], header["bitDepth"]) in streamableFormats and \
+        header["interlace"] == 0
+
+
+def pixelSize(header: dict) -> int:
+    """
+    Function to return the number of bytes of a pixel of a PNG file, the distance used by the scanline filters.
+
+    Parameters:
+    header (dict): IHDR fields of a PNG file in one of the streamable formats (see pngHeader).
+
+    Returns:
+    int: Bytes per pixel.
+    """
+    return colorChannels[header["colorType"]] * header["bitDepth"] // 8
+
+
+def scanlineBytes(pixels: np.ndarray) -> np.ndarray:
+    """
+    Function to return rows of pixels as the bytes of PNG scanlines: 16-bit values are stored big-endian.
+
+    Parameters:
+    pixels (np.ndarray): Rows of 8-bit or 16-bit pixels, array of shape (rows, width) or (rows, width, channels).
+
+    Returns:
+    np.ndarray: Array of bytes of shape (rows, width * bytes per pixel).
+    """
+    if pixels.dtype.itemsize == 2:
+        pixels = pixels.astype(">u2").view(np.uint8)
+    return pixels.reshape(len(pixels), -1)
+
+
+def readChunk(pngFile) -> tuple:
+    """
+    Function to read the length and type of the next chunk of a PNG file.
+
+    Parameters:
+    pngFile (file): PNG file positioned at the start of a chunk.
+
+    Returns:
+    tuple: Length of the chunk data and chunk type.
+    """
+    head = pngFile.read(8)
+    if len(head) < 8:
+        raise ValueError("PNG file is truncated.")
+    return struct.unpack(">I4s", head)
+
+
+def writeChunk(pngFile, chunkType: bytes, data: bytes) -> None:
+    """
+    Function to write a chunk to a PNG file.
+
+    Parameters:
+    pngFile (file): Output file.
+    chunkType (bytes): Four-letter chunk type.
+    data (bytes): Chunk data.
+
+    Returns:
+    None
+    """
+    pngFile.write(struct.pack(">I4s", len(data), chunkType))
+    pngFile.write(data)
+    pngFile.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunkType))))
+
+
+def isCopied(chunkType: bytes) -> bool:
+    """
+    Function to check whether an ancillary chunk is kept when the pixels change: chunks marked safe to copy
+    (lowercase fourth letter) and the rendering chunks (see renderingChunks) are.
+
+    Parameters:
+    chunkType (bytes): Four-letter chunk type.
+
+    Returns:
+    bool: True if the chunk is copied to the output.
+    """
+    return chunkType in renderingChunks or bool(chunkType[0] & 0x20 and chunkType[3] & 0x20)
+
+
+def ancillaryChunks(png) -> tuple:
+    """
+    Function to read the ancillary chunks of a PNG file that are kept when its pixels change (see isCopied),
+    skipping the image data.
+
+    Parameters:
+    png (str | bytes): Path to the image file, or encoded image file.
+
+    Returns:
+    tuple: Lists of (chunk type, data) pairs found before and after the image data. Empty for other formats.
+    """
+    leading, trailing, afterData = list(), list(), False
+    with open(png, "rb") if isinstance(png, (str, os.PathLike)) else io.BytesIO(png) as pngFile:
+        if pngFile.read(len(pngSignature)) != pngSignature:
+            return leading, trailing
+        try:
+            length, chunkType = readChunk(pngFile)
+            while chunkType != b"IEND":
+                afterData = afterData or chunkType == b"IDAT"
+                if chunkType in (b"IHDR", b"PLTE", b"IDAT") or not isCopied(chunkType):
+                    pngFile.seek(length + 4, os.SEEK_CUR)
+                else:
+                    (trailing if afterData else leading).append((chunkType, pngFile.read(length)))
+                    pngFile.read(4)
+                length, chunkType = readChunk(pngFile)
+        except ValueError:
+            pass
+    return leading, trailing
+
+
+def imageData(pngFile):
+    """
+    Function to read the zlib stream of a PNG file, in pieces, through its consecutive IDAT chunks.
+
+    Parameters:
+    pngFile (file): PNG file positioned at the start of the first IDAT chunk.
+
+    Returns:
+    iterator: Pieces of the stream. Once exhausted, the file is positioned at the start of the chunk that follows
+              the image data.
+    """
+    length, chunkType = readChunk(pngFile)
+    while chunkType == b"IDAT":
+        remaining = length
+        while remaining:
+            data = pngFile.read(min(readSize, remaining))
+            if not data:
+                raise ValueError("PNG file is truncated.")
+            remaining -= len(data)
+            yield data
+        pngFile.read(4)
+        length, chunkType = readChunk(pngFile)
+    pngFile.seek(-8, os.SEEK_CUR)
+
+
+def inflateRows(pngFile, stride: int, rows: int) -> bytes:
+    """
+    Function to inflate the leading scanlines of a PNG stream, still filtered, reading no more of the image data
+    than they need.
+
+    Parameters:
+    pngFile (file): PNG file positioned at the start of the first IDAT chunk.
+    stride (int): Size of a scanline, filter type included.
+    rows (int): Number of leading scanlines.
+
+    Returns:
+    bytes: The scanlines.
+
+    Raises:
+    ValueError: If the image data holds fewer scanlines.
+    """
+    engine = zlib.decompressobj()
+    size, pending = rows * stride, bytearray()
+    for data in imageData(pngFile):
+        while data and len(pending) < size:
+            pending += engine.decompress(data, size - len(pending))
+            data = engine.unconsumed_tail
+        if len(pending) == size:
+            return bytes(pending)
+    raise ValueError("PNG image data is truncated.")
+
+
+def leadingPng(png, rows: int) -> bytes:
+    """
+    Function to build a PNG file holding only the leading rows of a non-interlaced PNG file: its chunks up to the
+    image data, with the height in the IHDR chunk reduced and without the animation chunks, and the leading
+    scanlines, inflated and stored again without compression. Only the image data of those rows is read and inflated.
+
+    Parameters:
+    png (str | bytes): Path to the image file, or encoded image file.
+    rows (int): Number of leading rows, at most the height of the image.
+
+    Returns:
+    bytes: The PNG file, or None if the file is not a non-interlaced PNG.
+
+    Raises:
+    ValueError: If the file is truncated.
+    """
+    output, stride = io.BytesIO(), None
+    with open(png, "rb") if isinstance(png, (str, os.PathLike)) else io.BytesIO(png) as pngFile:
+        if pngFile.read(len(pngSignature)) != pngSignature:
+            return None
+        output.write(pngSignature)
+        length, chunkType = readChunk(pngFile)
+        while chunkType != b"IDAT":
+            data = pngFile.read(length)
+            pngFile.read(4)
+            if chunkType == b"IHDR":
+                width, _, bitDepth, colorType, _, _, interlace = struct.unpack(">IIBBBBB", data[:13])
+                if interlace or colorType not in colorSamples:
+                    return None
+                stride = (width * colorSamples[colorType] * bitDepth + 7) // 8 + 1
+                data = struct.pack(">II", width, rows) + data[8:]
+            if chunkType not in (b"acTL", b"fcTL"):
+                writeChunk(output, chunkType, data)
+            length, chunkType = readChunk(pngFile)
+        if stride is None:
+            return None
+        pngFile.seek(-8, os.SEEK_CUR)
+        writeChunk(output, b"IDAT", zlib.compress(inflateRows(pngFile, stride, rows), 0))
+    writeChunk(output, b"IEND", b"")
+    return output.getvalue()
+
+
+def paethPredictor(left: np.ndarray, up: np.ndarray, upLeft: np.ndarray) -> np.ndarray:
+    """
+    Function to compute the Paeth predictor of every byte.
+
+    Parameters:
+    left (np.ndarray): Bytes one pixel to the left, as int16.
+    up (np.ndarray): Bytes in the row above, as int16.
+    upLeft (np.ndarray): Bytes in the row above, one pixel to the left, as int16.
+
+    Returns:
+    np.ndarray: Predicted bytes, as int16.
+    """
+    estimate = left + up - upLeft
+    distanceLeft, distanceUp, distanceUpLeft = np.abs(estimate - left), np.abs(estimate - up), np.abs(estimate - upLeft)
+    return np.where((distanceLeft <= distanceUp) & (distanceLeft <= distanceUpLeft), left,
+                    np.where(distanceUp <= distanceUpLeft, up, upLeft))
+
+
+def filterScanlines(rows: np.ndarray, previous: np.ndarray, bytesPerPixel: int = 3) -> bytes:
+    """
+    Function to filter rows of pixels for a PNG stream, choosing for every row the filter type whose output
+    has the smallest sum of absolute values, like common PNG encoders.
+
+    Parameters:
+    rows (np.ndarray): Rows of bytes, array of shape (rows, width * bytesPerPixel).
+    previous (np.ndarray): The row above the first one, or None for the first row of the image.
+    bytesPerPixel (int): Number of bytes of a pixel (see pixelSize).
+
+    Returns:
+    bytes: Filtered scanlines, each starting with its filter type.
+    """
+    current = rows.astype(np.int16)
+    up = np.zeros_like(current)
+    up[1:] = current[:-1]
+    if previous is not None:
+        up[0] = previous
+    left, upLeft = np.zeros_like(current), np.zeros_like(current)
+    left[:, bytesPerPixel:] = current[:, :-bytesPerPixel]
+    upLeft[:, bytesPerPixel:] = up[:, :-bytesPerPixel]
+
+    candidates = np.stack([current, current - left, current - up, current - ((left + up) >> 1),
+                           current - paethPredictor(left, up, upLeft)]).astype(np.uint8)
+    costs = np.abs(candidates.view(np.int8).astype(np.int32)).sum(axis=2)
+    filterTypes = costs.argmin(axis=0)
+
+    scanlines = np.empty((len(rows), rows.shape[1] + 1), dtype=np.uint8)
+    scanlines[:, 0] = filterTypes
+    scanlines[:, 1:] = candidates[filterTypes, np.arange(len(rows))]
+    return scanlines.tobytes()
+
+
+def runStage(function, stopped: threading.Event, *args) -> tuple:
+    """
+    Function to run a pipeline stage on a daemon thread. If the stage fails, its exception is kept
+    and the whole pipeline is stopped.
+
+    Parameters:
+    function (callable): Stage to run, called with the arguments and the stop event.
+    stopped (threading.Event): Set when the pipeline stops early.
+    *args: Arguments of the stage.
+
+    Returns:
+    tuple: The started thread and a list receiving the exception of the stage, if any.
+    """
+    errors = list()
+
+    def stage():
+        try:
+            function(*args, stopped)
+        except BaseException as err:
+            errors.append(err)
+            stopped.set()
+
+    thread = threading.Thread(target=stage, daemon=True)
+    thread.start()
+    return thread, errors
+
+
+def putBand(bands: queue.Queue, band, stopped: threading.Event) -> bool:
+    """
+    Function to queue a band for the next stage, waiting while the queue is full unless the pipeline stopped.
+
+    Parameters:
+    bands (queue.Queue): Queue of the next stage.
+    band (bytes): Band to queue, or None to mark the end of the stream.
+    stopped (threading.Event): Set when the pipeline stops early.
+
+    Returns:
+    bool: False if the pipeline stopped before the band was queued.
+    """
+    while not stopped.is_set():
+        try:
+            bands.put(band, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def takeBand(bands: queue.Queue, stopped: threading.Event) -> tuple:
+    """
+    Function to take the next band from the previous stage, waiting while the queue is empty unless the pipeline stopped.
+
+    Parameters:
+    bands (queue.Queue): Queue of the previous stage.
+    stopped (threading.Event): Set when the pipeline stops early.
+
+    Returns:
+    tuple: False and None if the pipeline stopped, otherwise True and the band (None at the end of the stream).
+    """
+    while not stopped.is_set():
+        try:
+            return True, bands.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return False, None
+
+
+def inflateScanlines(pngFile, stride: int, height: int, skipRows: int, bands: queue.Queue,
+                     trailer: list, stopped: threading.Event) -> None:
+    """
+    Function to inflate the scanlines of a PNG stream and queue them in bands, still filtered.
+    Used as a pipeline stage.
+
+    Parameters:
+    pngFile (file): PNG file positioned at the start of the first IDAT chunk.
+    stride (int): Size of a scanline, filter type included.
+    height (int): Number of scanlines.
+    skipRows (int): Number of leading scanlines to drop, because they are encoded again from their pixels.
+    bands (queue.Queue): Queue receiving the bands, then None.
+    trailer (list): Receives the (type, data) pairs of the ancillary chunks following the image data.
+    stopped (threading.Event): Set when the pipeline stops early.
+
+    Returns:
+    None
+    """
+    engine = zlib.decompressobj()
+    rowsPerBand = max(1, bandSize // stride)
+    pending, row = bytearray(), 0
+
+    def emitRows(minimum: int) -> bool:
+        nonlocal row
+        while len(pending) >= minimum * stride and row < height:
+            count = min(rowsPerBand, len(pending) // stride, height - row)
+            if count == 0:
+                break
+            if row + count > skipRows:
+                start = max(0, skipRows - row)
+                if not putBand(bands, bytes(pending[start * stride:count * stride]), stopped):
+                    return False
+            del pending[:count * stride]
+            row += count
+        return True
+
+    for data in imageData(pngFile):
+        while data:
+            pending += engine.decompress(data, bandSize)
+            data = engine.unconsumed_tail
+            if not emitRows(rowsPerBand):
+                return
+
+    pending += engine.flush()
+    if not emitRows(1):
+        return
+    if row < height:
+        raise ValueError("PNG image data is truncated.")
+    length, chunkType = readChunk(pngFile)
+    while chunkType != b"IEND":
+        data = pngFile.read(length)
+        pngFile.read(4)
+        if isCopied(chunkType):
+            trailer.append((chunkType, data))
+        length, chunkType = readChunk(pngFile)
+    putBand(bands, None, stopped)
+
+
+def deflateScanlines(outputFile, bands: queue.Queue, compressLevel: int, stopped: threading.Event) -> None:
+    """
+    Function to deflate queued bands of filtered scanlines and write them as IDAT chunks. Used as a pipeline stage.
+
+    Parameters:
+    outputFile (file): Output PNG file, positioned after the chunks preceding the image data.
+    bands (queue.Queue): Queue of bands, ended by None.
+    compressLevel (int): zlib compression level, from 0 to 9, or -1 for the zlib default.
+    stopped (threading.Event): Set when the pipeline stops early.
+
+    Returns:
+    None
+    """
+    engine = zlib.compressobj(compressLevel)
+    pending = bytearray()
+    while True:
+        running, band = takeBand(bands, stopped)
+        if not running:
+            return
+        pending += engine.compress(band) if band is not None else engine.flush()
+        while len(pending) >= idatSize or (band is None and pending):
+            writeChunk(outputFile, b"IDAT", bytes(pending[:idatSize]))
+            del pending[:idatSize]
+        if band is None:
+            return
+
+
+def rewritePng(inputPath: str, output, pixels: np.ndarray, compressLevel: int = -1, onBand=None) -> None:
+    """
+    Function to write a copy of a PNG file whose leading rows are replaced, streaming the image data.
+    The remaining scanlines are inflated and passed through unchanged, still filtered, so the last replaced row
+    must hold the original pixels, unless every row is replaced. Inflating, filtering and deflating run on
+    separate threads, with a few bands of scanlines in memory. Ancillary chunks marked safe to copy are kept.
+
+    Parameters:
+    inputPath (str): Path to the input PNG file (see isStreamable).
+    output (str | file): Path to the output PNG file, removed if the rewrite fails, or a binary file object.
+    pixels (np.ndarray): Leading rows of the image in the format of the file, array of shape (rows, width, channels)
+                         of 8-bit or 16-bit values.
+    compressLevel (int): zlib compression level, from 0 to 9, or -1 for the zlib default.
+    onBand (callable): Called with the number of rows written after every band. May raise to stop the rewrite.
+
+    Returns:
+    None
+    """
+    header = pngHeader(inputPath)
+    width, height, bytesPerPixel = header["width"], header["height"], pixelSize(header)
+    stride = width * bytesPerPixel + 1
+    rowsPerBand = max(1, bandSize // stride)
+    inflated, filtered = queue.Queue(queueDepth), queue.Queue(queueDepth)
+    stopped, trailer = threading.Event(), list()
+
+    with open(inputPath, "rb") as pngFile, \
+            open(output, "wb") if isinstance(output, str) else nullcontext(output) as outputFile:
+        try:
+            pngFile.seek(len(pngSignature))
+            outputFile.write(pngSignature)
+            length, chunkType = readChunk(pngFile)
+            while chunkType != b"IDAT":
+                data = pngFile.read(length)
+                pngFile.read(4)
+                if chunkType in (b"IHDR", b"PLTE") or isCopied(chunkType):
+                    writeChunk(outputFile, chunkType, data)
+                length, chunkType = readChunk(pngFile)
+            pngFile.seek(-8, os.SEEK_CUR)
+
+            inflater, inflateErrors = runStage(inflateScanlines, stopped, pngFile, stride, height, len(pixels),
+                                               inflated, trailer)
+            deflater, deflateErrors = runStage(deflateScanlines, stopped, outputFile, filtered, compressLevel)
+            try:
+                rows, previous = 0, None
+                for start in range(0, len(pixels), rowsPerBand):
+                    band = scanlineBytes(pixels[start:start + rowsPerBand])
+                    putBand(filtered, filterScanlines(band, previous, bytesPerPixel), stopped)
+                    previous, rows = band[-1], rows + len(band)
+                    if onBand:
+                        onBand(rows)
+
+                running, band = takeBand(inflated, stopped)
+                while running and putBand(filtered, band, stopped) and band is not None:
+                    rows += len(band) // stride
+                    if onBand:
+                        onBand(rows)
+                    running, band = takeBand(inflated, stopped)
+                deflater.join()
+            finally:
+                stopped.set()
+                inflater.join()
+                deflater.join()
+
+            if inflateErrors or deflateErrors:
+                raise (inflateErrors + deflateErrors)[0]
+            for chunkType, data in trailer:
+                writeChunk(outputFile, chunkType, data)
+            writeChunk(outputFile, b"IEND", b"")
+        except BaseException:
+            if isinstance(output, str):
+                outputFile.close()
+                os.remove(output)
+            raise
+
+
+def writePng(output, pixels: np.ndarray, compressLevel: int = -1, leading: list = (), trailing: list = ()) -> None:
+    """
+    Function to encode a whole image as a PNG file, for pixels Pillow cannot save, such as 16-bit RGB.
+    Filtering and deflating run on separate threads, like in rewritePng.
+
+    Parameters:
+    output (str | file): Path to the output PNG file, removed if the encoding fails, or a binary file object.
+    pixels (np.ndarray): Array of 8-bit or 16-bit values of shape (height, width) or (height, width, channels),
+                         with 1, 3 or 4 channels.
+    compressLevel (int): zlib compression level, from 0 to 9, or -1 for the zlib default.
+    leading (list): Ancillary (chunk type, data) pairs written before the image data (see ancillaryChunks).
+    trailing (list): Ancillary (chunk type, data) pairs written after the image data.
+
+    Returns:
+    None
+    """
+    height, width = pixels.shape[:2]
+    channels = pixels.shape[2] if pixels.ndim == 3 else 1
+    bitDepth = pixels.dtype.itemsize * 8
+    bytesPerPixel = channels * pixels.dtype.itemsize
+    rowsPerBand = max(1, bandSize // (width * bytesPerPixel + 1))
+    filtered, stopped = queue.Queue(queueDepth), threading.Event()
+
+    with open(output, "wb") if isinstance(output, str) else nullcontext(output) as outputFile:
+        try:
+            outputFile.write(pngSignature)
+            writeChunk(outputFile, b"IHDR", struct.pack(">IIBBBBB", width, height, bitDepth, colorTypes[channels],
+                                                        0, 0, 0))
+            for chunkType, data in leading:
+                writeChunk(outputFile, chunkType, data)
+            deflater, deflateErrors = runStage(deflateScanlines, stopped, outputFile, filtered, compressLevel)
+            try:
+                previous = None
+                for start in range(0, height, rowsPerBand):
+                    band = scanlineBytes(pixels[start:start + rowsPerBand])
+                    if not putBand(filtered, filterScanlines(band, previous, bytesPerPixel), stopped):
+                        break
+                    previous = band[-1]
+                putBand(filtered, None, stopped)
+                deflater.join()
+            finally:
+                stopped.set()
+                deflater.join()
+
+            if deflateErrors:
+                raise deflateErrors[0]
+            for chunkType, data in trailing:
+                writeChunk(outputFile, chunkType, data)
+            writeChunk(outputFile, b"IEND", b"")
+        except BaseException:
+            if isinstance(output, str):
+                outputFile.close()
+                os.remove(output)
+            raise
@@ -0,0 +1,171 @@
+import os, json, shutil
+import numpy as np
+
+
+# Carriers in these layouts are memory-mapped instead of being decoded onto the heap.
+ppmExtensions = (".ppm", ".pgm", ".pnm")
+bmpExtensions = (".bmp",)
+sidecarExtension = ".json"
+
+
+def ppmLayout(rawPath: str) -> dict:
+    """
+    Function to read the layout of a binary PPM (P6) or PGM (P5) file from its header.
+
+    Parameters:
+    rawPath (str): Path to the image file.
+
+    Returns:
+    dict: Layout of the pixel data (see rawLayout), or None if the file is not a binary PPM or PGM.
+    """
+    with open(rawPath, "rb") as rawFile:
+        head = rawFile.read(1024)
+
+    if head[:2] not in (b"P5", b"P6"):
+        return None
+
+    fields, position = list(), 2
+    while len(fields) < 3:
+        while position < len(head) and head[position:position + 1].isspace():
+            position += 1
+        if head[position:position + 1] == b"#":
+            position = head.find(b"\n", position)
+            if position < 0:
+                return None
+            continue
+        start = position
+        while position < len(head) and head[position:position + 1].isdigit():
+            position += 1
+        if start == position:
+            return None
+        fields.append(int(head[start:position]))
+
+    width, height, maxValue = fields
+    channels = 3 if head[:2] == b"P6" else 1
+    dtype = np.dtype(np.uint8) if maxValue < 256 else np.dtype(">u2")
+    return {"offset": position + 1, "width": width, "height": height, "channels": channels, "dtype": dtype,
+            "stride": width * channels * dtype.itemsize, "bottomUp": False, "bgr": False, "sidecar": None}
+
+
+def bmpLayout(rawPath: str) -> dict:
+    """
+    Function to read the layout of an uncompressed 24-bit or 32-bit BMP file from its header.
+
+    Parameters:
+    rawPath (str): Path to the image file.
+
+    Returns:
+    dict: Layout of the pixel data (see rawLayout), or None if the BMP is compressed or palette-based.
+    """
+    with open(rawPath, "rb") as rawFile:
+        head = rawFile.read(34)
+
+    if len(head) < 34 or head[:2] != b"BM" or int.from_bytes(head[14:18], byteorder='little') < 40:
+        return None
+
+    width = int.from_bytes(head[18:22], byteorder='little', signed=True)
+    height = int.from_bytes(head[22:26], byteorder='little', signed=True)
+    bitCount = int.from_bytes(head[28:30], byteorder='little')
+    compression = int.from_bytes(head[30:34], byteorder='little')
+    if compression != 0 or bitCount not in (24, 32) or width <= 0:
+        return None
+
+    return {"offset": int.from_bytes(head[10:14], byteorder='little'), "width": width, "height": abs(height),
+            "channels": bitCount // 8, "dtype": np.dtype(np.uint8), "stride": (width * bitCount + 31) // 32 * 4,
+            "bottomUp": height > 0, "bgr": True, "sidecar": None}
+
+
+def sidecarLayout(rawPath: str) -> dict:
+    """
+    Function to read the layout of a headerless raw image from its JSON sidecar file (<image path>.json).
+    The sidecar holds "width" and "height", and optionally "channels" (default 3), "dtype" (default "uint8")
+    and "offset" (default 0). Channels are stored interleaved, in RGB order.
+
+    Parameters:
+    rawPath (str): Path to the image file.
+
+    Returns:
+    dict: Layout of the pixel data (see rawLayout), or None if there is no sidecar file.
+    """
+    sidecarPath = rawPath + sidecarExtension
+    if not os.path.isfile(sidecarPath):
+        return None
+
+    with open(sidecarPath) as sidecarFile:
+        sidecar = json.load(sidecarFile)
+
+    channels = int(sidecar.get("channels", 3))
+    dtype = np.dtype(sidecar.get("dtype", "uint8"))
+    return {"offset": int(sidecar.get("offset", 0)), "width": int(sidecar["width"]), "height": int(sidecar["height"]),
+            "channels": channels, "dtype": dtype, "stride": int(sidecar["width"]) * channels * dtype.itemsize,
+            "bottomUp": False, "bgr": False, "sidecar": sidecarPath}
+
+
+def rawLayout(rawPath: str) -> dict:
+    """
+    Function to check whether an image is stored in an uncompressed layout that can be memory-mapped.
+
+    Parameters:
+    rawPath (str): Path to the image file.
+
+    Returns:
+    dict: Keys "offset", "width", "height", "channels", "dtype", "stride" (bytes per row), "bottomUp", "bgr"
+          and "sidecar" (path of the sidecar file, if any), or None if the image has to be decoded.
+    """
+    extension = os.path.splitext(rawPath)[1].lower()
+    if not os.path.isfile(rawPath):
+        return None
+    elif os.path.isfile(rawPath + sidecarExtension):
+        return sidecarLayout(rawPath)
+    elif extension in ppmExtensions:
+        return ppmLayout(rawPath)
+    elif extension in bmpExtensions:
+        return bmpLayout(rawPath)
+    return None
+
+
+def rawChannels(layout: dict) -> int:
+    """
+    Function to return how many channels of a raw image hold hidden data: R, G, B and alpha, or the gray channel.
+    The fourth byte of 32-bit BMP pixels is left out.
+
+    Parameters:
+    layout (dict): Layout of the pixel data (see rawLayout).
+
+    Returns:
+    int: Number of channels.
+    """
+    return min(layout["channels"], 3 if layout["bgr"] else 4)
+
+
+def mapRawCarrier(rawPath: str, layout: dict, outputPath: str = None) -> tuple:
+    """
+    Function to memory-map the pixels of a raw image. Nothing is read until pixels are accessed,
+    so only the pages holding the accessed rows are touched.
+
+    Parameters:
+    rawPath (str): Path to the image file.
+    layout (dict): Layout of the pixel data (see rawLayout).
+    outputPath (str): If given, the image (and its sidecar file) is copied there and the copy is mapped
+                      for writing. If it is the input path itself, the image is modified in place.
+                      If omitted, the image is mapped read-only.
+
+    Returns:
+    tuple: The np.memmap of the pixel rows (flush it after writing) and a (height, width, channels) view
+           of the pixels in raster order, with channels in R, G, B order.
+    """
+    mode = "r"
+    if outputPath:
+        mode = "r+"
+        if os.path.abspath(outputPath) != os.path.abspath(rawPath):
+            shutil.copyfile(rawPath, outputPath)
+            if layout["sidecar"]:
+                shutil.copyfile(layout["sidecar"], outputPath + sidecarExtension)
+        rawPath = outputPath
+
+    height, width, channels = layout["height"], layout["width"], layout["channels"]
+    mapping = np.memmap(rawPath, dtype=np.uint8, mode=mode, offset=layout["offset"], shape=(height, layout["stride"]))
+    rows = mapping[::-1] if layout["bottomUp"] else mapping
+    pixels = rows[:, :width * channels * layout["dtype"].itemsize].view(layout["dtype"]).reshape(height, width, channels)
+    pixels = pixels[..., 2::-1] if layout["bgr"] else pixels[..., :rawChannels(layout)]
+    return mapping, pixels
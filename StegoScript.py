@@ -1,12 +1,27 @@
-from getopt import getopt, GetoptError
-from sys import exit, argv, getsizeof
-from StegoAlgorithm import *
-import warnings
+from getopt import getopt, gnu_getopt, GetoptError
+from sys import exit, argv, getsizeof, stdin, stdout, stderr
+from contextlib import redirect_stdout, nullcontext
+import StegoDaemon
+import warnings, os, io, csv, json, time
+
+# StegoAlgorithm, NumPy, PIL and the cryptography package are imported by the functions using them, so usage
+# messages, argument errors and commands sent to the daemon don't pay for loading them.
 
 
 warnings.filterwarnings("ignore", category=UserWarning, 
                         message="Palette images with Transparency expressed in bytes should be converted to RGBA images")
 
+# Files scanned per worker task, and tasks in flight per worker, of the scan subcommand.
+scanChunkSize = 64
+scanTasksPerWorker = 4
+# Lossy formats are never written by the algorithm and cannot keep hidden data, so they are not scanned.
+lossyExtensions = (".jpg", ".jpeg", ".jpe", ".jfif")
+# Path standing for standard input or output in the -i, -h and -o options.
+standardStream = "-"
+# Header fields reported by the scan subcommand.
+scanFields = ("mode", "encrypted", "encryption", "codec", "nameSize", "dataSize", "frameSize",
+              "payloadId", "index", "count", "memberCount")
+
 
 def usage():
     """
@@ -18,67 +33,917 @@ def usage():
     Returns:
         None
     """
-    print("Usage: python stego.py -i <input_image> [-h <hidden_file>] [-o <output_image>] [-p <password>] [-e] [--help]")
+    print("Usage: python stego.py -i <input_image> [-h <hidden_file>] [-o <output_image>] [-p <password>] [-b <bits>]")
+    print("                       [-c <channels>] [-z <codec>] [-k <kdf>] [-f <version>] [-l <level>] [-s] [-a]")
+    print("                       [-e [-n <name>]] [-t] [--profile <report>] [--help]")
     print("Options:")
-    print("  -i <input_image>    Path to the input image file.")
-    print("  -h <hidden_file>    Path to the file to hide.")
-    print("  -o <output_image>   Path to the output image file.")
+    print("  -i <input_image>    Path to the input image file. Repeat to shard the hidden file across several images.")
+    print("                      - reads a single input image from standard input.")
+    print("  -h <hidden_file>    Path to the file to hide. Repeat to hide several files as an archive, whose files can")
+    print("                      be listed, extracted by name and added to later. - hides standard input, read up to")
+    print("                      the capacity of the image, without a name.")
+    print("  -o <output_image>   Path to the output image file. Repeat in the same order as the input images.")
+    print("                      Outputs are PNG, except for uncompressed PPM, PGM, BMP and raw images with a JSON")
+    print("                      sidecar, which are modified through a memory map and keep their format, and")
+    print("                      multi-page TIFF images, whose pages all hold the hidden file and stay a TIFF.")
+    print("                      - writes a PNG image to standard output, and messages to standard error.")
+    print("                      With -e, path of the extracted file, directory of the extracted files, or - for")
+    print("                      standard output. Defaults to the current directory.")
     print("  -p <password>       Password used for encryption/decryption.")
-    print("  -e                  Extraction mode. Extract hidden file from the image.")
+    print("  -b <bits>           Number of least significant bits used in each channel, from 1 to 4. Defaults to 2.")
+    print("  -c <channels>       Channels used to hide the file, any of the letters r, g, b and a (r for grayscale")
+    print("                      images, a for alpha). Defaults to every channel of the image, alpha included.")
+    print("                      Extraction reads both settings from the image.")
+    print("  -z <codec>          Compress the hidden file before encryption: zlib, bz2, lzma, none, or auto to")
+    print("                      skip already compressed data and pick the codec that shrinks a sample the most.")
+    print("  -k <kdf>            Key derivation for the password: scrypt (default) or pbkdf2 with a random salt,")
+    print("                      or md5 for the legacy unsalted key readable by older versions.")
+    print("  -f <version>        Hidden data format: 2 (default) for the indexed container, or 1 for the original")
+    print("                      frames. Extraction detects the format.")
+    print("  -l <level>          zlib compression level of PNG outputs, from 0 (fastest) to 9 (smallest).")
+    print("                      Defaults to the zlib default.")
+    print("  -s                  Scatter the hidden file over the whole image in an order derived from the password,")
+    print("                      instead of the leading rows. Only with a single input image of one frame.")
+    print("  -a                  Add the hidden files to the archive hidden in the input image, keeping its layout")
+    print("                      and password.")
+    print("  -e                  Extraction mode. Extract hidden file from the image, or every file of an archive.")
+    print("  -n <name>           Extract only the file of the archive with this name. Can be repeated.")
+    print("  -t                  List the files of the archive hidden in the image.")
+    print("  --profile <report>  Write the time, throughput and peak memory of every phase to a JSON report.")
     print("  --help              Display usage instructions for the script.")
+    print("Subcommands:")
+    print("  batch               Process many images in parallel. See: python stego.py batch --help")
+    print("  serve               Run a local hide and extraction service. See: python stego.py serve --help")
+    print("  scan                Find the images that carry hidden files. See: python stego.py scan --help")
+    print("  daemon              Keep the libraries loaded and run commands sent by later calls.")
+    print("                      See: python stego.py daemon --help")
     exit()
 
 
-def main():
+def batchUsage():
     """
-    Function to handle command-line arguments and perform hiding or extraction of files in images.
+    Display usage instructions for the batch subcommand.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    print("Usage: python stego.py batch (-m <manifest> | -I <image_dir> [-H <hidden_dir>]) [-d <output_dir>] [-p <password>]")
+    print("                             [-w <workers>] [-r <report>] [-z <codec>] [-e] [--help]")
+    print("Options:")
+    print("  -m <manifest>       CSV file with a header row, or JSON lines file, with one job per row. Fields: input,")
+    print("                      hidden, output, password, mode (hide or extract) and compression. Only input is")
+    print("                      always required.")
+    print("  -I <image_dir>      Directory of input images.")
+    print("  -H <hidden_dir>     Directory of files to hide, paired with the input images in sorted name order.")
+    print("  -d <output_dir>     Directory for output images, or for extracted files in extraction mode. An extract")
+    print("                      job fails instead of overwriting a file of the directory.")
+    print("  -p <password>       Password used for jobs that don't set their own.")
+    print("  -w <workers>        Number of worker processes. Defaults to the number of CPU cores.")
+    print("  -r <report>         Path of the JSON lines result summary. Defaults to batch_report.jsonl.")
+    print("  -z <codec>          Compression for jobs that don't set their own (see python stego.py --help).")
+    print("  -e                  Extraction mode for jobs that don't set their own.")
+    print("  --help              Display usage instructions for the subcommand.")
+    exit()
+
+
+def serveUsage():
+    """
+    Display usage instructions for the serve subcommand.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    import StegoServer
+    print("Usage: python stego.py serve [-H <host>] [-P <port>] [-u <socket>] [-w <workers>] [-q <queue>]")
+    print("                             [-c <connections>] [--help]")
+    print("Options:")
+    print("  -H <host>           Host address to listen on. Defaults to 127.0.0.1.")
+    print("  -P <port>           Port to listen on. Defaults to {}.".format(StegoServer.defaultPort))
+    print("  -u <socket>         Path of a Unix socket to listen on, instead of TCP unless -H or -P is given.")
+    print("  -w <workers>        Number of worker processes. Defaults to the number of CPU cores.")
+    print("  -q <queue>          Number of jobs that can wait for a worker. Further requests are rejected with")
+    print("                      503 until the queue drains. Defaults to {}.".format(StegoServer.defaultQueueSize))
+    print("  -c <connections>    Number of connections served at once. Defaults to {}.".format(
+        StegoServer.defaultMaxConnections))
+    print("  --help              Display usage instructions for the subcommand.")
+    print("Endpoints:")
+    print("  POST /hide          Body: carrier image followed by the file to hide, split at the X-Carrier-Length")
+    print("                      header. Query: name, compression, kdf, version, bits, channels and level.")
+    print("  POST /extract       Body: image. Returns the hidden file, named in the X-Name header.")
+    print("  GET /stats          Queue depth, job counters and latency percentiles as JSON.")
+    print("                      Passwords are sent in the X-Password header.")
+    exit()
+
+
+def scanUsage():
+    """
+    Display usage instructions for the scan subcommand.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    print("Usage: python stego.py scan [-o <report>] [-c <checkpoint>] [-w <workers>] [-a] [--help] <path>...")
+    print("Options:")
+    print("  <path>              Image file, or directory scanned recursively for images.")
+    print("  -o <report>         Path of the JSON lines report, appended to when resuming. Defaults to the")
+    print("                      standard output.")
+    print("  -c <checkpoint>     Path of a file recording the scanned images. An interrupted scan run again with")
+    print("                      the same checkpoint skips them.")
+    print("  -w <workers>        Number of worker processes. Defaults to the number of CPU cores.")
+    print("  -a                  Report every image, not only those carrying hidden files or failing to open.")
+    print("  --help              Display usage instructions for the subcommand.")
+    print("Only the header pixels of every image are decoded. Each report line holds the path, whether the")
+    print("hidden file is encrypted and its declared name and data sizes, or an error.")
+    exit()
+
+
+def defaultOutputPath(inputImagePath: str) -> str:
+    """
+    Build the default output image path: the input path with a _steg suffix, saved as a PNG
+    unless the input is a raw image that is modified through a memory map or a multi-page TIFF.
+    Images read from standard input are written to standard output.
+
+    Parameters:
+        inputImagePath (str): Path to the input image file.
+
+    Returns:
+        str: Path to the output image file.
+    """
+    import StegoRaw, StegoFrames
+    if inputImagePath == standardStream:
+        return standardStream
+    root, extension = os.path.splitext(inputImagePath)
+    keepExtension = StegoRaw.rawLayout(inputImagePath) or StegoFrames.isMultiPage(inputImagePath)
+    return root + "_steg" + (extension if keepExtension else ".png")
+
+
+def outputPathError(inputImagePath: str, outputImagePath: str) -> str:
+    """
+    Check that an output image path has the format the input image is saved in.
+    Images written to standard output are PNG files, which raw input images cannot be turned into.
 
     Parameters:
+        inputImagePath (str): Path to the input image file.
+        outputImagePath (str): Path to the output image file.
+
+    Returns:
+        str: Why the output path cannot be used, or None if it can.
+    """
+    import StegoRaw, StegoFrames
+    if inputImagePath == standardStream:
+        if outputImagePath != standardStream and not outputImagePath.endswith(".png"):
+            return "Output image should be a PNG."
+    elif StegoRaw.rawLayout(inputImagePath):
+        if outputImagePath == standardStream:
+            return "Raw input images can only be saved to a file."
+        if os.path.splitext(outputImagePath)[1].lower() != os.path.splitext(inputImagePath)[1].lower():
+            return "Output image should be in the same format as the raw input image."
+    elif outputImagePath == standardStream:
+        return None
+    elif StegoFrames.isMultiPage(inputImagePath):
+        if os.path.splitext(outputImagePath)[1].lower() not in (".tif", ".tiff"):
+            return "Output image should be a TIFF, like the multi-page input image."
+    elif not outputImagePath.endswith(".png"):
+        return "Output image should be a PNG."
+    return None
+
+
+def checkOutputPath(inputImagePath: str, outputImagePath: str):
+    """
+    Check that an output image path has the format the input image is saved in (see outputPathError),
+    and exit if it does not.
+
+    Parameters:
+        inputImagePath (str): Path to the input image file.
+        outputImagePath (str): Path to the output image file.
+
+    Returns:
         None
+    """
+    error = outputPathError(inputImagePath, outputImagePath)
+    if error:
+        print("[!] {}".format(error))
+        exit()
+
+
+def parseChannelMask(channels: str) -> int:
+    """
+    Convert channel letters into a channel mask: r selects bit 0, g bit 1, b bit 2 and a bit 3.
+
+    Parameters:
+        channels (str): Letters of the channels, for example "rb".
+
+    Returns:
+        int: The channel mask.
+    """
+    if not channels or set(channels.lower()) - set("rgba"):
+        raise ValueError("channels should be any of the letters r, g, b and a")
+    return sum(1 << "rgba".index(letter) for letter in set(channels.lower()))
+
+
+def checkCompression(compression: str) -> str:
+    """
+    Check that a compression mode is known.
+
+    Parameters:
+        compression (str): Codec name or "auto".
+
+    Returns:
+        str: The compression mode.
+    """
+    import StegoCompress
+    if compression not in StegoCompress.compressionModes:
+        raise ValueError("codec should be one of: {}".format(", ".join(StegoCompress.compressionModes)))
+    return compression
+
+
+def checkKdf(kdf: str) -> str:
+    """
+    Check that a key derivation function is known.
+
+    Parameters:
+        kdf (str): Name of the key derivation function.
+
+    Returns:
+        str: The name of the key derivation function.
+    """
+    from StegoAlgorithm import kdfIds
+    if kdf not in kdfIds:
+        raise ValueError("kdf should be one of: {}".format(", ".join(kdfIds)))
+    return kdf
+
+
+def listFiles(directory: str) -> list:
+    """
+    List the regular files of a directory in sorted name order.
+
+    Parameters:
+        directory (str): Path to the directory.
+
+    Returns:
+        list: Paths to the files.
+    """
+    return sorted(entry.path for entry in os.scandir(directory) if entry.is_file())
+
+
+def readManifest(manifestPath: str) -> list:
+    """
+    Read batch jobs from a CSV manifest with a header row or from a JSON lines manifest.
+
+    Parameters:
+        manifestPath (str): Path to the manifest file.
+
+    Returns:
+        list: One dictionary of fields per job.
+    """
+    with open(manifestPath, newline='') as manifest:
+        if manifestPath.lower().endswith(".csv"):
+            return [dict(row) for row in csv.DictReader(manifest)]
+        return [json.loads(line) for line in manifest if line.strip()]
+
+
+def claimExtractedFiles(staging: str, directory: str) -> None:
+    """
+    Move the files extracted by a batch job into the shared output directory without overwriting a file
+    of the directory, such as one extracted by another job. Every name is claimed by creating the file
+    exclusively, so jobs running in parallel cannot take the same name. On a collision, the files moved by
+    the job are removed again.
+
+    Parameters:
+        staging (str): Directory the job extracted its files to.
+        directory (str): Output directory of the job.
 
     Returns:
         None
+
+    Raises:
+        StegoError: If a file with the name of an extracted file already exists in the output directory.
+    """
+    from StegoAlgorithm import StegoError
+    claimed = list()
+    for name in sorted(os.listdir(staging)):
+        target = os.path.join(directory, name)
+        try:
+            os.close(os.open(target, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            for path in claimed:
+                os.remove(path)
+            raise StegoError("{} already exists in {}.".format(name, directory))
+        os.replace(os.path.join(staging, name), target)
+        claimed.append(target)
+
+
+def runJob(job: dict) -> dict:
+    """
+    Run one batch job in a worker process. Messages printed by the algorithm are captured,
+    and errors are recorded in the result instead of stopping the worker.
+
+    Parameters:
+        job (dict): Job with mode, input, hidden, output and password fields.
+
+    Returns:
+        dict: The job without its password, plus status, message and seconds fields.
     """
-    inputImagePath = str()
-    hiddenFilePath = str()
-    outputImagePath = str()
+    from StegoAlgorithm import hideDataToImage, extractDataFromImage, StegoError
+    start = time.perf_counter()
+    log = io.StringIO()
+    result = {key: value for key, value in job.items() if key != "password"}
+    try:
+        with redirect_stdout(log):
+            if job["mode"] == "extract":
+                import tempfile
+                os.makedirs(job["output"], exist_ok=True)
+                # Jobs share their output directory, so files are extracted apart and only then moved into it.
+                with tempfile.TemporaryDirectory(prefix=".extract-", dir=job["output"]) as staging:
+                    extractDataFromImage(job["input"], job["password"], output=staging)
+                    claimExtractedFiles(staging, job["output"])
+            else:
+                error = outputPathError(job["input"], job["output"])
+                if error:
+                    raise StegoError(error)
+                hideDataToImage(job["input"], job["hidden"], job["output"], job["password"],
+                                compression=job["compression"])
+        result["status"] = "ok"
+    except StegoError as err:
+        print("[!] {}".format(err), file=log)
+        result["status"] = "failed"
+    except Exception as err:
+        print("[!] {}: {}".format(type(err).__name__, err), file=log)
+        result["status"] = "failed"
+
+    lines = log.getvalue().splitlines()
+    result["message"] = lines[-1] if lines else str()
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def scanFiles(paths: list, skipped: set):
+    """
+    List the images to scan: the given files, and the files of the given directories, walked recursively,
+    whose extension is an image format that can carry hidden data or that have a raw sidecar.
+
+    Parameters:
+        paths (list): Paths to image files or directories.
+        skipped (set): Absolute paths of images scanned before, which are not listed.
+
+    Yields:
+        str: Absolute path to an image.
+    """
+    from PIL import Image
+    import StegoRaw
+    extensions = set(Image.registered_extensions()) - set(lossyExtensions)
+    for path in paths:
+        if not os.path.isdir(path):
+            path = os.path.abspath(path)
+            if path not in skipped:
+                yield path
+            continue
+        for directory, directories, files in os.walk(path):
+            directories.sort()
+            names = set(files)
+            for name in sorted(files):
+                extension = os.path.splitext(name)[1].lower()
+                if extension in extensions or (extension != StegoRaw.sidecarExtension and
+                                               name + StegoRaw.sidecarExtension in names):
+                    filePath = os.path.abspath(os.path.join(directory, name))
+                    if filePath not in skipped:
+                        yield filePath
+
+
+def scanChunk(paths: list) -> list:
+    """
+    Check a chunk of images for hidden files in a worker process. Only the header pixels of every image are decoded,
+    and errors are recorded in the results instead of stopping the worker.
+
+    Parameters:
+        paths (list): Paths to the images.
+
+    Returns:
+        list: One result per image: its path, "hidden", and the header fields listed in scanFields,
+              "layout" with the bits per channel, channel mask and scattering for non-default layouts, or "error".
+              The frame header of scattered images is only readable with the password, so they report the
+              "layout" mode.
+    """
+    from StegoAlgorithm import probeImage
+    results = list()
+    for path in paths:
+        result = {"path": path}
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                header = probeImage(path)
+        except Exception as err:
+            result["error"] = "{}: {}".format(type(err).__name__, err)
+            results.append(result)
+            continue
+
+        result["hidden"] = header is not None
+        if header is not None:
+            result.update((field, header[field]) for field in scanFields if field in header)
+            layout = header["layout"] if "layout" in header else header if header["mode"] == "layout" else None
+            if layout is not None:
+                result["layout"] = {"bitsPerChannel": layout["bitsPerChannel"],
+                                    "channelMask": layout["channelMask"], "scattered": layout["scattered"]}
+        results.append(result)
+    return results
+
+
+def scan(arguments: list):
+    """
+    Function to handle the scan subcommand: check the header pixels of many images on a pool of worker processes
+    and stream a JSON lines report of the images carrying hidden files.
+
+    Parameters:
+        arguments (list): Command-line arguments following the subcommand name.
+
+    Returns:
+        None
+    """
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    reportPath = None
+    checkpointPath = None
+    workers = None
+    reportAll = False
+    try:
+        options, paths = gnu_getopt(arguments, "o:c:w:a", ["help"])
+        for opt, arg in options:
+            if opt == "-o":
+                reportPath = arg
+            elif opt == "-c":
+                checkpointPath = arg
+            elif opt == "-w":
+                workers = int(arg)
+            elif opt == "-a":
+                reportAll = True
+            elif opt == "--help":
+                scanUsage()
+    except (GetoptError, ValueError) as err:
+        print(str(err))
+        scanUsage()
+    if not paths:
+        scanUsage()
+
+    skipped = set()
+    partialLine = False
+    if checkpointPath and os.path.isfile(checkpointPath):
+        with open(checkpointPath) as checkpoint:
+            for line in checkpoint:
+                # A line cut short by an interrupted write is not a scanned image.
+                partialLine = not line.endswith("\n")
+                if not partialLine:
+                    skipped.add(line[:-1])
+    log = stderr if reportPath is None else stdout
+    if skipped:
+        print("[*] Resuming: {} images were scanned before.".format(len(skipped)), file=log)
+
+    workers = workers or os.cpu_count() or 1
+    print("[*] Scanning on {} workers.".format(workers), file=log)
+    files = scanFiles(paths, skipped)
+    counts = {"scanned": 0, "hidden": 0, "failed": 0}
+    report = open(reportPath, "a") if reportPath else nullcontext(stdout)
+    checkpoint = open(checkpointPath, "a") if checkpointPath else nullcontext()
+    with report as reportFile, checkpoint as checkpointFile, ProcessPoolExecutor(workers) as executor:
+        if partialLine:
+            checkpointFile.write("\n")
+        pending = set()
+        while True:
+            # Only a few chunks per worker are in flight, so the directory walk keeps pace with the workers.
+            while len(pending) < workers * scanTasksPerWorker:
+                chunk = [path for _, path in zip(range(scanChunkSize), files)]
+                if not chunk:
+                    break
+                pending.add(executor.submit(scanChunk, chunk))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results = future.result()
+                for result in results:
+                    counts["scanned"] += 1
+                    counts["hidden"] += bool(result.get("hidden"))
+                    counts["failed"] += "error" in result
+                    if reportAll or result.get("hidden") or "error" in result:
+                        reportFile.write(json.dumps(result) + "\n")
+                reportFile.flush()
+                if checkpointFile is not None:
+                    checkpointFile.writelines(result["path"] + "\n" for result in results)
+                    checkpointFile.flush()
+
+    print("[*] {} images scanned: {} carry hidden files, {} could not be read.".format(
+        counts["scanned"], counts["hidden"], counts["failed"]), file=log)
+
+
+def batch(arguments: list):
+    """
+    Function to handle the batch subcommand: build jobs from a manifest or a pair of directories,
+    run them on a pool of worker processes and write a per-job result summary.
+
+    Parameters:
+        arguments (list): Command-line arguments following the subcommand name.
+
+    Returns:
+        None
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    manifestPath = str()
+    imageDirectory = str()
+    hiddenDirectory = str()
+    outputDirectory = str()
     password = str()
+    workers = None
+    reportPath = "batch_report.jsonl"
+    compression = None
     extractionMode = False
     try:
-        options, _ = getopt(argv[1:], "i:h:o:p:e", ["help"])
+        options, _ = getopt(arguments, "m:I:H:d:p:w:r:z:e", ["help"])
+        for opt, arg in options:
+            if opt == "-m":
+                manifestPath = arg
+            elif opt == "-I":
+                imageDirectory = arg
+            elif opt == "-H":
+                hiddenDirectory = arg
+            elif opt == "-d":
+                outputDirectory = arg
+            elif opt == "-p":
+                password = arg
+            elif opt == "-w":
+                workers = int(arg)
+            elif opt == "-r":
+                reportPath = arg
+            elif opt == "-z":
+                compression = checkCompression(arg)
+            elif opt == "-e":
+                extractionMode = True
+            elif opt == "--help":
+                batchUsage()
+    except (GetoptError, ValueError) as err:
+        print(str(err))
+        batchUsage()
+
+    if manifestPath:
+        jobs = readManifest(manifestPath)
+    elif imageDirectory and (extractionMode or hiddenDirectory):
+        imagePaths = listFiles(imageDirectory)
+        hiddenPaths = listFiles(hiddenDirectory) if hiddenDirectory else [str()] * len(imagePaths)
+        jobs = [{"input": imagePath, "hidden": hiddenPath} for imagePath, hiddenPath in zip(imagePaths, hiddenPaths)]
+    else:
+        batchUsage()
+
+    for job in jobs:
+        job["mode"] = job.get("mode") or ("extract" if extractionMode else "hide")
+        job["password"] = job.get("password") or password
+        job["input"] = os.path.abspath(job["input"])
+        if job["mode"] == "extract":
+            job["output"] = os.path.abspath(job.get("output") or outputDirectory or os.getcwd())
+            continue
+        job["hidden"] = os.path.abspath(job.get("hidden") or str())
+        job["compression"] = job.get("compression") or compression
+        if not job.get("output"):
+            outputName = os.path.basename(defaultOutputPath(job["input"]))
+            job["output"] = os.path.join(outputDirectory or os.path.dirname(job["input"]), outputName)
+        job["output"] = os.path.abspath(job["output"])
+    if outputDirectory:
+        os.makedirs(outputDirectory, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    print("[*] Running {} jobs on {} workers.".format(len(jobs), workers))
+    succeeded = 0
+    with open(reportPath, "w") as report, ProcessPoolExecutor(workers) as executor:
+        for result in executor.map(runJob, jobs, chunksize=max(1, min(16, len(jobs) // (workers * 4)))):
+            report.write(json.dumps(result) + "\n")
+            if result["status"] == "ok":
+                succeeded += 1
+                print("[+] {}: done in {} s.".format(result["input"], result["seconds"]))
+            else:
+                print("[!] {}: {}".format(result["input"], result["message"]))
+
+    print("[*] {} jobs succeeded, {} failed. Summary written to {}.".format(succeeded, len(jobs) - succeeded, reportPath))
+
+
+def serve(arguments: list):
+    """
+    Function to handle the serve subcommand: run the local service until it is interrupted.
+
+    Parameters:
+        arguments (list): Command-line arguments following the subcommand name.
+
+    Returns:
+        None
+    """
+    import StegoServer
+    host = None
+    port = None
+    socketPath = None
+    workers = None
+    queueSize = StegoServer.defaultQueueSize
+    maxConnections = StegoServer.defaultMaxConnections
+    try:
+        options, _ = getopt(arguments, "H:P:u:w:q:c:", ["help"])
+        for opt, arg in options:
+            if opt == "-H":
+                host = arg
+            elif opt == "-P":
+                port = int(arg)
+            elif opt == "-u":
+                socketPath = arg
+            elif opt == "-w":
+                workers = int(arg)
+            elif opt == "-q":
+                queueSize = max(1, int(arg))
+            elif opt == "-c":
+                maxConnections = max(1, int(arg))
+            elif opt == "--help":
+                serveUsage()
+    except (GetoptError, ValueError) as err:
+        print(str(err))
+        serveUsage()
+
+    if port is not None and host is None:
+        host = StegoServer.defaultHost
+    StegoServer.serve(host, port, socketPath, workers, queueSize, maxConnections)
+
+
+def daemonUsage():
+    """
+    Display usage instructions for the daemon subcommand.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    print("Usage: python stego.py daemon [-u <socket>] [--help]")
+    print("Options:")
+    print("  -u <socket>         Path of the Unix socket to listen on. Defaults to ${}, or to".format(
+        StegoDaemon.socketVariable))
+    print("                      stego-<uid>.sock in the temporary directory.")
+    print("  --help              Display usage instructions for the subcommand.")
+    print("The daemon keeps the interpreter and libraries loaded. While ${} holds the path of its socket,".format(
+        StegoDaemon.socketVariable))
+    print("every other command is sent to it and run in a forked copy of the daemon, with the working directory,")
+    print("environment and standard streams of the caller. Commands run locally when no daemon is listening.")
+    exit()
+
+
+def daemon(arguments: list):
+    """
+    Function to handle the daemon subcommand: load the libraries and code paths used by commands,
+    then run commands sent over a Unix socket until the daemon is interrupted.
+
+    Parameters:
+        arguments (list): Command-line arguments following the subcommand name.
+
+    Returns:
+        None
+    """
+    socketPath = None
+    try:
+        options, _ = getopt(arguments, "u:", ["help"])
+        for opt, arg in options:
+            if opt == "-u":
+                socketPath = arg
+            elif opt == "--help":
+                daemonUsage()
     except GetoptError as err:
+        print(str(err))
+        daemonUsage()
+    if not StegoDaemon.isSupported():
+        print("[!] The daemon is only supported on Unix.")
+        exit()
+
+    import numpy as np
+    from PIL import Image
+    import StegoAlgorithm, StegoCompress, StegoRaw, StegoFrames
+    Image.init()
+    with redirect_stdout(io.StringIO()):
+        StegoAlgorithm.extract(StegoAlgorithm.hide(np.zeros((16, 16, 3), dtype=np.uint8), b"warm", "warm", "warm"),
+                               "warm")
+    StegoDaemon.serve(socketPath or StegoDaemon.defaultSocketPath(), main)
+
+
+def main(arguments: list = None):
+    """
+    Function to handle command-line arguments and perform hiding or extraction of files in images.
+    Commands run from the command line are sent to the daemon listening on the socket named by $STEGO_DAEMON,
+    if any.
+
+    Parameters:
+        arguments (list): Command-line arguments, without the script name. Defaults to those of the process.
+
+    Returns:
+        None
+    """
+    if arguments is None:
+        arguments = argv[1:]
+        socketPath = os.environ.get(StegoDaemon.socketVariable)
+        if socketPath and arguments[:1] != ["daemon"] and StegoDaemon.isSupported():
+            status = StegoDaemon.runRemote(socketPath, arguments)
+            if status is not None:
+                exit(status)
+
+    inputImagePaths = list()
+    hiddenFilePaths = list()
+    outputImagePaths = list()
+    password = str()
+    bitsPerChannel = 2
+    channelMask = None
+    compression = None
+    kdf = "scrypt"
+    version = 2
+    compressLevel = -1
+    scatter = False
+    appendMode = False
+    memberNames = list()
+    profilePath = None
+    extractionMode = False
+    listMode = False
+    if arguments[:1] == ["batch"]:
+        batch(arguments[1:])
+        return
+    elif arguments[:1] == ["serve"]:
+        serve(arguments[1:])
+        return
+    elif arguments[:1] == ["scan"]:
+        scan(arguments[1:])
+        return
+    elif arguments[:1] == ["daemon"]:
+        daemon(arguments[1:])
+        return
+
+    try:
+        options, _ = getopt(arguments, "i:h:o:p:b:c:z:k:f:l:saen:t", ["help", "profile="])
+        for opt, arg in options:
+            if opt == "-i":
+                inputImagePaths.append(arg)
+            elif opt == "-h":
+                hiddenFilePaths.append(arg)
+            elif opt == "-o":
+                outputImagePaths.append(arg)
+            elif opt == "-p":
+                password = arg
+            elif opt == "-b":
+                bitsPerChannel = int(arg)
+            elif opt == "-c":
+                channelMask = parseChannelMask(arg)
+            elif opt == "-z":
+                compression = checkCompression(arg)
+            elif opt == "-k":
+                kdf = checkKdf(arg)
+            elif opt == "-f":
+                version = int(arg)
+                if version not in (1, 2):
+                    raise ValueError("version should be 1 or 2")
+            elif opt == "-l":
+                compressLevel = int(arg)
+                if not 0 <= compressLevel <= 9:
+                    raise ValueError("level should be from 0 to 9")
+            elif opt == "-s":
+                scatter = True
+            elif opt == "-a":
+                appendMode = True
+            elif opt == "-n":
+                memberNames.append(arg)
+            elif opt == "-t":
+                listMode = True
+            elif opt == "-e":
+                extractionMode = True
+            elif opt == "--profile":
+                profilePath = arg
+            elif opt == "--help":
+                usage()
+    except (GetoptError, ValueError) as err:
         print(str(err))
         usage()
-    
-    for opt, arg in options:
-        if opt == "-i":
-            inputImagePath = arg
-        elif opt == "-h":
-            hiddenFilePath = arg
-        elif opt == "-o":
-            outputImagePath = arg
-        elif opt == "-p":
-            password = arg
-        elif opt == "-e":
-            extractionMode = True
-        elif opt == "--help":
+
+    if not (extractionMode or listMode) and not outputImagePaths:
+        outputImagePaths = [defaultOutputPath(inputImagePath) for inputImagePath in inputImagePaths]
+    from StegoAlgorithm import StegoProfiler, StegoError
+    profiler = StegoProfiler() if profilePath else None
+    # Messages go to standard error while standard output carries an image or an extracted file.
+    with redirect_stdout(stderr) if standardStream in outputImagePaths else nullcontext():
+        try:
+            with profiler or nullcontext():
+                run(inputImagePaths, hiddenFilePaths, outputImagePaths, password, bitsPerChannel, channelMask,
+                    compression, kdf, version, compressLevel, scatter, appendMode, extractionMode, memberNames,
+                    listMode, profiler)
+        except StegoError as err:
+            print("[!] {}".format(err))
+            exit()
+
+        if profiler is not None:
+            with open(profilePath, "w") as profileFile:
+                operation = "extract" if extractionMode else "list" if listMode else "hide"
+                hidden = hiddenFilePaths[0] if len(hiddenFilePaths) == 1 else hiddenFilePaths or None
+                json.dump(profiler.report(operation=operation, inputs=inputImagePaths, hidden=hidden,
+                                          outputs=outputImagePaths), profileFile, indent=2)
+            print("[*] Profile written to {}.".format(profilePath))
+
+
+def pipe(path: str, stream):
+    """
+    Replace the - path by a standard stream.
+
+    Parameters:
+        path (str): Path given on the command line.
+        stream (file): Binary standard stream standing for -.
+
+    Returns:
+        str | file: The path, or the stream.
+    """
+    return stream if path == standardStream else path
+
+
+def inputImage(inputImagePath: str):
+    """
+    Read the input image from standard input for the - path. The image is held in memory, and only its first frame
+    is used.
+
+    Parameters:
+        inputImagePath (str): Path to the input image file.
+
+    Returns:
+        str | bytes: The path, or the encoded image.
+    """
+    return stdin.buffer.read() if inputImagePath == standardStream else inputImagePath
+
+
+def run(inputImagePaths: list, hiddenFilePaths: list, outputImagePaths: list, password: str, bitsPerChannel: int,
+        channelMask: int, compression: str, kdf: str, version: int, compressLevel: int, scatter: bool,
+        appendMode: bool, extractionMode: bool, memberNames: list, listMode: bool, observer: "StegoObserver"):
+    """
+    Function to perform hiding or extraction of files in images with the parsed command-line arguments.
+
+    Parameters:
+        See main. The observer receives the measurements of every phase, or is None.
+
+    Returns:
+        None
+    """
+    from StegoAlgorithm import listArchive, extractDataFromImage, extractDataFromImages, extractFilesFromImage, \
+        appendFilesToImage, hideFilesToImage, hideDataToImage, hideDataToImages
+    if (inputImagePaths + hiddenFilePaths).count(standardStream) > 1:
+        print("[!] Standard input can only be read once.")
+    elif standardStream in inputImagePaths + hiddenFilePaths + outputImagePaths and len(inputImagePaths) > 1:
+        print("[!] Standard input and output can only be used with a single input image.")
+    elif standardStream in hiddenFilePaths and (appendMode or len(hiddenFilePaths) > 1):
+        print("[!] Standard input can only be hidden alone, not in an archive.")
+    elif listMode:
+        if len(inputImagePaths) != 1:
             usage()
-            
-    if extractionMode:
-        if not inputImagePath:
+        entries = listArchive(inputImage(inputImagePaths[0]), password, observer)
+        print("[+] Archive of {} files found in image.".format(len(entries)))
+        for entry in entries:
+            print("[*] {}: {} bytes, stored in {} bytes ({}).".format(entry["name"], entry["size"],
+                                                                     entry["storedSize"], entry["codec"]))
+    elif extractionMode:
+        output = pipe(outputImagePaths[0], stdout.buffer) if outputImagePaths else None
+        if not inputImagePaths or len(outputImagePaths) > 1:
             usage()
+        elif len(inputImagePaths) > 1:
+            extractDataFromImages(inputImagePaths, password, observer=observer, output=output)
+        elif memberNames:
+            extractFilesFromImage(inputImage(inputImagePaths[0]), password, memberNames, observer, output)
         else: 
-            extractDataFromImage(inputImagePath, password)
+            extractDataFromImage(inputImage(inputImagePaths[0]), password, observer, output)
     else:
-        if not (inputImagePath and hiddenFilePath):
+        if not (inputImagePaths and hiddenFilePaths) or len(outputImagePaths) != len(inputImagePaths):
             usage()
+        elif scatter and len(inputImagePaths) > 1:
+            print("[!] Scattering is only supported with a single input image.")
+        elif (appendMode or len(hiddenFilePaths) > 1) and len(inputImagePaths) > 1:
+            print("[!] Archives are only supported with a single input image.")
         else:
-            if not outputImagePath:
-                outputImagePath = "".join(inputImagePath.split(".")[:-1]) + "_steg.png"
-            if not outputImagePath.endswith(".png"):
-                print("[!] Output image should be a PNG.")
-                exit()
-            hideDataToImage(inputImagePath, hiddenFilePath, outputImagePath, password)
+            for inputImagePath, outputImagePath in zip(inputImagePaths, outputImagePaths):
+                checkOutputPath(inputImagePath, outputImagePath)
+            output = pipe(outputImagePaths[0], stdout.buffer)
+            if appendMode:
+                appendFilesToImage(inputImage(inputImagePaths[0]), hiddenFilePaths, output, password,
+                                   compression=compression, compressLevel=compressLevel, observer=observer)
+            elif len(hiddenFilePaths) > 1:
+                hideFilesToImage(inputImage(inputImagePaths[0]), hiddenFilePaths, output, password,
+                                 bitsPerChannel=bitsPerChannel, channelMask=channelMask, compression=compression,
+                                 kdf=kdf, compressLevel=compressLevel, scatter=scatter, observer=observer)
+            elif len(inputImagePaths) > 1:
+                hideDataToImages(inputImagePaths, hiddenFilePaths[0], outputImagePaths, password,
+                                 bitsPerChannel=bitsPerChannel, channelMask=channelMask, compression=compression,
+                                 kdf=kdf, version=version, compressLevel=compressLevel, observer=observer)
+            else:
+                hideDataToImage(inputImage(inputImagePaths[0]), pipe(hiddenFilePaths[0], stdin.buffer), output, password,
+                                bitsPerChannel=bitsPerChannel, channelMask=channelMask, compression=compression,
+                                kdf=kdf, version=version, compressLevel=compressLevel, scatter=scatter,
+                                observer=observer)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,654 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from urllib.parse import urlsplit, parse_qsl, urlencode, quote, unquote
+import multiprocessing, http.client, asyncio, socket, json, time, sys, os
+import StegoAlgorithm
+from StegoAlgorithm import StegoError, PayloadTooLargeError, hide, extract
+
+
+defaultHost = "127.0.0.1"
+defaultPort = 8765
+# Jobs waiting for a worker. Requests arriving while the queue is full are rejected with 503 before their body is read.
+defaultQueueSize = 64
+# Connections served at once. Further connections are accepted, but their requests are not read until one of the
+# served connections is closed.
+defaultMaxConnections = 128
+maxBodySize = 1 << 28
+maxHeaderSize = 1 << 16
+# Number of most recent jobs of each operation that latency percentiles are computed from.
+latencyWindow = 1024
+latencyPercentiles = (50, 90, 99)
+# HTTP status of every exception type raised by a job. Other StegoError subclasses are reported as 422.
+errorStatus = {"NoHiddenDataError": 404, "InvalidPasswordError": 403, "PayloadTooLargeError": 422,
+               "StegoError": 422, "ServerBusyError": 503}
+statusReasons = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+                 413: "Content Too Large", 422: "Unprocessable Content", 500: "Internal Server Error",
+                 503: "Service Unavailable"}
+# Query parameters of a hide request and the hide() arguments they are converted to.
+hideOptions = {"name": ("name", str), "compression": ("compression", str), "kdf": ("kdf", str),
+               "version": ("version", int), "bits": ("bitsPerChannel", int), "channels": ("channelMask", int),
+               "level": ("compressLevel", int),
+               "scatter": ("scatter", lambda value: value.lower() in ("1", "true"))}
+
+
+class ServerBusyError(StegoError):
+    """
+    Raised by StegoClient when the job queue of the server is full. The request can be retried later.
+    """
+
+
+def initWorker() -> None:
+    """
+    Function to initialize a worker process of the pool. The messages printed by the algorithm are discarded.
+
+    Parameters:
+    None
+
+    Returns:
+    None
+    """
+    sys.stdout = open(os.devnull, "w")
+
+
+def warmWorker() -> int:
+    """
+    Function to hide and extract a few bytes in a tiny image, so that the modules and code paths used by jobs
+    are loaded before the first request.
+
+    Parameters:
+    None
+
+    Returns:
+    int: Process ID of the worker.
+    """
+    import numpy as np
+    extract(hide(np.zeros((16, 16, 3), dtype=np.uint8), b"warm", "warm"))
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def hideJob(carrier: bytes, payload: bytes, password: str, options: dict) -> bytes:
+    """
+    Function to run a hide job in a worker process.
+
+    Parameters:
+    carrier (bytes): Encoded carrier image.
+    payload (bytes): Data to hide.
+    password (str): Password used for encryption. Empty for no encryption.
+    options (dict): Other arguments of hide().
+
+    Returns:
+    bytes: The PNG image with hidden data.
+    """
+    return hide(carrier, payload, password=password, **options)
+
+
+def extractJob(image: bytes, password: str) -> tuple:
+    """
+    Function to run an extraction job in a worker process.
+
+    Parameters:
+    image (bytes): Encoded image with hidden data.
+    password (str): Password used for decryption.
+
+    Returns:
+    tuple: Name of the hidden file (str) and its data (bytes).
+    """
+    return extract(image, password)
+
+
+class LatencyWindow:
+    """
+    Latencies of the most recent jobs of one operation, in seconds.
+    """
+
+    def __init__(self, size: int = latencyWindow):
+        self.total = deque(maxlen=size)
+        self.wait = deque(maxlen=size)
+
+    def add(self, total: float, wait: float) -> None:
+        self.total.append(total)
+        self.wait.append(wait)
+
+    @staticmethod
+    def percentiles(samples) -> dict:
+        """
+        Function to compute nearest-rank percentiles of a set of samples.
+
+        Parameters:
+        samples (iterable): Latencies in seconds.
+
+        Returns:
+        dict: "p50", "p90", "p99" and "max" in milliseconds, or None for no samples.
+        """
+        ordered = sorted(samples)
+        if not ordered:
+            return None
+        result = {"p{}".format(percent): round(ordered[min(len(ordered) - 1, -(-len(ordered) * percent // 100) - 1)]
+                                               * 1000, 3) for percent in latencyPercentiles}
+        result["max"] = round(ordered[-1] * 1000, 3)
+        return result
+
+    def report(self) -> dict:
+        return {"count": len(self.total), "latency": self.percentiles(self.total),
+                "queueWait": self.percentiles(self.wait)}
+
+
+class StegoService:
+    """
+    Local HTTP/1.1 service running hide and extraction jobs on a warm pool of worker processes.
+
+    Endpoints:
+    POST /hide       Body: the carrier image followed by the data to hide, split at the X-Carrier-Length header.
+                     Query parameters: name, compression, kdf, version, bits, channels (mask) and level.
+                     Returns the PNG image with hidden data.
+    POST /extract    Body: the image. Returns the hidden data, with its file name in the X-Name header.
+    GET /stats       Returns the queue depth, job counters and latency percentiles as JSON.
+    The password is sent in the X-Password header. Errors are returned as JSON objects with "error", the name
+    of the exception type, and "message".
+    """
+
+    def __init__(self, workers: int = None, queueSize: int = defaultQueueSize,
+                 maxConnections: int = defaultMaxConnections):
+        self.workers = workers or os.cpu_count() or 1
+        self.queueSize = queueSize
+        self.maxConnections = maxConnections
+        self.pool = None
+        self.queue = None
+        self.slots = None
+        self.dispatchers = list()
+        self.servers = list()
+        self.handlers = dict()
+        self.busy = set()
+        self.pending = set()
+        self.closing = False
+        self.port = None
+        self.socketPath = None
+        self.connections = 0
+        self.running = 0
+        self.counters = {"completed": 0, "failed": 0, "rejected": 0}
+        self.latencies = {"hide": LatencyWindow(), "extract": LatencyWindow()}
+        self.started = time.monotonic()
+
+    async def start(self, host: str = None, port: int = None, socketPath: str = None) -> None:
+        """
+        Function to start the worker pool and listen for connections.
+
+        Parameters:
+        host (str): Host address of the TCP listener, or None.
+        port (int): Port of the TCP listener. 0 picks a free port (see the port attribute).
+        socketPath (str): Path of the Unix socket listener, or None.
+
+        Returns:
+        None
+        """
+        await self.startPool()
+        self.queue = asyncio.Queue(self.queueSize)
+        self.dispatchers = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+        self.slots = asyncio.Semaphore(self.maxConnections)
+
+        if socketPath:
+            if os.path.exists(socketPath):
+                os.remove(socketPath)
+            self.servers.append(await asyncio.start_unix_server(self.handleConnection, socketPath,
+                                                                limit=maxHeaderSize))
+        if host is not None or not socketPath:
+            server = await asyncio.start_server(self.handleConnection, host or defaultHost,
+                                                defaultPort if port is None else port, limit=maxHeaderSize)
+            self.port = server.sockets[0].getsockname()[1]
+            self.servers.append(server)
+        self.socketPath = socketPath
+
+    async def startPool(self) -> None:
+        """
+        Function to start a new pool of worker processes and warm every worker up (see warmWorker).
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        loop = asyncio.get_running_loop()
+        self.pool = ProcessPoolExecutor(self.workers, multiprocessing.get_context("spawn"), initializer=initWorker)
+        await asyncio.gather(*(loop.run_in_executor(self.pool, warmWorker) for _ in range(self.workers)))
+
+    async def close(self) -> None:
+        """
+        Function to stop listening, fail the queued and running jobs, close the open connections once their
+        responses are written, and shut the worker pool down.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        for server in self.servers:
+            server.close()
+        for future in self.pending:
+            if not future.done():
+                future.set_exception(ServerBusyError("Service is shutting down."))
+        self.closing = True
+        for task, writer in self.handlers.items():
+            if task not in self.busy:
+                writer.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        for server in self.servers:
+            await server.wait_closed()
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        if self.servers and self.socketPath and os.path.exists(self.socketPath):
+            os.remove(self.socketPath)
+
+    async def dispatch(self) -> None:
+        """
+        Function to run queued jobs on the worker pool, one at a time. One dispatcher runs per worker process,
+        which limits the number of jobs running at once. If a worker process dies, the jobs running on the pool fail
+        and the first dispatcher to notice replaces the pool with a new one.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            function, arguments, future, queued = await self.queue.get()
+            if future.done():
+                continue
+            self.running += 1
+            started = time.monotonic()
+            pool = self.pool
+            try:
+                result = await loop.run_in_executor(pool, function, *arguments)
+            except BrokenProcessPool as err:
+                if not future.done():
+                    future.set_exception(err)
+                if pool is self.pool and not self.closing:
+                    print("[!] A worker process died. Restarting the worker pool.")
+                    pool.shutdown(wait=False)
+                    await self.startPool()
+            except Exception as err:
+                if not future.done():
+                    future.set_exception(err)
+            else:
+                if not future.done():
+                    future.set_result((result, started - queued))
+            finally:
+                self.running -= 1
+
+    def stats(self) -> dict:
+        """
+        Function to report the state of the service.
+
+        Parameters:
+        None
+
+        Returns:
+        dict: Worker, queue and connection counts, job counters, and latency percentiles of each operation.
+        """
+        return {"workers": self.workers, "queueDepth": self.queue.qsize(), "queueSize": self.queueSize,
+                "running": self.running, "connections": self.connections, "maxConnections": self.maxConnections,
+                **self.counters, "uptime": round(time.monotonic() - self.started, 3),
+                "operations": {operation: window.report() for operation, window in self.latencies.items()}}
+
+    async def submit(self, operation: str, function, *arguments):
+        """
+        Function to queue a job and wait for its result.
+
+        Parameters:
+        operation (str): "hide" or "extract", the latency window of the job.
+        function (callable): Job function run in a worker process.
+        *arguments: Arguments of the job function.
+
+        Returns:
+        object: Result of the job function.
+
+        Raises:
+        ServerBusyError: If the queue is full.
+        StegoError: Raised by the job.
+        """
+        future = asyncio.get_running_loop().create_future()
+        queued = time.monotonic()
+        try:
+            self.queue.put_nowait((function, arguments, future, queued))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise ServerBusyError("Job queue is full.") from None
+        self.pending.add(future)
+        try:
+            result, wait = await future
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            self.pending.discard(future)
+        self.counters["completed"] += 1
+        self.latencies[operation].add(time.monotonic() - queued, wait)
+        return result
+
+    async def handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Function to serve the requests of one connection, which is kept alive until the client closes it
+        or asks to close it.
+
+        Parameters:
+        reader (asyncio.StreamReader): Stream of the connection.
+        writer (asyncio.StreamWriter): Stream of the connection.
+
+        Returns:
+        None
+        """
+        task = asyncio.current_task()
+        self.handlers[task] = writer
+        try:
+            async with self.slots:
+                self.connections += 1
+                try:
+                    while not self.closing and await self.handleRequest(reader, writer):
+                        self.busy.discard(task)
+                finally:
+                    self.connections -= 1
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            del self.handlers[task]
+            self.busy.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def handleRequest(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """
+        Function to read one request, run it and write the response.
+
+        Parameters:
+        reader (asyncio.StreamReader): Stream of the connection.
+        writer (asyncio.StreamWriter): Stream of the connection.
+
+        Returns:
+        bool: True if the connection is kept alive for another request.
+        """
+        head = await reader.readuntil(b"\r\n\r\n")
+        self.busy.add(asyncio.current_task())
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, protocol = lines[0].split(" ")
+            headers = dict((key.strip().lower(), value.strip()) for key, value in
+                           (line.split(":", 1) for line in lines[1:] if line))
+            length = headers.get("content-length", "0")
+            if not length.isdigit():
+                raise ValueError
+            length = int(length)
+        except ValueError:
+            await self.respond(writer, 400, self.errorBody("StegoError", "Malformed request."), close=True)
+            return False
+
+        keepAlive = protocol == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        url = urlsplit(target)
+        routes = {"/hide": "POST", "/extract": "POST", "/stats": "GET"}
+        if url.path not in routes:
+            status, body = 404, self.errorBody("StegoError", "Unknown endpoint.")
+        elif method != routes[url.path]:
+            status, body = 405, self.errorBody("StegoError", "Method not allowed.")
+        elif length > maxBodySize:
+            status, body = 413, self.errorBody("StegoError", "Request body is too large.")
+        elif url.path != "/stats" and self.queue.full():
+            self.counters["rejected"] += 1
+            status, body = 503, self.errorBody("ServerBusyError", "Job queue is full.")
+        else:
+            body = await reader.readexactly(length)
+            status, body, extra = await self.route(url.path, dict(parse_qsl(url.query)), headers, body)
+            await self.respond(writer, status, body, extra, close=self.closing or not keepAlive)
+            return keepAlive
+
+        # The body of a rejected request is not read, so the connection cannot be reused.
+        await self.respond(writer, status, body, {"Retry-After": "1"} if status == 503 else None, close=True)
+        return False
+
+    async def route(self, path: str, query: dict, headers: dict, body: bytes) -> tuple:
+        """
+        Function to run the request of one endpoint.
+
+        Parameters:
+        path (str): Endpoint path.
+        query (dict): Query parameters.
+        headers (dict): Request headers, with lowercase names.
+        body (bytes): Request body.
+
+        Returns:
+        tuple: HTTP status (int), response body (bytes) and extra response headers (dict).
+        """
+        if path == "/stats":
+            return 200, json.dumps(self.stats()).encode(), {"Content-Type": "application/json"}
+
+        password = unquote(headers.get("x-password", ""))
+        try:
+            if path == "/hide":
+                split = int(headers["x-carrier-length"])
+                if not 0 < split <= len(body):
+                    raise ValueError
+                options = {argument: convert(query[key]) for key, (argument, convert) in hideOptions.items()
+                           if key in query}
+                StegoAlgorithm.checkOptions(options.get("compression"), options.get("kdf", "scrypt"),
+                                            options.get("version", StegoAlgorithm.containerVersion))
+            else:
+                split = None
+        except (KeyError, ValueError, StegoError):
+            return 400, self.errorBody("StegoError", "Invalid request parameters."), None
+
+        try:
+            if path == "/hide":
+                image = await self.submit("hide", hideJob, body[:split], body[split:], password, options)
+                return 200, image, {"Content-Type": "image/png"}
+            name, data = await self.submit("extract", extractJob, body, password)
+            return 200, data, {"Content-Type": "application/octet-stream", "X-Name": quote(name)}
+        except StegoError as err:
+            extra = {"capacity": err.capacity} if isinstance(err, PayloadTooLargeError) else {}
+            status = errorStatus.get(type(err).__name__, 422)
+            return status, self.errorBody(type(err).__name__, str(err), **extra), None
+        except Exception as err:
+            return 500, self.errorBody(type(err).__name__, str(err)), None
+
+    @staticmethod
+    def errorBody(error: str, message: str, **extra) -> bytes:
+        return json.dumps({"error": error, "message": message, **extra}).encode()
+
+    @staticmethod
+    async def respond(writer: asyncio.StreamWriter, status: int, body: bytes, headers: dict = None,
+                      close: bool = False) -> None:
+        """
+        Function to write a response. Errors have a JSON body.
+
+        Parameters:
+        writer (asyncio.StreamWriter): Stream of the connection.
+        status (int): HTTP status.
+        body (bytes): Response body.
+        headers (dict): Extra response headers, or None.
+        close (bool): Ask the client to close the connection.
+
+        Returns:
+        None
+        """
+        headers = {"Content-Type": "application/json", **(headers or {}), "Content-Length": str(len(body)),
+                   "Connection": "close" if close else "keep-alive"}
+        head = "HTTP/1.1 {} {}\r\n".format(status, statusReasons.get(status, "")) + \
+               "".join("{}: {}\r\n".format(key, value) for key, value in headers.items()) + "\r\n"
+        writer.write(head.encode("latin-1"))
+        writer.write(body)
+        await writer.drain()
+
+
+def serve(host: str = None, port: int = None, socketPath: str = None, workers: int = None,
+          queueSize: int = defaultQueueSize, maxConnections: int = defaultMaxConnections) -> None:
+    """
+    Function to run the service until it is interrupted.
+
+    Parameters:
+    host (str): Host address of the TCP listener. Defaults to 127.0.0.1 when no Unix socket is given.
+    port (int): Port of the TCP listener. Defaults to 8765.
+    socketPath (str): Path of the Unix socket listener, or None.
+    workers (int): Number of worker processes. Defaults to the number of CPU cores.
+    queueSize (int): Number of jobs that can wait for a worker.
+    maxConnections (int): Number of connections served at once.
+
+    Returns:
+    None
+    """
+    async def run():
+        service = StegoService(workers, queueSize, maxConnections)
+        await service.start(host, port, socketPath)
+        if socketPath:
+            print("[*] Listening on {}.".format(socketPath))
+        if host is not None or not socketPath:
+            print("[*] Listening on http://{}:{}.".format(host or defaultHost, service.port))
+        print("[*] {} workers, queue of {} jobs.".format(service.workers, queueSize))
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("[*] Service stopped.")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    HTTP connection over a Unix socket.
+    """
+
+    def __init__(self, socketPath: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socketPath = socketPath
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socketPath)
+
+
+class StegoClient:
+    """
+    Client of a local StegoService. Errors of the service are raised as the StegoError subclasses
+    raised by the jobs, and a full queue as ServerBusyError. The connection is kept alive between requests.
+    """
+
+    def __init__(self, host: str = defaultHost, port: int = defaultPort, socketPath: str = None,
+                 timeout: float = None):
+        self.host, self.port, self.socketPath, self.timeout = host, port, socketPath, timeout
+        self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None) -> tuple:
+        """
+        Function to send a request and read its response, reconnecting once if the kept-alive connection was closed.
+
+        Parameters:
+        method (str): HTTP method.
+        path (str): Path and query string.
+        body (bytes): Request body, or None.
+        headers (dict): Request headers, or None.
+
+        Returns:
+        tuple: Response body (bytes) and response headers (http.client.HTTPMessage).
+
+        Raises:
+        ServerBusyError: If the job queue of the service is full.
+        StegoError: Raised by the job, or for another error of the service.
+        """
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = UnixHTTPConnection(self.socketPath, self.timeout) if self.socketPath else \
+                    http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body, headers or {})
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (ConnectionError, http.client.BadStatusLine):
+                self.close()
+                if attempt:
+                    raise
+        if response.will_close:
+            self.close()
+        if response.status == 200:
+            return data, response.headers
+
+        try:
+            error = json.loads(data)
+        except ValueError:
+            raise StegoError("Service error {} {}.".format(response.status, response.reason)) from None
+        if error.get("error") == "ServerBusyError":
+            raise ServerBusyError(error["message"])
+        if error.get("error") == "PayloadTooLargeError":
+            raise PayloadTooLargeError(error["message"], error.get("capacity"))
+        errorType = getattr(StegoAlgorithm, error.get("error", ""), None)
+        if not (isinstance(errorType, type) and issubclass(errorType, StegoError)):
+            errorType = StegoError
+        raise errorType(error.get("message", ""))
+
+    def hide(self, carrier: bytes, payload: bytes, name: str = "", password: str = "", **options) -> bytes:
+        """
+        Function to hide data within an encoded image on the service.
+
+        Parameters:
+        carrier (bytes): Encoded carrier image.
+        payload (bytes): Data to hide.
+        name (str): File name recorded with the data.
+        password (str): Password used for encryption. Empty for no encryption.
+        **options: compression, kdf, version, bits, channels (mask), level and scatter (see hideOptions).
+
+        Returns:
+        bytes: The PNG image with hidden data.
+        """
+        query = urlencode({"name": name, **{key: value for key, value in options.items() if value is not None}})
+        headers = {"X-Carrier-Length": str(len(carrier)), "X-Password": quote(password),
+                   "Content-Type": "application/octet-stream"}
+        return self.request("POST", "/hide?" + query, bytes(carrier) + bytes(payload), headers)[0]
+
+    def extract(self, image: bytes, password: str = "") -> tuple:
+        """
+        Function to extract hidden data from an encoded image on the service.
+
+        Parameters:
+        image (bytes): Encoded image with hidden data.
+        password (str): Password used for decryption.
+
+        Returns:
+        tuple: Name of the hidden file (str) and its data (bytes).
+        """
+        data, headers = self.request("POST", "/extract", bytes(image), {"X-Password": quote(password),
+                                                                         "Content-Type": "image/png"})
+        return unquote(headers.get("X-Name", "")), data
+
+    def stats(self) -> dict:
+        """
+        Function to read the state of the service (see StegoService.stats).
+
+        Parameters:
+        None
+
+        Returns:
+        dict: The state of the service.
+        """
+        return json.loads(self.request("GET", "/stats")[0])
@@ -154,3 +154,18 @@ messageBoxStyle = \
         padding: 5px;
     }
 """
+
+progressBarStyle = \
+"""
+    QProgressBar {
+        background-color: #FFFFFF;
+        border: 2px solid #C0C0C0;
+        border-radius: 5px;
+        text-align: center;
+        color: black;
+    }
+    QProgressBar::chunk {
+        background-color: #A0A0A0;
+        border-radius: 3px;
+    }
+"""
\ No newline at end of file
@@ -0,0 +1,73 @@
+import io, struct
+import numpy as np
+from PIL import Image, PngImagePlugin
+
+
+def randomPixels(shape: tuple, dtype=np.uint8, seed: int = 0) -> np.ndarray:
+    """
+    Function to return an array of random pixel values.
+
+    Parameters:
+    shape (tuple): Shape of the array.
+    dtype: Type of the values, 8-bit or 16-bit unsigned.
+    seed (int): Seed of the generator.
+
+    Returns:
+    np.ndarray: The pixels.
+    """
+    return np.random.default_rng(seed).integers(0, np.iinfo(dtype).max + 1, shape, dtype=dtype)
+
+
+def pngChunks(png) -> list:
+    """
+    Function to list the chunk types of a PNG file, in order, with consecutive IDAT chunks counted once.
+
+    Parameters:
+    png (str | bytes): Path to the PNG file, or its bytes.
+
+    Returns:
+    list: Chunk types.
+    """
+    if isinstance(png, str):
+        with open(png, "rb") as pngFile:
+            png = pngFile.read()
+    chunks, offset = list(), 8
+    while offset < len(png):
+        length, chunkType = struct.unpack(">I4s", png[offset:offset + 8])
+        if not (chunkType == b"IDAT" and chunks[-1:] == [b"IDAT"]):
+            chunks.append(chunkType)
+        offset += 12 + length
+    return chunks
+
+
+def renderingInfo() -> PngImagePlugin.PngInfo:
+    """
+    Function to return PNG chunks describing how an image is rendered: gamma, chromaticities and a text chunk.
+
+    Parameters:
+    None
+
+    Returns:
+    PngImagePlugin.PngInfo: Chunks to pass to Image.save.
+    """
+    info = PngImagePlugin.PngInfo()
+    info.add(b"gAMA", struct.pack(">I", 45455))
+    info.add(b"cHRM", struct.pack(">8I", 31270, 32900, 64000, 33000, 30000, 60000, 15000, 6000))
+    info.add_text("Comment", "carrier")
+    return info
+
+
+def encodePng(pixels: np.ndarray, **options) -> bytes:
+    """
+    Function to encode pixels as a PNG file with Pillow.
+
+    Parameters:
+    pixels (np.ndarray): 8-bit pixels of shape (height, width, channels).
+    options: Options of Image.save, such as icc_profile, transparency or pnginfo.
+
+    Returns:
+    bytes: The PNG file.
+    """
+    output = io.BytesIO()
+    Image.fromarray(pixels).save(output, format="PNG", **options)
+    return output.getvalue()
@@ -0,0 +1,17 @@
+import pytest
+import numpy as np
+from StegoAlgorithm import hide, extract, StegoError
+from helpers import randomPixels
+
+
+@pytest.mark.parametrize("options", [{"kdf": "nope"}, {"compression": "nope"}, {"version": 7}])
+def testUnknownOptionsAreRejected(options):
+    with pytest.raises(StegoError):
+        hide(randomPixels((20, 30, 3)), b"data", password="secret", **options)
+
+
+def testArrayRoundTrip():
+    carrier = randomPixels((20, 30, 3))
+    image = hide(carrier, b"data", name="data.txt", password="secret")
+    assert image.shape == carrier.shape and np.any(image != carrier)
+    assert extract(image, password="secret") == ("data.txt", b"data")
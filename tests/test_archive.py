@@ -0,0 +1,66 @@
+import os
+import pytest
+import numpy as np
+from PIL import Image
+from StegoAlgorithm import (hideFilesToImage, appendFilesToImage, listArchive, extractFilesFromImage,
+                            NoHiddenDataError, InvalidPasswordError, CorruptedDataError, StegoError)
+from helpers import randomPixels
+from test_formats import tamper
+
+
+def writeFiles(directory, files: dict) -> list:
+    """
+    Function to write files to a directory.
+
+    Parameters:
+    directory (pathlib.Path): The directory.
+    files (dict): Data of the files by name.
+
+    Returns:
+    list: Paths to the files, in the order of the dict.
+    """
+    for name, data in files.items():
+        (directory / name).write_bytes(data)
+    return [str(directory / name) for name in files]
+
+
+@pytest.mark.parametrize("password", ["", "secret"])
+def testArchiveCycle(tmp_path, password):
+    files = {"notes.txt": b"notes " * 1000, "random.bin": os.urandom(150000), "empty.txt": b""}
+    added = {"report.bin": os.urandom(70000)}
+    carrier, archive, appended = (str(tmp_path / name) for name in ("carrier.png", "archive.png", "appended.png"))
+    Image.fromarray(randomPixels((600, 600, 3))).save(carrier)
+
+    hideFilesToImage(carrier, writeFiles(tmp_path, files), archive, password, compression="zlib")
+    assert [entry["name"] for entry in listArchive(archive, password)] == list(files)
+    appendFilesToImage(archive, writeFiles(tmp_path, added), appended, password)
+    entries = listArchive(appended, password)
+    assert [(entry["name"], entry["size"]) for entry in entries] == \
+        [(name, len(data)) for name, data in {**files, **added}.items()]
+
+    extracted = tmp_path / "extracted"
+    extractFilesFromImage(appended, password, names=["report.bin", "notes.txt"], output=str(extracted))
+    assert sorted(os.listdir(extracted)) == ["notes.txt", "report.bin"]
+    extractFilesFromImage(appended, password, output=str(extracted))
+    for name, data in {**files, **added}.items():
+        assert (extracted / name).read_bytes() == data
+
+
+def testArchiveErrors(tmp_path):
+    carrier, archive = str(tmp_path / "carrier.png"), str(tmp_path / "archive.png")
+    Image.fromarray(randomPixels((600, 600, 3))).save(carrier)
+    paths = writeFiles(tmp_path, {"notes.txt": b"notes", "random.bin": os.urandom(150000)})
+    hideFilesToImage(carrier, paths, archive, "secret")
+
+    with pytest.raises(InvalidPasswordError):
+        listArchive(archive, "wrong")
+    with pytest.raises(NoHiddenDataError):
+        extractFilesFromImage(archive, "secret", names=["missing.txt"], output=str(tmp_path / "out"))
+    with pytest.raises(StegoError):
+        appendFilesToImage(archive, paths[:1], str(tmp_path / "again.png"), "secret")
+
+    for byte in (2000, 50000, 100000):
+        Image.fromarray(tamper(np.asarray(Image.open(archive)), byte)).save(str(tmp_path / "tampered.png"))
+        with pytest.raises(CorruptedDataError):
+            extractFilesFromImage(str(tmp_path / "tampered.png"), "secret", names=["random.bin"],
+                                  output=str(tmp_path / "out"))
@@ -0,0 +1,36 @@
+import os
+import pytest
+from StegoAlgorithm import hide, extract, compressPayload, chunkSize, PayloadTooLargeError
+from helpers import randomPixels
+
+
+@pytest.mark.parametrize("independent", [True, False])
+def testCompressionStopsAtLimit(independent):
+    read = list()
+
+    def blocks():
+        for index in range(200):
+            read.append(index)
+            yield os.urandom(chunkSize)
+
+    with pytest.raises(PayloadTooLargeError) as error:
+        compressPayload(blocks(), 200 * chunkSize, None, "zlib", independent=independent, limit=10 * chunkSize)
+    assert error.value.capacity == 10 * chunkSize
+    assert len(read) < 50
+
+
+@pytest.mark.parametrize("independent", [True, False])
+def testCompressionWithinLimit(independent):
+    payload = bytes(5 * chunkSize)
+    codec, blocks, size = compressPayload(iter([payload[:chunkSize]] * 5), len(payload), None, "bz2",
+                                          independent=independent, limit=chunkSize)
+    assert codec == "bz2" and sum(len(block) for block in blocks) == size <= chunkSize
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def testIncompressiblePayloadIsRejected(version):
+    with pytest.raises(PayloadTooLargeError):
+        hide(randomPixels((100, 100, 3)), os.urandom(1 << 20), password="secret", compression="lzma",
+             version=version)
+    image = hide(randomPixels((100, 100, 3)), bytes(1 << 20), name="zeros.bin", compression="lzma", version=version)
+    assert extract(image) == ("zeros.bin", bytes(1 << 20))
@@ -0,0 +1,35 @@
+import os
+import pytest
+from StegoAlgorithm import hide, extract, CorruptedDataError, InvalidPasswordError, kdfIds
+from StegoCompress import compressionModes
+from helpers import randomPixels
+from test_formats import tamper
+
+
+@pytest.mark.parametrize("kdf", sorted(kdfIds))
+@pytest.mark.parametrize("compression", [None] + list(compressionModes))
+def testContainerRoundTrip(compression, kdf):
+    payload = os.urandom(100000) + bytes(100000)
+    image = hide(randomPixels((600, 600, 3)), payload, name="payload.bin", password="secret",
+                 compression=compression, kdf=kdf)
+    assert extract(image, password="secret") == ("payload.bin", payload)
+
+
+def testUnencryptedContainerRoundTrip():
+    image = hide(randomPixels((20, 30, 3)), b"", name="empty.txt")
+    assert extract(image) == ("empty.txt", b"")
+
+
+@pytest.mark.parametrize("byte", [300, 150000])
+@pytest.mark.parametrize("password", ["", "secret"])
+def testTamperedContainerIsCorrupted(password, byte):
+    image = hide(randomPixels((700, 700, 3)), os.urandom(200000), name="payload.bin", password=password)
+    with pytest.raises(CorruptedDataError):
+        extract(tamper(image, byte), password=password)
+
+
+@pytest.mark.parametrize("kdf", sorted(kdfIds))
+def testWrongPasswordIsRejected(kdf):
+    image = hide(randomPixels((20, 30, 3)), b"data", name="data.txt", password="secret", kdf=kdf)
+    with pytest.raises(InvalidPasswordError):
+        extract(image, password="wrong")
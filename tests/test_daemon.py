@@ -0,0 +1,146 @@
+import io, os, sys, time, socket, signal, subprocess
+import pytest
+from PIL import Image
+import StegoDaemon
+from helpers import randomPixels
+from test_script import scriptPath
+
+pytestmark = pytest.mark.skipif(not StegoDaemon.isSupported(), reason="The daemon needs Unix sockets and fork()")
+
+repositoryPath = os.path.dirname(scriptPath)
+# Daemon running a command that echoes its standard input in upper case, reports where it ran on standard error
+# and exits with the status given as its first argument. With "stranger", the daemon runs as another user.
+echoDaemon = """
+import os, sys, StegoDaemon
+if sys.argv[2] == "stranger":
+    uid = os.getuid() + 1
+    os.getuid = lambda: uid
+
+def run(arguments):
+    open(os.path.join(sys.argv[3], "ran"), "w").close()
+    sys.stdout.write(sys.stdin.read().upper())
+    print(os.getppid(), os.getcwd(), os.environ.get("STEGO_TEST"), file=sys.stderr)
+    sys.exit(int(arguments[0]))
+
+StegoDaemon.serve(sys.argv[1], run)
+"""
+remoteClient = "import sys, StegoDaemon; sys.exit(StegoDaemon.runRemote(sys.argv[1], sys.argv[2:]))"
+
+
+def startDaemon(arguments: list, socketPath: str) -> subprocess.Popen:
+    """
+    Function to start a daemon process and wait until it listens on its socket.
+
+    Parameters:
+    arguments (list): Command line of the daemon, without the interpreter.
+    socketPath (str): Path of the socket the daemon listens on.
+
+    Returns:
+    subprocess.Popen: The running daemon.
+    """
+    environment = dict(os.environ, PYTHONPATH=repositoryPath)
+    process = subprocess.Popen([sys.executable] + arguments, env=environment, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 60
+    while not (os.path.exists(socketPath) and StegoDaemon.isListening(socketPath)):
+        assert process.poll() is None and time.monotonic() < deadline, process.stdout.read()
+        time.sleep(0.05)
+    return process
+
+
+def stopDaemon(process: subprocess.Popen, socketPath: str) -> bytes:
+    """
+    Function to stop a daemon process and check that it removed its socket.
+
+    Parameters:
+    process (subprocess.Popen): The running daemon.
+    socketPath (str): Path of the socket the daemon listens on.
+
+    Returns:
+    bytes: Everything the daemon printed.
+    """
+    process.send_signal(signal.SIGTERM)
+    output = process.communicate(timeout=30)[0]
+    assert not os.path.exists(socketPath)
+    return output
+
+
+@pytest.fixture
+def echo(tmp_path, request):
+    socketPath = str(tmp_path / "echo.sock")
+    process = startDaemon(["-c", echoDaemon, socketPath, request.param, str(tmp_path)], socketPath)
+    yield socketPath, process
+    stopDaemon(process, socketPath)
+
+
+def runClient(socketPath: str, arguments: list, directory, data: bytes) -> subprocess.CompletedProcess:
+    """
+    Function to send a command to a daemon from a client process.
+
+    Parameters:
+    socketPath (str): Path of the daemon socket.
+    arguments (list): Command-line arguments of the command.
+    directory (pathlib.Path): Working directory of the client.
+    data (bytes): Standard input of the client.
+
+    Returns:
+    subprocess.CompletedProcess: The finished client, with its standard output and error as bytes.
+    """
+    environment = dict(os.environ, PYTHONPATH=repositoryPath, STEGO_TEST="client")
+    return subprocess.run([sys.executable, "-c", remoteClient, socketPath] + arguments, cwd=directory, input=data,
+                          capture_output=True, env=environment, timeout=60)
+
+
+@pytest.mark.parametrize("echo", ["user"], indirect=True)
+def testStreamsArePassedToTheDaemon(echo, tmp_path):
+    socketPath, process = echo
+    workingDirectory = tmp_path / "client"
+    workingDirectory.mkdir()
+    for status in (0, 3):
+        result = runClient(socketPath, [str(status)], workingDirectory, b"streamed through the daemon")
+        assert result.returncode == status
+        assert result.stdout == b"STREAMED THROUGH THE DAEMON"
+        assert result.stderr.split() == [str(process.pid).encode(), str(workingDirectory).encode(), b"client"]
+    assert (tmp_path / "ran").exists()
+
+
+@pytest.mark.parametrize("echo", ["stranger"], indirect=True)
+def testOtherUsersAreRejected(echo, tmp_path):
+    socketPath, process = echo
+    result = runClient(socketPath, ["0"], tmp_path, b"rejected")
+    assert result.returncode == 1
+    assert result.stdout == b""
+    assert result.stderr == b"[!] The daemon stopped before the command finished.\n"
+    assert not (tmp_path / "ran").exists()
+    assert process.poll() is None and StegoDaemon.isListening(socketPath)
+
+
+def testPeerCredentialsAreChecked(monkeypatch):
+    if not hasattr(socket, "SO_PEERCRED"):
+        pytest.skip("No peer credentials on this platform")
+    server, client = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    with server, client:
+        assert StegoDaemon.isSameUser(server)
+        uid = os.getuid()
+        monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+        assert not StegoDaemon.isSameUser(server)
+
+
+def testScriptRunsInTheDaemon(tmp_path):
+    socketPath = str(tmp_path / "stego.sock")
+    process = startDaemon([scriptPath, "daemon", "-u", socketPath], socketPath)
+    try:
+        carrier = io.BytesIO()
+        Image.fromarray(randomPixels((60, 80, 3))).save(carrier, format="PNG")
+        (tmp_path / "payload.bin").write_bytes(b"payload" * 50)
+        environment = dict(os.environ, STEGO_DAEMON=socketPath)
+        hidden = subprocess.run([sys.executable, scriptPath, "-i", "-", "-h", "payload.bin", "-o", "-", "-p", "secret"],
+                                cwd=tmp_path, input=carrier.getvalue(), capture_output=True, env=environment,
+                                timeout=60)
+        assert hidden.returncode == 0 and Image.open(io.BytesIO(hidden.stdout)).format == "PNG"
+        extracted = subprocess.run([sys.executable, scriptPath, "-e", "-i", "-", "-o", "-", "-p", "secret"],
+                                   cwd=tmp_path, input=hidden.stdout, capture_output=True, env=environment, timeout=60)
+        assert extracted.returncode == 0 and extracted.stdout == b"payload" * 50
+    finally:
+        output = stopDaemon(process, socketPath)
+    assert b"[*] Listening on " in output and b"[*] Daemon stopped." in output
@@ -0,0 +1,104 @@
+import os
+import pytest
+import numpy as np
+from PIL import Image
+from StegoAlgorithm import (hide, extract, hideDataToImage, extractDataFromImage, hideDataToImages,
+                            extractDataFromImages, CorruptedDataError, InvalidPasswordError)
+from helpers import randomPixels
+
+dataPath = os.path.join(os.path.dirname(__file__), "data")
+# Images written by the original implementation: notes.txt, 1024 bytes, hidden in carrier.png
+# without a password and with the password "secret".
+baselineNotes = bytes(range(256)) * 4
+
+frameFormats = {
+    "plain": {},
+    "fernet": {"password": "secret", "chunked": False, "kdf": "md5"},
+    "chunked": {"password": "secret", "kdf": "md5"},
+    "fernetScrypt": {"password": "secret", "chunked": False},
+    "chunkedPbkdf2": {"password": "secret", "kdf": "pbkdf2"},
+    "zlib": {"compression": "zlib"},
+    "bz2": {"password": "secret", "compression": "bz2"},
+    "lzma": {"password": "secret", "compression": "lzma", "kdf": "md5"},
+    "auto": {"compression": "auto"},
+    "layout": {"password": "secret", "bitsPerChannel": 3, "channelMask": 0b101},
+    "scatter": {"password": "secret", "scatter": True},
+}
+
+
+def tamper(image: np.ndarray, byte: int, bitsPerChannel: int = 2) -> np.ndarray:
+    """
+    Function to flip the lowest bit of the pixel value holding a byte of the hidden frame.
+
+    Parameters:
+    image (np.ndarray): Pixels holding a frame in their leading values.
+    byte (int): Offset of the byte in the frame.
+    bitsPerChannel (int): Number of LSBs used in each channel.
+
+    Returns:
+    np.ndarray: A tampered copy of the pixels.
+    """
+    image = image.copy()
+    image.reshape(-1)[byte * 8 // bitsPerChannel] ^= 1
+    return image
+
+
+@pytest.mark.parametrize("options", frameFormats.values(), ids=frameFormats.keys())
+def testFrameRoundTrip(options):
+    payload = os.urandom(3000) + bytes(3000)
+    image = hide(randomPixels((120, 160, 3)), payload, name="payload.bin", version=1, **options)
+    assert extract(image, password=options.get("password", "")) == ("payload.bin", payload)
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+@pytest.mark.parametrize("vectorized", [True, False])
+def testVersion1MatchesBaseline(tmp_path, streaming, vectorized):
+    notesPath = tmp_path / "notes.txt"
+    notesPath.write_bytes(baselineNotes)
+    output = str(tmp_path / "output.png")
+    hideDataToImage(os.path.join(dataPath, "carrier.png"), str(notesPath), output, "", vectorized=vectorized,
+                    version=1, streaming=streaming)
+    expected = np.asarray(Image.open(os.path.join(dataPath, "baseline_plain.png")))
+    assert np.array_equal(np.asarray(Image.open(output)), expected)
+
+
+@pytest.mark.parametrize("image, password", [("baseline_plain.png", ""), ("baseline_fernet.png", "secret")])
+def testBaselineImagesAreRead(tmp_path, image, password):
+    extractDataFromImage(os.path.join(dataPath, image), password, output=str(tmp_path))
+    assert (tmp_path / "notes.txt").read_bytes() == baselineNotes
+    with open(os.path.join(dataPath, image), "rb") as imageFile:
+        assert extract(imageFile.read(), password=password) == ("notes.txt", baselineNotes)
+
+
+@pytest.mark.parametrize("byte", [200, 150000])
+@pytest.mark.parametrize("options", [frameFormats[name] for name in ("fernet", "chunked", "fernetScrypt", "bz2")],
+                         ids=("fernet", "chunked", "fernetScrypt", "bz2"))
+def testTamperedFrameIsCorrupted(options, byte):
+    payload = os.urandom(200000)
+    image = hide(randomPixels((700, 700, 3)), payload, name="payload.bin", version=1, **options)
+    with pytest.raises(CorruptedDataError):
+        extract(tamper(image, byte), password="secret")
+
+
+@pytest.mark.parametrize("options", [frameFormats[name] for name in ("fernet", "chunked", "chunkedPbkdf2")],
+                         ids=("fernet", "chunked", "chunkedPbkdf2"))
+def testWrongPasswordIsRejected(options):
+    image = hide(randomPixels((60, 80, 3)), b"data", name="data.txt", version=1, **options)
+    with pytest.raises(InvalidPasswordError):
+        extract(image, password="wrong")
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def testShardRoundTrip(tmp_path, version):
+    payload = os.urandom(30000)
+    (tmp_path / "payload.bin").write_bytes(payload)
+    inputs, outputs = list(), list()
+    for index in range(3):
+        inputs.append(str(tmp_path / "carrier{}.png".format(index)))
+        outputs.append(str(tmp_path / "shard{}.png".format(index)))
+        Image.fromarray(randomPixels((120, 160, 3), seed=index)).save(inputs[-1])
+    hideDataToImages(inputs, str(tmp_path / "payload.bin"), outputs, "secret", workers=2, version=version)
+    extracted = tmp_path / "extracted"
+    extracted.mkdir()
+    extractDataFromImages(outputs[::-1], "secret", workers=2, output=str(extracted))
+    assert (extracted / "payload.bin").read_bytes() == payload
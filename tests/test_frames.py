@@ -0,0 +1,37 @@
+import os
+import pytest
+from PIL import Image
+from StegoAlgorithm import hideDataToImage, extractDataFromImage, hideDataToImages, StegoError
+from helpers import randomPixels
+
+
+@pytest.mark.parametrize("extension", ["tif", "png"])
+def testMultiFrameRoundTrip(tmp_path, extension):
+    carrier, output = str(tmp_path / ("carrier." + extension)), str(tmp_path / ("output." + extension))
+    frames = [Image.fromarray(randomPixels((60, 80, 3), seed=index)) for index in range(4)]
+    frames[0].save(carrier, save_all=True, append_images=frames[1:])
+    payload = os.urandom(10000)
+    (tmp_path / "payload.bin").write_bytes(payload)
+
+    hideDataToImage(carrier, str(tmp_path / "payload.bin"), output, "secret")
+    with Image.open(output) as image:
+        assert image.n_frames == 4
+    extracted = tmp_path / "extracted"
+    extracted.mkdir()
+    extractDataFromImage(output, "secret", output=str(extracted))
+    assert (extracted / "payload.bin").read_bytes() == payload
+
+
+@pytest.mark.parametrize("carrierName, outputName", [("carrier.gif", "output.gif"), ("carrier.png", "output.gif"),
+                                                     ("carrier.png", "output.jpg")])
+def testLossyOutputIsRejected(tmp_path, carrierName, outputName):
+    carrier, output = str(tmp_path / carrierName), str(tmp_path / outputName)
+    frames = [Image.fromarray(randomPixels((60, 80, 3), seed=index)) for index in range(2)]
+    frames[0].save(carrier, save_all=True, append_images=frames[1:])
+    (tmp_path / "payload.bin").write_bytes(b"data")
+
+    with pytest.raises(StegoError):
+        hideDataToImage(carrier, str(tmp_path / "payload.bin"), output, "")
+    with pytest.raises(StegoError):
+        hideDataToImages([carrier], str(tmp_path / "payload.bin"), [output], "")
+    assert not os.path.exists(output)
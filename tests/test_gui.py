@@ -0,0 +1,71 @@
+import os
+import pytest
+from PIL import Image
+from helpers import randomPixels
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtCore = pytest.importorskip("PyQt5.QtCore")
+from StegoGui import StegoWorker
+from StegoAlgorithm import hideDataToImage, extractDataFromImage
+
+
+@pytest.fixture(scope="module")
+def application():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def recordSignals(worker: StegoWorker) -> list:
+    """
+    Function to record which of the signals reporting how a worker ended were emitted.
+
+    Parameters:
+    worker (StegoWorker): Worker to watch.
+
+    Returns:
+    list: Names of the emitted signals, filled in as they arrive.
+    """
+    emitted = list()
+    worker.succeeded.connect(lambda: emitted.append("succeeded"))
+    worker.failed.connect(lambda message: emitted.append("failed"))
+    worker.cancelled.connect(lambda: emitted.append("cancelled"))
+    return emitted
+
+
+@pytest.fixture
+def carrier(tmp_path):
+    Image.fromarray(randomPixels((700, 700, 3))).save(str(tmp_path / "carrier.png"))
+    (tmp_path / "payload.bin").write_bytes(os.urandom(200000))
+    return str(tmp_path / "carrier.png"), str(tmp_path / "payload.bin"), str(tmp_path / "output.png")
+
+
+def testCancelledWorkerStops(application, carrier):
+    worker = StegoWorker(hideDataToImage, *carrier, "secret")
+    emitted = recordSignals(worker)
+    phases = list()
+    worker.progressChanged.connect(lambda phase, done, total, rows: (phases.append(phase), worker.cancel()))
+    worker.run()
+    assert emitted == ["cancelled"]
+    assert len(phases) >= 1
+    assert not os.path.exists(carrier[2])
+
+
+def testCancelledThreadStops(application, carrier):
+    worker = StegoWorker(hideDataToImage, *carrier, "secret")
+    emitted = recordSignals(worker)
+    worker.cancel()
+    worker.start()
+    assert worker.wait(60000)
+    application.processEvents()
+    assert emitted == ["cancelled"]
+    assert not os.path.exists(carrier[2])
+
+
+def testWorkerReportsSuccessAndFailure(application, carrier, tmp_path):
+    worker = StegoWorker(hideDataToImage, *carrier, "secret")
+    emitted = recordSignals(worker)
+    worker.run()
+    assert emitted == ["succeeded"]
+    worker = StegoWorker(extractDataFromImage, carrier[2], "wrong")
+    emitted = recordSignals(worker)
+    worker.run()
+    assert emitted == ["failed"]
@@ -0,0 +1,80 @@
+import os, hashlib
+import pytest
+import numpy as np
+from StegoAlgorithm import (hide, extract, probePixels, deriveSaltedKey, unpackKdfParams, extendedHeaderSize,
+                            saltSize, NoHiddenDataError)
+from helpers import randomPixels
+
+
+def setFrameByte(image: np.ndarray, byte: int, value: int) -> np.ndarray:
+    """
+    Function to overwrite a byte of the frame hidden with the default layout in the leading pixel values.
+
+    Parameters:
+    image (np.ndarray): Pixels holding a frame.
+    byte (int): Offset of the byte in the frame.
+    value (int): New value of the byte.
+
+    Returns:
+    np.ndarray: A modified copy of the pixels.
+    """
+    image = image.copy()
+    values = image.reshape(-1)
+    for index in range(4):
+        position = byte * 4 + index
+        values[position] = (values[position] & 0xfc) | ((value >> (6 - 2 * index)) & 0b11)
+    return image
+
+
+def readHeader(image: np.ndarray) -> dict:
+    """
+    Function to parse the header of the frame hidden in pixels (see probePixels).
+
+    Parameters:
+    image (np.ndarray): Pixels holding a frame.
+
+    Returns:
+    dict: Parsed header, or None if the pixels hold no valid header.
+    """
+    return probePixels(lambda pixelCount: image.reshape(-1, image.shape[-1])[:pixelCount])
+
+
+@pytest.mark.parametrize("chunked", [True, False], ids=("chunked", "fernet"))
+def testLegacyMd5ExtendedFrameIsRead(chunked):
+    payload = os.urandom(3000)
+    image = hide(randomPixels((120, 160, 3)), payload, name="payload.bin", password="secret", chunked=chunked,
+                 compression="zlib", kdf="md5", version=1)
+    header = readHeader(image)
+    assert (header["mode"], header["kdf"], header["salt"]) == ("extended", "md5", None)
+    assert extract(image, password="secret") == ("payload.bin", payload)
+
+
+@pytest.mark.parametrize("kdf, params", [("scrypt", (0, 8, 1)), ("scrypt", (21, 8, 1)), ("scrypt", (15, 0, 1)),
+                                         ("scrypt", (15, 33, 1)), ("scrypt", (15, 8, 0)), ("scrypt", (15, 8, 17)),
+                                         ("scrypt", (20, 16, 1)), ("pbkdf2", (0,)), ("pbkdf2", (10 ** 8 + 1,))])
+def testOutOfBoundsKdfParamsAreRejected(kdf, params):
+    data = bytes(params) + b"\x00" if kdf == "scrypt" else params[0].to_bytes(4, byteorder='big')
+    assert unpackKdfParams(kdf, data) is None
+
+
+@pytest.mark.parametrize("kdf, params", [("scrypt", (21, 8, 1, 0)), ("pbkdf2", (0xff, 0xff, 0xff, 0xff))])
+def testFrameWithOutOfBoundsKdfParamsIsRejected(kdf, params):
+    image = hide(randomPixels((60, 80, 3)), b"data", name="data.txt", password="secret", kdf=kdf, version=1,
+                 compression="zlib")
+    assert readHeader(image)["kdf"] == kdf
+    offset = extendedHeaderSize + 1 + saltSize
+    for index, value in enumerate(params):
+        image = setFrameByte(image, offset + index, value)
+    assert readHeader(image) is None
+    with pytest.raises(NoHiddenDataError):
+        extract(image, password="secret")
+
+
+def testKeyCacheIsKeyedBySalt():
+    deriveSaltedKey.cache_clear()
+    first, second = os.urandom(saltSize), os.urandom(saltSize)
+    keys = [deriveSaltedKey("secret", salt, "pbkdf2", (1000,)) for salt in (first, second, first)]
+    assert keys[0] != keys[1] and keys[0] == keys[2]
+    assert keys[1] == hashlib.pbkdf2_hmac("sha256", b"secret", second, 1000, dklen=32)
+    assert deriveSaltedKey("secret", first, "pbkdf2", (1001,)) != keys[0]
+    assert deriveSaltedKey.cache_info().hits == 1
@@ -0,0 +1,54 @@
+import os
+import pytest
+import numpy as np
+from StegoAlgorithm import (hide, extract, maxHiddenSize, bodyStartPixel, headerSize, StegoError,
+                            PayloadTooLargeError)
+from helpers import randomPixels
+
+masks = {"all": None, "red": 0b001, "greenBlue": 0b110, "redBlue": 0b101}
+
+
+@pytest.mark.parametrize("channelMask", masks.values(), ids=masks.keys())
+@pytest.mark.parametrize("bitsPerChannel", [1, 2, 3, 4])
+def testLayoutRoundTrip(bitsPerChannel, channelMask):
+    carrier, payload = randomPixels((60, 80, 3)), os.urandom(500)
+    image = hide(carrier, payload, name="payload.bin", bitsPerChannel=bitsPerChannel, channelMask=channelMask)
+    assert extract(image) == ("payload.bin", payload)
+
+    # Past the layout header, only the selected bits of the selected channels change.
+    start = 0 if bitsPerChannel == 2 and channelMask is None else bodyStartPixel(3)
+    changed = (image ^ carrier).reshape(-1, 3)[start:]
+    for channel in range(3):
+        limit = 1 << bitsPerChannel if channelMask is None or channelMask >> channel & 1 else 1
+        assert changed[:, channel].max() < limit
+
+
+@pytest.mark.parametrize("channelMask", [0b1000, 0b1001, None], ids=("alpha", "redAlpha", "all"))
+def testLayoutRoundTripWithAlpha(channelMask):
+    payload = os.urandom(1000)
+    image = hide(randomPixels((60, 80, 4)), payload, name="payload.bin", bitsPerChannel=3, channelMask=channelMask)
+    assert extract(image) == ("payload.bin", payload)
+
+
+@pytest.mark.parametrize("bitsPerChannel", range(1, 9))
+@pytest.mark.parametrize("channelMask", [None, 0b101], ids=("all", "redBlue"))
+def testCapacityAtEveryDepth(bitsPerChannel, channelMask):
+    width, height = 80, 60
+    selected = 3 if channelMask is None else 2
+    if bitsPerChannel == 2 and channelMask is None:
+        expected = width * height * 3 * 2 // 8
+    else:
+        expected = (width * height - bodyStartPixel(3)) * selected * bitsPerChannel // 8
+    assert maxHiddenSize((width, height), 3, bitsPerChannel, channelMask) == expected
+
+    carrier = randomPixels((height, width, 3))
+    payload = os.urandom(expected - headerSize - len("payload.bin"))
+    options = {"name": "payload.bin", "bitsPerChannel": bitsPerChannel, "channelMask": channelMask, "version": 1}
+    if bitsPerChannel > 4:
+        with pytest.raises(StegoError):
+            hide(carrier, payload, **options)
+        return
+    assert extract(hide(carrier, payload, **options)) == ("payload.bin", payload)
+    with pytest.raises(PayloadTooLargeError) as error:
+        hide(carrier, payload + b"!", **options)
+    assert error.value.capacity == expected
@@ -0,0 +1,76 @@
+import io, struct, zlib
+import pytest
+import numpy as np
+import StegoAlgorithm, StegoPng
+from helpers import randomPixels, pngChunks, renderingInfo, encodePng
+
+
+iccProfile = b"\0\0\2\x0clcms\2\x10\0\0mntrRGB XYZ " + bytes(100)
+
+
+def testStreamedRewriteKeepsRenderingChunks(tmp_path):
+    carrier = tmp_path / "carrier.png"
+    carrier.write_bytes(encodePng(randomPixels((120, 160, 3)), icc_profile=iccProfile, transparency=(1, 2, 3),
+                                  pnginfo=renderingInfo()))
+    payload = tmp_path / "payload.bin"
+    payload.write_bytes(bytes(range(256)) * 40)
+    assert StegoPng.isStreamable(str(carrier))
+
+    streamed, decoded = tmp_path / "streamed.png", tmp_path / "decoded.png"
+    StegoAlgorithm.hideDataToImage(str(carrier), str(payload), str(streamed), "")
+    StegoAlgorithm.hideDataToImage(str(carrier), str(payload), str(decoded), "", streaming=False)
+    assert pngChunks(str(streamed)) == pngChunks(str(carrier))
+    # Pillow writes the colour profile and the transparency key, but not the gAMA and cHRM chunks.
+    assert {b"iCCP", b"tRNS"} <= set(pngChunks(str(decoded)))
+    assert StegoAlgorithm.extract(streamed.read_bytes()) == StegoAlgorithm.extract(decoded.read_bytes())
+
+
+def testStreamedRewriteDropsUnknownUnsafeChunks(tmp_path):
+    info = renderingInfo()
+    info.add(b"xyZW", b"depends on the pixels")
+    carrier = tmp_path / "carrier.png"
+    carrier.write_bytes(encodePng(randomPixels((40, 50, 4)), pnginfo=info))
+    payload = tmp_path / "payload.bin"
+    payload.write_bytes(b"hidden")
+
+    output = tmp_path / "output.png"
+    StegoAlgorithm.hideDataToImage(str(carrier), str(payload), str(output), "")
+    assert pngChunks(str(output)) == [chunk for chunk in pngChunks(str(carrier)) if chunk != b"xyZW"]
+
+
+def testWidePngKeepsAncillaryChunks(tmp_path):
+    leading = [(b"iCCP", b"profile\0\0" + zlib.compress(iccProfile)), (b"gAMA", struct.pack(">I", 45455)),
+               (b"pHYs", struct.pack(">IIB", 2835, 2835, 1)), (b"tRNS", struct.pack(">3H", 1, 2, 3))]
+    trailing = [(b"tEXt", b"Comment\0carrier")]
+    carrier = tmp_path / "carrier.png"
+    StegoPng.writePng(str(carrier), randomPixels((60, 80, 3), np.uint16), leading=leading, trailing=trailing)
+    payload = tmp_path / "payload.bin"
+    payload.write_bytes(b"hidden" * 100)
+    assert StegoPng.ancillaryChunks(str(carrier)) == (leading, trailing)
+
+    decoded = tmp_path / "decoded.png"
+    StegoAlgorithm.hideDataToImage(str(carrier), str(payload), str(decoded), "", streaming=False)
+    hidden = StegoAlgorithm.hide(carrier.read_bytes(), payload.read_bytes(), name="payload.bin")
+    for output in (decoded.read_bytes(), hidden):
+        assert pngChunks(output) == pngChunks(str(carrier))
+        assert StegoAlgorithm.extract(output) == ("payload.bin", payload.read_bytes())
+
+
+def testWidePixelsAreDecoded():
+    pixels = randomPixels((30, 40, 3), np.uint16)
+    carrier = io.BytesIO()
+    StegoPng.writePng(carrier, pixels)
+    assert np.array_equal(StegoAlgorithm.readLeadingPixels(carrier.getvalue(), None), pixels.reshape(-1, 3))
+    assert np.array_equal(StegoAlgorithm.readLeadingPixels(carrier.getvalue(), 45), pixels.reshape(-1, 3)[:45])
+
+
+def testWidePixelsAreRefusedWithUnknownPillow(monkeypatch):
+    monkeypatch.setattr(StegoAlgorithm, "wideVersions", ((0, 0), (0, 0)))
+    carrier = io.BytesIO()
+    StegoPng.writePng(carrier, randomPixels((30, 40, 3), np.uint16))
+    with pytest.raises(StegoAlgorithm.StegoError):
+        StegoAlgorithm.readLeadingPixels(carrier.getvalue(), None)
+    with pytest.raises(StegoAlgorithm.StegoError):
+        StegoAlgorithm.hide(carrier.getvalue(), b"hidden", name="hidden.txt")
+    # Images with 8 bits per channel are still read.
+    StegoAlgorithm.hide(encodePng(randomPixels((30, 40, 3))), b"hidden", name="hidden.txt")
@@ -0,0 +1,59 @@
+import io
+import pytest
+import numpy as np
+from PIL import Image
+import StegoAlgorithm
+from StegoAlgorithm import readLeadingPixels
+from helpers import randomPixels
+
+carriers = {
+    "rgbPng": ("PNG", "RGB", {}),
+    "rgbaPng": ("PNG", "RGBA", {}),
+    "palettePng": ("PNG", "P", {"transparency": 3}),
+    "grayPng": ("PNG", "L", {}),
+    "bmp": ("BMP", "RGB", {}),
+    "ppm": ("PPM", "RGB", {}),
+    "tiffStrips": ("TIFF", "RGB", {}),
+}
+
+
+def encodeCarrier(imageFormat: str, mode: str, options: dict) -> bytes:
+    """
+    Function to encode random pixels of a mode in a format.
+
+    Parameters:
+    imageFormat (str): PIL format name.
+    mode (str): PIL mode.
+    options (dict): Options of Image.save.
+
+    Returns:
+    bytes: The image file.
+    """
+    output = io.BytesIO()
+    image = Image.fromarray(randomPixels((90, 70, 4 if mode == "RGBA" else 3))).convert(mode)
+    image.save(output, format=imageFormat, **options)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("carrier", carriers.values(), ids=carriers.keys())
+def testLeadingPixelsMatchFullDecode(carrier):
+    image = encodeCarrier(*carrier)
+    full = readLeadingPixels(image, None)
+    for pixelCount in (1, 70, 71, 1000, 70 * 90):
+        assert np.array_equal(readLeadingPixels(image, pixelCount), full[:pixelCount])
+
+
+def testLeadingRowsOfPng():
+    image = Image.open(io.BytesIO(encodeCarrier("PNG", "RGB", {})))
+    leading = StegoAlgorithm.leadingRows(image, 5)
+    assert leading.size == (70, 5)
+    assert np.array_equal(np.asarray(leading), np.asarray(Image.open(io.BytesIO(encodeCarrier("PNG", "RGB", {}))))[:5])
+
+
+@pytest.mark.parametrize("carrier", [carriers[name] for name in ("bmp", "ppm", "tiffStrips")],
+                         ids=("bmp", "ppm", "tiffStrips"))
+def testLeadingRowsOfOtherFormatsAreDecodedInFull(carrier):
+    image = Image.open(io.BytesIO(encodeCarrier(*carrier)))
+    tile = list(image.tile)
+    assert StegoAlgorithm.leadingRows(image, 5) is image
+    assert image.size == (70, 90) and image.tile == tile
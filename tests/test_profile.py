@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import tracemalloc
+import pytest
+from PIL import Image
+from StegoAlgorithm import PhaseTimer, StegoProfiler, phaseTimer, hide, extract
+from helpers import randomPixels
+from test_script import runScript
+
+recordKeys = {"phase", "seconds", "selfSeconds", "bytes", "calls", "peakMemory"}
+
+
+def testNestedPhasesAreExcludedFromTheirParent():
+    profiler = StegoProfiler(traceMemory=False)
+    with profiler:
+        with PhaseTimer(profiler, "outer", 100) as outer:
+            time.sleep(0.02)
+            with PhaseTimer(profiler, "inner", 10):
+                time.sleep(0.05)
+            outer["bytes"] += 50
+    inner, outer = profiler.phases
+    assert set(inner) == set(outer) == recordKeys
+    assert (inner["phase"], inner["bytes"], inner["calls"]) == ("inner", 10, 1)
+    assert (outer["phase"], outer["bytes"], outer["calls"]) == ("outer", 150, 1)
+    assert inner["seconds"] == inner["selfSeconds"] >= 0.05
+    assert outer["seconds"] >= inner["seconds"] + 0.02
+    assert outer["selfSeconds"] == pytest.approx(outer["seconds"] - inner["seconds"])
+    assert outer["peakMemory"] is None
+    assert profiler.seconds >= outer["seconds"]
+
+
+def testResumedPhaseIsReportedOnce():
+    profiler = StegoProfiler(traceMemory=False)
+    timer = PhaseTimer(profiler, "stream", 30)
+    for _ in range(3):
+        timer.start()
+        timer.stop()
+    assert profiler.phases == list()
+    timer.finish()
+    assert [(record["phase"], record["calls"]) for record in profiler.phases] == [("stream", 3)]
+
+
+def testFailedPhaseIsNotReported():
+    profiler = StegoProfiler(traceMemory=False)
+    with pytest.raises(ValueError):
+        with PhaseTimer(profiler, "failing"):
+            raise ValueError()
+    assert profiler.phases == list()
+    with phaseTimer(None, "unobserved") as record:
+        record["bytes"] = 10
+
+
+def testPeakMemoryIsTraced():
+    profiler = StegoProfiler()
+    with profiler:
+        with PhaseTimer(profiler, "outer"):
+            with PhaseTimer(profiler, "inner"):
+                block = bytearray(4000000)
+            del block
+    assert not tracemalloc.is_tracing()
+    inner, outer = profiler.phases
+    assert inner["peakMemory"] >= 4000000
+    assert outer["peakMemory"] >= inner["peakMemory"]
+    assert profiler.peakMemory >= outer["peakMemory"]
+
+
+def testReportAddsThroughputAndDetails():
+    profiler = StegoProfiler(traceMemory=False)
+    profiler.phaseFinished({"phase": "read", "seconds": 2.0, "selfSeconds": 0.5, "bytes": 4000000, "calls": 1,
+                            "peakMemory": None})
+    profiler.phaseFinished({"phase": "kdf", "seconds": 0.1, "selfSeconds": 0.1, "bytes": 0, "calls": 1,
+                            "peakMemory": None})
+    report = profiler.report(operation="hide", inputs=["carrier.png"])
+    assert (report["operation"], report["inputs"]) == ("hide", ["carrier.png"])
+    assert [phase["phase"] for phase in report["phases"]] == ["read", "kdf"]
+    assert report["phases"][0]["megabytesPerSecond"] == 8.0
+    assert "megabytesPerSecond" not in report["phases"][1]
+    assert "megabytesPerSecond" not in profiler.phases[0]
+
+
+def testOperationsReportTheirPhases():
+    payload = os.urandom(20000)
+    profiler = StegoProfiler(traceMemory=False)
+    with profiler:
+        image = hide(randomPixels((200, 200, 3)), payload, name="payload.bin", password="secret", observer=profiler)
+    phases = {record["phase"]: record for record in profiler.phases}
+    assert {"kdf", "encrypt", "embed"} <= set(phases)
+    assert phases["encrypt"]["bytes"] > len(payload)
+
+    profiler = StegoProfiler(traceMemory=False)
+    with profiler:
+        assert extract(image, password="secret", observer=profiler) == ("payload.bin", payload)
+    assert {"kdf", "decrypt"} <= {record["phase"] for record in profiler.phases}
+
+
+@pytest.mark.parametrize("arguments, operation, phases", [
+    (["-i", "carrier.png", "-h", "payload.bin", "-o", "output.png", "-p", "secret"], "hide",
+     {"kdf", "decode", "read", "encrypt", "embed", "save"}),
+    (["-e", "-i", "output.png", "-o", "extracted", "-p", "secret"], "extract",
+     {"decode", "unpack", "kdf", "decrypt", "write"}),
+], ids=("hide", "extract"))
+def testProfileReport(tmp_path, arguments, operation, phases):
+    Image.fromarray(randomPixels((200, 200, 3))).save(str(tmp_path / "carrier.png"))
+    (tmp_path / "payload.bin").write_bytes(os.urandom(20000))
+    (tmp_path / "extracted").mkdir()
+    if operation == "extract":
+        runScript(["-i", "carrier.png", "-h", "payload.bin", "-o", "output.png", "-p", "secret"], tmp_path)
+
+    result = runScript(arguments + ["--profile", "report.json"], tmp_path)
+    assert b"[*] Profile written to report.json." in result.stdout
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert set(report) == {"operation", "inputs", "hidden", "outputs", "seconds", "peakMemory", "phases"}
+    assert report["operation"] == operation
+    assert report["inputs"] == [arguments[arguments.index("-i") + 1]]
+    assert report["hidden"] == ("payload.bin" if operation == "hide" else None)
+    assert report["seconds"] > 0 and report["peakMemory"] > 0
+    assert phases <= {phase["phase"] for phase in report["phases"]}
+    for phase in report["phases"]:
+        assert recordKeys <= set(phase)
+        assert phase["peakMemory"] is not None
+        assert ("megabytesPerSecond" in phase) == bool(phase["bytes"] and phase["selfSeconds"] > 0)
@@ -0,0 +1,47 @@
+import os
+import pytest
+from StegoAlgorithm import hide, extractRange, chunkSize, StegoError, CorruptedDataError
+from helpers import randomPixels
+from test_formats import tamper
+
+payload = os.urandom(3 * chunkSize + 1000)
+ranges = [(0, 10), (0, chunkSize), (chunkSize - 1, 2), (chunkSize, chunkSize), (chunkSize - 10, chunkSize + 20),
+          (len(payload) - 5, 5), (len(payload) - 5, 100), (len(payload), 10), (len(payload) + 100, 10), (1234, 0),
+          (0, len(payload))]
+
+
+@pytest.fixture(scope="module", params=[{}, {"password": "secret"}, {"password": "secret", "compression": "zlib"},
+                                        {"version": 1, "password": "secret"}],
+                ids=("plain", "encrypted", "compressed", "version1"))
+def hidden(request):
+    return hide(randomPixels((700, 700, 3)), payload, name="payload.bin", **request.param), request.param
+
+
+@pytest.mark.parametrize("offset, length", ranges)
+def testRangeMatchesSlice(hidden, offset, length):
+    image, options = hidden
+    assert extractRange(image, offset, length, password=options.get("password", "")) == \
+        payload[offset:offset + length]
+
+
+@pytest.mark.parametrize("offset, length", [(-1, 10), (0, -1)])
+def testNegativeRangeIsRejected(hidden, offset, length):
+    image, options = hidden
+    with pytest.raises(StegoError):
+        extractRange(image, offset, length, password=options.get("password", ""))
+
+
+@pytest.mark.parametrize("password", ["", "secret"])
+def testOnlyChunksInRangeAreChecked(password):
+    image = hide(randomPixels((700, 700, 3)), payload, name="payload.bin", password=password)
+    image = tamper(image, 2 * chunkSize + 1000)
+    assert extractRange(image, 0, chunkSize, password=password) == payload[:chunkSize]
+    with pytest.raises(CorruptedDataError):
+        extractRange(image, chunkSize, 2 * chunkSize, password=password)
+
+
+@pytest.mark.parametrize("password", ["", "secret"])
+def testTamperedFirstChunkOfRangeIsCorrupted(password):
+    image = hide(randomPixels((700, 700, 3)), payload, name="payload.bin", password=password)
+    with pytest.raises(CorruptedDataError):
+        extractRange(tamper(image, 2 * chunkSize + 1000), 2 * chunkSize, 10, password=password)
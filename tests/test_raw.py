@@ -0,0 +1,62 @@
+import os
+import json
+import pytest
+import numpy as np
+from PIL import Image
+from StegoAlgorithm import hideDataToImage, extractDataFromImage, hideDataToImages, StegoError
+import StegoRaw
+from helpers import randomPixels
+
+
+def writeCarrier(directory, name: str) -> str:
+    """
+    Function to write a raw carrier of 60x80 pixels, in the format given by its file name.
+
+    Parameters:
+    directory (pathlib.Path): Directory to write the carrier to.
+    name (str): File name of the carrier. Files named .raw get a JSON sidecar.
+
+    Returns:
+    str: Path of the carrier.
+    """
+    path = str(directory / name)
+    if name.endswith(".pgm"):
+        Image.fromarray(randomPixels((60, 80))).save(path)
+    elif name.endswith(".raw"):
+        randomPixels((60, 80, 3)).tofile(path)
+        with open(path + StegoRaw.sidecarExtension, "w") as sidecarFile:
+            json.dump({"width": 80, "height": 60}, sidecarFile)
+    else:
+        Image.fromarray(randomPixels((60, 80, 3))).save(path)
+    return path
+
+
+@pytest.mark.parametrize("name", ["carrier.ppm", "carrier.pgm", "carrier.bmp", "carrier.raw"])
+def testRawCarrierRoundTrip(tmp_path, name):
+    carrier = writeCarrier(tmp_path, name)
+    assert StegoRaw.rawLayout(carrier)
+    payload = os.urandom(1000)
+    (tmp_path / "payload.bin").write_bytes(payload)
+    output = str(tmp_path / ("output" + os.path.splitext(name)[1]))
+    hideDataToImage(carrier, str(tmp_path / "payload.bin"), output, "secret")
+
+    layout = dict(StegoRaw.rawLayout(output), sidecar=None)
+    assert layout == dict(StegoRaw.rawLayout(carrier), sidecar=None)
+    with open(carrier, "rb") as carrierFile, open(output, "rb") as outputFile:
+        assert outputFile.read(layout["offset"]) == carrierFile.read(layout["offset"])
+    extracted = tmp_path / "extracted"
+    extracted.mkdir()
+    extractDataFromImage(output, "secret", output=str(extracted))
+    assert (extracted / "payload.bin").read_bytes() == payload
+
+
+@pytest.mark.parametrize("name, outputName", [("carrier.ppm", "output.png"), ("carrier.bmp", "output.png"),
+                                              ("carrier.raw", "output.bmp"), ("carrier.pgm", "output.ppm")])
+def testRawCarrierWithAnotherExtensionIsRejected(tmp_path, name, outputName):
+    carrier = writeCarrier(tmp_path, name)
+    (tmp_path / "payload.bin").write_bytes(b"data")
+    with pytest.raises(StegoError):
+        hideDataToImage(carrier, str(tmp_path / "payload.bin"), str(tmp_path / outputName), "")
+    with pytest.raises(StegoError):
+        hideDataToImages([carrier], str(tmp_path / "payload.bin"), [str(tmp_path / outputName)], "")
+    assert not (tmp_path / outputName).exists()
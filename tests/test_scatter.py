@@ -0,0 +1,44 @@
+import os
+import pytest
+import numpy as np
+from StegoAlgorithm import (hide, extract, permuteSlots, scatterRoundKeys, InvalidPasswordError,
+                            NoHiddenDataError)
+from helpers import randomPixels
+
+
+@pytest.mark.parametrize("options", [{}, {"bitsPerChannel": 3, "channelMask": 0b110}, {"version": 1}],
+                         ids=("default", "layout", "version1"))
+def testScatterRoundTrip(options):
+    payload = os.urandom(5000)
+    image = hide(randomPixels((120, 160, 3)), payload, name="payload.bin", password="secret", scatter=True,
+                 **options)
+    assert extract(image, password="secret") == ("payload.bin", payload)
+
+
+@pytest.mark.parametrize("password", ["wrong", ""])
+def testScatterWithWrongKeyIsRejected(password):
+    image = hide(randomPixels((120, 160, 3)), os.urandom(5000), name="payload.bin", password="secret", scatter=True)
+    with pytest.raises((InvalidPasswordError, NoHiddenDataError)):
+        extract(image, password=password)
+
+
+# Domains from the smallest, padded to 2 bits, to odd sizes just above a power of two, where cycle walking maps
+# almost half of the values again.
+@pytest.mark.parametrize("domain", [1, 2, 3, 5, 7, 17, 33, 255, 257, 1000, 4097, 65537])
+def testPermutationIsBijection(domain):
+    for key in (b"first", b"second"):
+        slots = permuteSlots(np.arange(domain, dtype=np.uint64), scatterRoundKeys(key), domain)
+        assert np.array_equal(np.sort(slots), np.arange(domain))
+
+
+def testPermutationOfWideDomain():
+    domain = (1 << 33) + 7
+    slots = permuteSlots(np.arange(1 << 16, dtype=np.uint64), scatterRoundKeys(b"key"), domain)
+    assert slots.dtype == np.uint64
+    assert len(np.unique(slots)) == 1 << 16 and slots.max() < domain
+
+
+def testPermutationDependsOnKey():
+    first, second = (permuteSlots(np.arange(4097, dtype=np.uint64), scatterRoundKeys(key), 4097)
+                     for key in (b"first", b"second"))
+    assert not np.array_equal(first, second)
@@ -0,0 +1,128 @@
+import io, os, sys, json, subprocess
+import pytest
+from PIL import Image
+from StegoAlgorithm import hide
+from StegoScript import runJob, scan
+from helpers import randomPixels
+
+
+def testBatchJobs(tmp_path):
+    carrier, hidden = str(tmp_path / "carrier.png"), tmp_path / "notes.txt"
+    Image.fromarray(randomPixels((40, 60, 3))).save(carrier)
+    hidden.write_bytes(b"notes")
+    job = {"input": carrier, "hidden": str(hidden), "password": "secret", "compression": None}
+
+    result = runJob(dict(job, mode="hide", output=str(tmp_path / "output.jpg")))
+    assert result["status"] == "failed" and result["message"] == "[!] Output image should be a PNG."
+    assert "password" not in result
+
+    assert runJob(dict(job, mode="hide", output=str(tmp_path / "output.png")))["status"] == "ok"
+    workingDirectory = os.getcwd()
+    result = runJob(dict(job, mode="extract", input=str(tmp_path / "output.png"), output=str(tmp_path / "out")))
+    assert result["status"] == "ok" and os.getcwd() == workingDirectory
+    assert (tmp_path / "out" / "notes.txt").read_bytes() == b"notes"
+
+    result = runJob(dict(job, mode="extract", input=str(tmp_path / "output.png"), password="wrong",
+                         output=str(tmp_path / "out")))
+    assert result["status"] == "failed" and result["message"] == "[!] Invalid password or data."
+
+
+def testBatchExtractCollisions(tmp_path):
+    images = [str(tmp_path / "image{}.png".format(index)) for index in range(3)]
+    for index, (image, name) in enumerate(zip(images, ["notes.txt", "notes.txt", "other.txt"])):
+        hidden = hide(randomPixels((40, 60, 3), seed=index), b"notes %d" % index, name=name, password="secret")
+        Image.fromarray(hidden).save(image)
+    output = tmp_path / "out"
+    job = {"mode": "extract", "password": "secret", "output": str(output)}
+
+    assert runJob(dict(job, input=images[0]))["status"] == "ok"
+    result = runJob(dict(job, input=images[1]))
+    assert result["status"] == "failed"
+    assert result["message"] == "[!] notes.txt already exists in {}.".format(output)
+    assert runJob(dict(job, input=images[2]))["status"] == "ok"
+    assert sorted(os.listdir(output)) == ["notes.txt", "other.txt"]
+    assert (output / "notes.txt").read_bytes() == b"notes 0"
+    assert (output / "other.txt").read_bytes() == b"notes 2"
+
+
+def testScanWithCheckpoint(tmp_path):
+    images = tmp_path / "images"
+    (images / "nested").mkdir(parents=True)
+    Image.fromarray(hide(randomPixels((40, 60, 3)), b"notes", name="notes.txt", password="secret")) \
+        .save(images / "hidden.png")
+    Image.fromarray(randomPixels((40, 60, 3))).save(images / "clean.png")
+    Image.fromarray(randomPixels((40, 60, 3))).save(images / "nested" / "clean.bmp")
+    Image.fromarray(randomPixels((40, 60, 3))).save(images / "photo.jpg")
+    (images / "broken.png").write_bytes(b"not an image")
+    (images / "notes.txt").write_bytes(b"not an image either")
+    report, checkpoint = tmp_path / "report.jsonl", tmp_path / "checkpoint.txt"
+
+    scan(["-o", str(report), "-c", str(checkpoint), "-w", "1", str(images)])
+    results = {os.path.basename(result["path"]): result for result in map(json.loads, report.read_text().splitlines())}
+    assert set(results) == {"hidden.png", "broken.png"}
+    assert results["hidden.png"]["hidden"] and results["hidden.png"]["encrypted"]
+    assert "error" in results["broken.png"]
+    scanned = checkpoint.read_text().splitlines()
+    assert sorted(map(os.path.basename, scanned)) == ["broken.png", "clean.bmp", "clean.png", "hidden.png"]
+
+    # A resumed scan skips the images in the checkpoint, except one whose line was cut short.
+    Image.fromarray(hide(randomPixels((40, 60, 3)), b"more", name="more.txt")).save(images / "nested" / "new.png")
+    checkpoint.write_text("".join(path + "\n" for path in scanned[:-1]) + scanned[-1][:-3])
+    scan(["-o", str(report), "-c", str(checkpoint), "-w", "1", "-a", str(images)])
+    resumed = [json.loads(line) for line in report.read_text().splitlines()[2:]]
+    assert sorted(result["path"] for result in resumed) == sorted([str(images / "nested" / "new.png"), scanned[-1]])
+    assert next(result for result in resumed if result["path"].endswith("new.png"))["hidden"]
+    assert set(checkpoint.read_text().splitlines()) >= set(scanned) | {str(images / "nested" / "new.png")}
+
+
+scriptPath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "StegoScript.py")
+
+
+def runScript(arguments: list, directory, data: bytes = b"") -> subprocess.CompletedProcess:
+    """
+    Function to run the command-line script in a directory, without a daemon.
+
+    Parameters:
+    arguments (list): Command-line arguments.
+    directory (pathlib.Path): Working directory.
+    data (bytes): Standard input.
+
+    Returns:
+    subprocess.CompletedProcess: The finished process, with its standard output and error as bytes.
+    """
+    environment = {key: value for key, value in os.environ.items() if key != "STEGO_DAEMON"}
+    return subprocess.run([sys.executable, scriptPath] + arguments, cwd=directory, input=data, capture_output=True,
+                          env=environment, timeout=120)
+
+
+def testImagesAndFilesThroughPipes(tmp_path):
+    carrier = io.BytesIO()
+    Image.fromarray(randomPixels((60, 80, 3))).save(carrier, format="PNG")
+    (tmp_path / "payload.bin").write_bytes(b"payload" * 50)
+
+    hidden = runScript(["-i", "-", "-h", "payload.bin", "-o", "-", "-p", "secret"], tmp_path, carrier.getvalue())
+    assert Image.open(io.BytesIO(hidden.stdout)).format == "PNG"
+    assert b"[+] Saving image to <stdout>." in hidden.stderr
+    extracted = runScript(["-e", "-i", "-", "-o", "-", "-p", "secret"], tmp_path, hidden.stdout)
+    assert extracted.stdout == b"payload" * 50
+
+    (tmp_path / "carrier.png").write_bytes(carrier.getvalue())
+    runScript(["-i", "carrier.png", "-h", "-", "-o", "output.png"], tmp_path, b"from stdin")
+    runScript(["-e", "-i", "output.png"], tmp_path)
+    assert (tmp_path / "hidden_file").read_bytes() == b"from stdin"
+
+
+@pytest.mark.parametrize("arguments, message", [
+    (["-i", "-", "-h", "payload.bin", "-o", "output.bmp"], b"[!] Output image should be a PNG."),
+    (["-i", "carrier.ppm", "-h", "payload.bin", "-o", "-"], b"[!] Raw input images can only be saved to a file."),
+    (["-i", "-", "-h", "-", "-o", "output.png"], b"[!] Standard input can only be read once."),
+], ids=("formatOfStdin", "rawToStdout", "stdinTwice"))
+def testPipeFailures(tmp_path, arguments, message):
+    carrier = io.BytesIO()
+    Image.fromarray(randomPixels((60, 80, 3))).save(carrier, format="PNG")
+    Image.fromarray(randomPixels((60, 80, 3))).save(tmp_path / "carrier.ppm")
+    (tmp_path / "payload.bin").write_bytes(b"payload")
+
+    result = runScript(arguments, tmp_path, carrier.getvalue())
+    assert message in result.stdout + result.stderr
+    assert not result.stdout.startswith(b"\x89PNG") and not (tmp_path / arguments[-1]).exists()
@@ -0,0 +1,48 @@
+import asyncio, json, os
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from StegoServer import StegoService, warmWorker
+
+
+@pytest.mark.parametrize("query", [{"kdf": "nope"}, {"compression": "nope"}, {"version": "7"}, {"bits": "x"}])
+def testInvalidHideParametersAreRejected(query):
+    service = StegoService(workers=1)
+    status, body, _ = asyncio.run(service.route("/hide", query, {"x-carrier-length": "3"}, b"carrier"))
+    assert status == 400
+    assert json.loads(body)["message"] == "Invalid request parameters."
+
+
+async def startService() -> StegoService:
+    service = StegoService(workers=1)
+    await service.start("127.0.0.1", 0)
+    return service
+
+
+@pytest.mark.parametrize("length", ["-5", "x", "1_0", "+3"])
+def testInvalidContentLengthIsRejected(length):
+    async def run():
+        service = await startService()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+            writer.write("POST /extract HTTP/1.1\r\nContent-Length: {}\r\n\r\n".format(length).encode())
+            response = await asyncio.wait_for(reader.read(), 30)
+            writer.close()
+            return response
+        finally:
+            await service.close()
+
+    assert asyncio.run(run()).startswith(b"HTTP/1.1 400 ")
+
+
+def testPoolIsRestartedAfterWorkerDies():
+    async def run():
+        service = await startService()
+        try:
+            worker = await service.submit("extract", warmWorker)
+            with pytest.raises(BrokenProcessPool):
+                await service.submit("extract", os._exit, 1)
+            assert await asyncio.wait_for(service.submit("extract", warmWorker), 60) != worker
+        finally:
+            await service.close()
+
+    asyncio.run(run())
@@ -0,0 +1,52 @@
+import os
+import pytest
+import numpy as np
+from PIL import Image
+import StegoAlgorithm
+from StegoAlgorithm import embedFrameInArray, embedBlocks, hide, extract
+from helpers import randomPixels
+
+layouts = {"default": (2, None, False), "layout": (3, 0b101, False), "scatter": (2, None, True)}
+
+
+@pytest.fixture
+def tiles(monkeypatch):
+    """
+    Fixture to write and read frames of a few kilobytes in tiles, on 3 worker processes, and record the calls
+    to embedTiled and unpackTiled with whether their pixels were already in shared memory.
+    """
+    monkeypatch.setattr(StegoAlgorithm, "tiledMinimumSymbols", 1 << 14)
+    monkeypatch.setattr(StegoAlgorithm, "tileSymbols", 1 << 12)
+    monkeypatch.setattr(StegoAlgorithm.os, "cpu_count", lambda: 3)
+    calls = list()
+    for name in ("embedTiled", "unpackTiled"):
+        def record(pixels, *args, function=getattr(StegoAlgorithm, name), name=name):
+            calls.append((name, StegoAlgorithm.SharedArray.holding(pixels) is not None))
+            return function(pixels, *args)
+        monkeypatch.setattr(StegoAlgorithm, name, record)
+    return calls
+
+
+@pytest.mark.parametrize("bits, mask, scatter", layouts.values(), ids=layouts.keys())
+def testTiledEmbedMatchesSingleProcess(tiles, bits, mask, scatter):
+    carrier, payload = randomPixels((200, 150, 3)), os.urandom(20000)
+    scatterKey = StegoAlgorithm.newScatterKey("secret", "md5") if scatter else None
+    single = carrier.copy()
+    embedFrameInArray(single, [payload], len(payload), bits, mask, scatterKey, workers=1)
+    assert tiles == []
+
+    tiled = carrier.copy()
+    embedFrameInArray(tiled, [payload], len(payload), bits, mask, scatterKey)
+    image = Image.fromarray(carrier)
+    embedBlocks(image, [payload], len(payload), bits, mask, scatterKey)
+    assert np.array_equal(tiled, single)
+    assert np.array_equal(np.asarray(image), single)
+    # Rows copied out of an image are allocated in shared memory and written in place.
+    assert tiles == [("embedTiled", False), ("embedTiled", True)]
+
+
+def testTiledExtractRoundTrip(tiles):
+    payload = os.urandom(20000)
+    image = hide(randomPixels((200, 150, 3)), payload, name="payload.bin")
+    assert extract(image) == ("payload.bin", payload)
+    assert [name for name, _ in tiles] == ["embedTiled", "unpackTiled"]